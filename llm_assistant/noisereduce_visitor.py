@@ -19,30 +19,28 @@ class NoiseReduceStreamVisitor(visitor.Visitor):
     def __init__(self):
         self.trim_left_len = visitor.get_second_byte_size(2)
         self.trim_right_len = visitor.get_second_byte_size(0.2)
+        self.window_data = visitor.RingBuffer(self.trim_left_len + self.trim_right_len + visitor.get_chunk_byte_size())
 
     def start(self, data):
         self.first = True
         self.start_next(data)
 
     def exec(self, data):
-        if self.window_data is None:
-            self.window_data = data
-        else:
-            self.window_data += data
+        self.window_data.append(data)
 
         if len(self.window_data) > self.trim_left_len + self.trim_right_len:
-            reduced_noise = reduce_noise(self.window_data)
+            reduced_noise = reduce_noise(self.window_data.view())
             if self.first:
                 self.exec_next(reduced_noise[:self.trim_left_len])
                 self.first = False
             reduced_noise = reduced_noise[self.trim_left_len:]
             reduced_noise = reduced_noise[:-self.trim_right_len]
             self.exec_next(reduced_noise)
-            self.window_data = self.window_data[len(reduced_noise):]
+            self.window_data.consume(len(reduced_noise))
 
     def stop(self, data):
         if len(self.window_data) > 0:
-            reduced_noise = reduce_noise(self.window_data)
+            reduced_noise = reduce_noise(self.window_data.view())
             if self.first:
                 self.exec_next(reduced_noise[:self.trim_left_len])
                 self.first = False
@@ -20,6 +20,7 @@ class SileroVadStreamFilterMuteVisitor(visitor.Visitor):
         self.window_len = self.chunk_size * self.window_count
         self.mute_threshold = math.ceil(visitor.MUTE_SECOND / 0.2)
         self.mute = self.mute_threshold
+        self.data_window = visitor.RingBuffer(self.window_len + self.chunk_size)
 
     def start(self, data):
         if not self.is_mute():
@@ -28,10 +29,7 @@ class SileroVadStreamFilterMuteVisitor(visitor.Visitor):
     def exec(self, data):
         if not data:
             return
-        if self.data_window is None:
-            self.data_window = data
-        else:
-            self.data_window += data
+        self.data_window.append(data)
 
         # 有说话->有说话：不用处理
         # 有说话->没说话：mute+=1
@@ -39,7 +37,7 @@ class SileroVadStreamFilterMuteVisitor(visitor.Visitor):
         # 没说话->没说话：不用处理
 
         if len(self.data_window) >= self.window_len:
-            speaking, confidences = self.is_speaks(self.data_window)
+            speaking, confidences = self.is_speaks(self.data_window.view())
             if not self.is_mute() and not speaking:
                 self.mute += len(confidences)
                 # if self.is_mute():
@@ -47,8 +45,9 @@ class SileroVadStreamFilterMuteVisitor(visitor.Visitor):
             if self.is_mute() and speaking:
                 # print(f"\n有说话")
                 self.mute = 0
-                self.exec_next_mute(self.data_window[:-len(data)])
-            self.data_window = None
+                # 下游可能保留数据，这里复制一份，不传缓冲区的视图
+                self.exec_next_mute(self.data_window.view()[:-len(data)].tobytes())
+            self.data_window.clear()
         self.exec_next_mute(data)
 
     def is_speaks(self, data_window):
@@ -10,6 +10,7 @@ class SttStreamVisitor(visitor.Visitor):
     consuming = True
 
     def __init__(self):
+        self.data_window = visitor.RingBuffer(visitor.get_second_byte_size(1))
         self.lock = threading.Lock()
         self.thread = threading.Thread(target=self.consumer)
         self.thread.start()
@@ -18,8 +19,8 @@ class SttStreamVisitor(visitor.Visitor):
         while self.consuming:
             time.sleep(0.5)
             with self.lock:
-                data = self.data_window
-                self.data_window = None
+                data = self.data_window.tobytes()
+                self.data_window.clear()
             if not data:
                 continue
             self.stt(data)
@@ -42,7 +43,4 @@ class SttStreamVisitor(visitor.Visitor):
         if not data:
             return
         with self.lock:
-            if self.data_window is None:
-                self.data_window = data
-            else:
-                self.data_window += data
+            self.data_window.append(data)
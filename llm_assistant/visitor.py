@@ -1,5 +1,6 @@
 import pyaudio
 import math
+import numpy as np
 
 CHUNK_SIZE = 512  # 设置音频流的数据块大小
 FORMAT = pyaudio.paInt16  # 设置音频流的格式为16位整型，也就是2字节
@@ -31,6 +32,63 @@ class Visitor:
             self.next.stop(data)
 
 
+class RingBuffer:
+    """
+    预分配的int16音频缓冲区，按字节长度读写，替代 bytes += bytes（每次都复制整个窗口）。
+    窗口始终是连续内存：写到末尾时把剩余数据搬回开头，每写满一次容量最多搬一次，
+    追加的开销与数据块大小成正比，与窗口长度无关；容量不够时翻倍扩容，不丢数据。
+    view() 返回的是缓冲区本身的视图，下一次 append 之后可能被覆盖，需要保留时用 tobytes()。
+    """
+    buffer = None
+    start = 0
+    end = 0
+
+    def __init__(self, byte_size):
+        # byte_size字节是byte_size/2个采样，这里分配byte_size个采样，即预留2倍容量，搬移的次数更少
+        self.buffer = np.zeros(max(byte_size, 2), dtype=np.int16)
+
+    def __len__(self):
+        return (self.end - self.start) * 2
+
+    def append(self, data):
+        if not data:
+            return
+        samples = np.frombuffer(data, dtype=np.int16)
+        size = self.end - self.start
+        if self.end + len(samples) > len(self.buffer):
+            if (size + len(samples)) * 2 > len(self.buffer):
+                buffer = np.zeros(max(len(self.buffer), size + len(samples)) * 2, dtype=np.int16)
+                buffer[:size] = self.buffer[self.start:self.end]
+                self.buffer = buffer
+            else:
+                self.buffer[:size] = self.buffer[self.start:self.end]
+            self.start = 0
+            self.end = size
+        self.buffer[self.end:self.end + len(samples)] = samples
+        self.end += len(samples)
+
+    def array(self):
+        # 窗口的int16视图
+        return self.buffer[self.start:self.end]
+
+    def view(self):
+        # 窗口的字节视图，按字节下标切片，不复制
+        return memoryview(self.array()).cast('B')
+
+    def tobytes(self):
+        return self.array().tobytes()
+
+    def consume(self, byte_size):
+        # 从左边裁掉byte_size字节
+        self.start = min(self.start + byte_size // 2, self.end)
+        if self.start == self.end:
+            self.clear()
+
+    def clear(self):
+        self.start = 0
+        self.end = 0
+
+
 def get_second_byte_size(second):
     chunk_size = get_chunk_byte_size()
     chunk_count = get_second_chunk_count(second)
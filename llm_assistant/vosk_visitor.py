@@ -15,6 +15,7 @@ class VoskStreamVisitor(visitor.Visitor):
     def __init__(self):
         model = vosk.Model("model/vosk/vosk-model-cn-0.22")
         self.recognizer = vosk.KaldiRecognizer(model, visitor.SAMPLE_RATE)
+        self.data_window = visitor.RingBuffer(visitor.get_second_byte_size(0.5))
         self.lock = threading.Lock()
         self.thread = threading.Thread(target=self.consumer)
         self.thread.start()
@@ -23,8 +24,8 @@ class VoskStreamVisitor(visitor.Visitor):
         while self.consuming:
             time.sleep(0.1)
             with self.lock:
-                data = self.data_window
-                self.data_window = None
+                data = self.data_window.tobytes()
+                self.data_window.clear()
             self.recognize(data)
 
     def start(self, data):
@@ -45,10 +46,7 @@ class VoskStreamVisitor(visitor.Visitor):
         if not data:
             return
         with self.lock:
-            if self.data_window is None:
-                self.data_window = data
-            else:
-                self.data_window += data
+            self.data_window.append(data)
 
     def recognize(self, data):
         if not data:
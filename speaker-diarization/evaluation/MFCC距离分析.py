@@ -37,10 +37,12 @@ scipy>=1.7.0
 import numpy as np
 import librosa
 import matplotlib.pyplot as plt
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import as_completed
 import os
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import warnings
+import tool_feature_store
+import tool_parallel
 
 
 def _compute_single_file_mfcc(wav_path: str) -> Dict:
@@ -51,10 +53,10 @@ def _compute_single_file_mfcc(wav_path: str) -> Dict:
         warnings.filterwarnings('ignore')
 
         # 加载音频
-        y, sr = librosa.load(wav_path, sr=22050)
+        y, sr = tool_feature_store.load(wav_path, sr=22050)
 
-        # 提取MFCC特征 (13维)
-        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+        # 提取MFCC特征 (13维)，由缓存的STFT计算
+        mfcc = tool_feature_store.get_mfcc(wav_path, sr=22050, n_mfcc=13)
 
         # 计算相邻帧的余弦距离
         distances = []
@@ -159,7 +161,7 @@ def _calculate_dynamic_y_limits(data: np.ndarray, margin_factor: float = 0.15) -
     return float(y_min), float(y_max)
 
 
-def analyze_mfcc_distance(wav_paths: List[str]) -> None:
+def analyze_mfcc_distance(wav_paths: List[str], render: bool = True) -> Optional[List[Dict]]:
     """
     分析多个WAV文件的MFCC距离，评估AI翻唱质量并可视化对比
 
@@ -170,6 +172,10 @@ def analyze_mfcc_distance(wav_paths: List[str]) -> None:
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数递增排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
+
+    返回:
+        render为False时为每个文件的结果字典列表；画图或失败时返回None
     """
 
     if not wav_paths:
@@ -193,7 +199,7 @@ def analyze_mfcc_distance(wav_paths: List[str]) -> None:
     results = [None] * len(wav_paths)
     max_workers = min(os.cpu_count() or 4, 8, len(wav_paths))
 
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.process_pool(max_workers=max_workers) as executor:
         future_to_idx = {
             executor.submit(_compute_single_file_mfcc, path): idx
             for idx, path in enumerate(wav_paths)
@@ -225,6 +231,9 @@ def analyze_mfcc_distance(wav_paths: List[str]) -> None:
         print("\n错误：没有成功处理的文件")
         return
 
+    if not render:
+        return valid_results
+
     # ==================== 提取数据 ====================
     filenames = [r['filename'] for r in valid_results]
     mean_distances = np.array([r['mean_distance'] for r in valid_results])
@@ -0,0 +1,129 @@
+"""
+F0后端的精度与速度对比，以 librosa.pyin 为参考
+
+用法:
+    python benchmark_f0.py                  # 当前目录下的全部wav（与evaluation.py相同的文件）
+    python benchmark_f0.py a.wav b.wav      # 指定文件
+
+指标:
+    RTF         计算耗时 / 音频时长，越小越快
+    加速比      pyin耗时 / 后端耗时
+    有声一致率  有声/无声判断与pyin相同的帧占比
+    有声召回    pyin判为有声的帧中，后端也判为有声的占比
+    中位误差    双方都有声的帧上 |1200·log2(f0/f0_pyin)| 的中位数（音分）
+    粗差率      双方都有声的帧上误差超过50音分的占比
+    八度错误    双方都有声的帧上误差在1200±100音分内的占比
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+import tool_f0
+import tool_feature_store
+
+sr = 22050
+hop_length = 512
+frame_length = 2048
+
+
+def compare(f0: np.ndarray, voiced: np.ndarray, ref_f0: np.ndarray, ref_voiced: np.ndarray) -> Dict[str, float]:
+    """
+    与参考F0轨迹逐帧对比
+
+    返回:
+        各项精度指标
+    """
+    both = voiced & ref_voiced & ~np.isnan(f0) & ~np.isnan(ref_f0)
+    cents = np.abs(1200 * np.log2(f0[both] / ref_f0[both])) if both.any() else np.array([np.nan])
+    return {
+        'voicing_agreement': float(np.mean(voiced == ref_voiced)),
+        'voicing_recall': float(np.sum(voiced & ref_voiced) / max(np.sum(ref_voiced), 1)),
+        'median_cents': float(np.median(cents)),
+        'gross_error_rate': float(np.mean(cents > 50)),
+        'octave_error_rate': float(np.mean(np.abs(cents - 1200) < 100)),
+    }
+
+
+def run_benchmark(wav_paths: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    对每个文件用全部后端提取F0（不经过特征缓存），与pyin对比
+
+    参数:
+        wav_paths: WAV文件路径列表
+
+    返回:
+        {后端名: 汇总指标}
+    """
+    totals = {name: {'seconds': 0.0, 'metrics': []} for name in tool_f0.backends}
+    total_duration = 0.0
+
+    for wav_path in wav_paths:
+        y, _ = tool_feature_store.load(wav_path, sr)
+        y = np.array(y)
+        duration = len(y) / sr
+        total_duration += duration
+
+        tracks = {}
+        for name, backend in tool_f0.backends.items():
+            start = time.perf_counter()
+            f0, voiced, _ = backend(y, sr, frame_length=frame_length, hop_length=hop_length)
+            totals[name]['seconds'] += time.perf_counter() - start
+            tracks[name] = (np.asarray(f0), np.asarray(voiced, dtype=bool))
+
+        ref_f0, ref_voiced = tracks['pyin']
+        line = [f"{Path(wav_path).name} ({duration:.1f}s)"]
+        for name, (f0, voiced) in tracks.items():
+            if name == 'pyin':
+                continue
+            metrics = compare(f0, voiced, ref_f0, ref_voiced)
+            totals[name]['metrics'].append(metrics)
+            line.append(f"{name}: 中位误差 {metrics['median_cents']:.1f} 音分, 粗差率 {metrics['gross_error_rate'] * 100:.1f}%, "
+                        f"有声一致率 {metrics['voicing_agreement'] * 100:.1f}%")
+        print("  ".join(line))
+
+    summary = {}
+    pyin_seconds = totals['pyin']['seconds']
+    for name, total in totals.items():
+        row = {
+            'rtf': total['seconds'] / max(total_duration, 1e-9),
+            'speedup': pyin_seconds / max(total['seconds'], 1e-9),
+        }
+        for key in ('voicing_agreement', 'voicing_recall', 'median_cents', 'gross_error_rate', 'octave_error_rate'):
+            values = [m[key] for m in total['metrics'] if not np.isnan(m[key])]
+            row[key] = float(np.mean(values)) if values else float('nan')
+        summary[name] = row
+    return summary
+
+
+def print_summary(summary: Dict[str, Dict[str, float]]) -> None:
+    """打印汇总表"""
+    print("\n" + "=" * 100)
+    print(f"{'后端':<8}{'RTF':>10}{'加速比':>10}{'有声一致率':>12}{'有声召回':>10}{'中位误差(音分)':>16}{'粗差率':>10}{'八度错误':>10}")
+    print("-" * 100)
+    for name, row in summary.items():
+        if name == 'pyin':
+            print(f"{name:<8}{row['rtf']:>10.4f}{row['speedup']:>10.1f}{'(参考)':>12}")
+            continue
+        print(f"{name:<8}{row['rtf']:>10.4f}{row['speedup']:>10.1f}{row['voicing_agreement'] * 100:>11.1f}%"
+              f"{row['voicing_recall'] * 100:>9.1f}%{row['median_cents']:>16.2f}"
+              f"{row['gross_error_rate'] * 100:>9.2f}%{row['octave_error_rate'] * 100:>9.2f}%")
+    print("=" * 100)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        paths = sys.argv[1:]
+    else:
+        from evaluation import get_sorted_wav_paths
+        paths = get_sorted_wav_paths()
+
+    if not paths:
+        print("❌ 没有找到wav文件")
+        sys.exit(1)
+
+    print(f"🎵 F0后端对比，共 {len(paths)} 个文件，参考: pyin")
+    print_summary(run_benchmark(paths))
@@ -1,5 +1,11 @@
 import os
+import tool_parallel
+
+# 每个进程1个BLAS/OpenMP线程，需在导入numpy之前设置，并行度由进程池控制
+tool_parallel.limit_blas_threads()
+
 import matplotlib.pyplot as plt
+import tool_feature_store
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['Noto Sans CJK JP', 'Noto Sans CJK SC', 'Noto Sans CJK TC', 'DejaVu Sans']
@@ -51,84 +57,211 @@ def get_sorted_wav_paths():
 
 import multiprocessing as mp
 from functools import partial
+import argparse
+import itertools
+import tool_metrics
+import tool_result_db
+import contextlib
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# 定义所有要执行的分析任务
+tasks = [
+    ("集成响度", "analyze_integrated_loudness"),
+    ("短时响度波动", "analyze_short_term_loudness_variance"),
+    ("音高与基频稳定性", "analyze_f0_stability"),
+    ("音高漂移", "analyze_pitch_drift"),
+    ("峰均比", "analyze_crest_factor"),
+    ("动态范围", "analyze_rms_dynamic_range"),
+    ("削波检测", "analyze_clipping_detection"),
+    ("频谱质心", "analyze_spectral_centroid"),
+    ("频谱平坦度", "analyze_spectral_flatness"),
+    ("谐噪比", "analyze_hnr_quality"),
+    ("频谱通量", "analyze_spectral_flux"),
+    ("频谱熵", "analyze_spectral_entropy"),
+    ("频谱带宽", "evaluate_spectral_bandwidth"),
+    ("频谱滚降点", "analyze_spectral_rolloff"),
+    ("共振峰分析", "analyze_formant_quality"),
+    ("振幅微扰", "analyze_shimmer_quality"),
+    ("零交叉率", "analyze_zcr_quality"),
+    ("高频能量异常", "analyze_hf_energy_ratio"),
+    ("信噪比估算", "analyze_audio_snr"),
+    ("总谐波失真", "analyze_thdn"),
+    ("频谱空洞与高频缺失", "analyze_high_frequency_quality"),
+    ("MFCC距离分析", "analyze_mfcc_distance"),
+    ("调制频谱分析", "analyze_modulation_spectrum"),
+    ("连续性指标", "analyze_frame_continuity"),
+]
 
 
-def import_and_run(module_name, func_name, wav_files):
+def import_and_run(module_name, func_name, wav_files, **kwargs):
     """在子进程中导入模块并执行函数"""
     try:
         module = __import__(module_name)
         func = getattr(module, func_name)
-        return module_name, func(wav_files), None
+        return module_name, func(wav_files, **kwargs), None
     except Exception as e:
         return module_name, None, str(e)
 
 
+def import_and_render(module_name, func_name, wav_files, png_dir):
+    """
+    在子进程中无界面地画出某个指标的图表，plt.show() 被替换为把当前所有图表保存为PNG
+
+    返回:
+        (模块名, 保存的PNG路径列表, 错误信息)
+    """
+    plt.switch_backend('Agg')
+    png_paths = []
+    counter = itertools.count(1)
+
+    def save_figures(*args, **kwargs):
+        for num in plt.get_fignums():
+            png_path = os.path.join(png_dir, f"{module_name}_{next(counter)}.png")
+            plt.figure(num).savefig(png_path, dpi=120, bbox_inches='tight')
+            png_paths.append(png_path)
+        plt.close('all')
+
+    plt.show = save_figures
+    module_name, _, error = import_and_run(module_name, func_name, wav_files)
+    # 没有调用 plt.show() 的模块（如只 savefig 的），把剩下的图表也保存下来
+    save_figures()
+    return module_name, png_paths, error
+
+
+def run_file_task(module_name, func_name, wav_path):
+    """
+    调度器里的单个 (文件, 指标) 任务：只计算不画图，模块自己的打印输出丢弃
+
+    返回:
+        (模块名, WAV路径, 结果, 错误信息)
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        _, data, error = import_and_run(module_name, func_name, [wav_path], render=False)
+    return module_name, wav_path, data, error
+
+
+def run_timed(task):
+    """在子进程中执行 (任务函数, 参数元组) 并计时"""
+    worker, args = task
+    start = time.perf_counter()
+    result = worker(*args)
+    return result, time.perf_counter() - start
+
+
+def run_tasks(worker, task_list=None, pool_size=None):
+    """
+    按指标并行执行任务（每个指标一个任务，需要全部文件才能画对比图时使用）。
+    指标数少于CPU核数时，把多出来的核平分给各个指标，模块内部按文件的线程池/进程池照常并发
+
+    参数:
+        worker: 入参为 (模块名, 函数名, ...) 的任务函数，返回 (模块名, 结果, 错误信息)
+        task_list: 每个任务传给worker的参数元组，第一个元素是模块名，默认为全部 tasks
+        pool_size: 进程数，默认为CPU核数
+
+    返回:
+        (成功结果字典, 错误字典, [(指标, 文件名, 耗时秒)])
+    """
+    task_list = task_list or tasks
+    total_workers = pool_size or mp.cpu_count()
+    pool_size = min(total_workers, len(task_list))
+    inner_workers = max(total_workers // pool_size, 1)
+
+    completed_results = {}
+    errors = {}
+    timings = []
+
+    # 每个工作进程1个BLAS线程，模块内部的线程池/进程池最多 inner_workers 个并发，总并行度不超过CPU核数；
+    # 用 ProcessPoolExecutor 而不是 mp.Pool，工作进程不是daemon进程，模块内部的进程池才能开子进程
+    with ProcessPoolExecutor(max_workers=pool_size, initializer=tool_parallel.init_worker,
+                             initargs=(inner_workers,)) as executor:
+        futures = [executor.submit(run_timed, (worker, task)) for task in task_list]
+        for future in as_completed(futures):
+            (name, data, error), seconds = future.result()
+            timings.append((name, '', seconds))
+            if error:
+                errors[name] = error
+                print(f"❌ {name}: 失败 - {error} ({seconds:.1f}s)")
+            else:
+                completed_results[name] = data
+                print(f"✅ {name}: 完成 ({seconds:.1f}s)")
+
+    return completed_results, errors, timings
+
+
+def run_file_tasks(metric_files, pool_size=None):
+    """
+    全局调度：把 (指标, 文件列表) 展开成 (文件, 指标) 任务，全部放进一个进程池
+
+    参数:
+        metric_files: [(模块名, 函数名, WAV路径列表)]
+        pool_size: 进程数，默认为CPU核数
+
+    返回:
+        ({(模块名, WAV路径): 结果字典列表}, {模块名: 第一个错误信息}, [(指标, 文件名, 耗时秒)])
+        出错、没有返回结果、或结果标记为失败的文件都计入错误；标记为失败的结果仍保留在结果字典里
+    """
+    file_tasks = [(module_name, func_name, path) for module_name, func_name, paths in metric_files for path in paths]
+    if not file_tasks:
+        return {}, {}, []
+    pool_size = min(pool_size or mp.cpu_count(), len(file_tasks))
+    print(f"开始并行计算 {len(file_tasks)} 个 (文件, 指标) 任务，使用 {pool_size} 个进程...")
+
+    per_file = {}
+    errors = {}
+    timings = []
+
+    with mp.Pool(processes=pool_size, initializer=tool_parallel.init_worker) as pool:
+        jobs = [(run_file_task, task) for task in file_tasks]
+        for done, ((module_name, path, data, error), seconds) in enumerate(pool.imap_unordered(run_timed, jobs), 1):
+            timings.append((module_name, os.path.basename(path), seconds))
+            results = [r for r in data if isinstance(r, dict)] if isinstance(data, list) else []
+            if not error and not results:
+                # 模块内部吞掉了异常（如返回{}或空列表），也算失败
+                error = f"没有返回结果 ({type(data).__name__})"
+            if not error:
+                error = next((e for e in map(tool_metrics.get_result_error, results) if e), None)
+                per_file[(module_name, path)] = results
+            if error:
+                errors.setdefault(module_name, f"{os.path.basename(path)}: {error}")
+            if done % 50 == 0 or done == len(file_tasks):
+                print(f"  进度: {done}/{len(file_tasks)}")
+
+    for module_name, error in errors.items():
+        print(f"❌ {module_name}: 失败 - {error}")
+
+    return per_file, errors, timings
+
+
+def print_timings(timings, top=10):
+    """打印各指标的累计耗时和最慢的任务"""
+    totals = {}
+    for name, _, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+
+    print(f"\n⏱ 各指标累计耗时:")
+    for name, seconds in sorted(totals.items(), key=lambda x: -x[1]):
+        print(f"  {name:<12} {seconds:8.2f}s")
+
+    slowest = sorted(timings, key=lambda x: -x[2])[:top]
+    print(f"⏱ 最慢的 {len(slowest)} 个任务:")
+    for name, file_name, seconds in slowest:
+        print(f"  {name} {file_name} {seconds:.2f}s")
+
+
 def main():
     wav_files = get_sorted_wav_paths()
 
-    # 定义所有要执行的分析任务
-    tasks = [
-        ("集成响度", "analyze_integrated_loudness"),
-        ("短时响度波动", "analyze_short_term_loudness_variance"),
-        ("音高与基频稳定性", "analyze_f0_stability"),
-        ("音高漂移", "analyze_pitch_drift"),
-        ("峰均比", "analyze_crest_factor"),
-        ("动态范围", "analyze_rms_dynamic_range"),
-        ("削波检测", "analyze_clipping_detection"),
-        ("频谱质心", "analyze_spectral_centroid"),
-        ("频谱平坦度", "analyze_spectral_flatness"),
-        ("谐噪比", "analyze_hnr_quality"),
-        ("频谱通量", "analyze_spectral_flux"),
-        ("频谱熵", "analyze_spectral_entropy"),
-        ("频谱带宽", "evaluate_spectral_bandwidth"),
-        ("频谱滚降点", "analyze_spectral_rolloff"),
-        ("共振峰分析", "analyze_formant_quality"),
-        ("振幅微扰", "analyze_shimmer_quality"),
-        ("零交叉率", "analyze_zcr_quality"),
-        ("高频能量异常", "analyze_hf_energy_ratio"),
-        ("信噪比估算", "analyze_audio_snr"),
-        ("总谐波失真", "analyze_thdn"),
-        ("频谱空洞与高频缺失", "analyze_high_frequency_quality"),
-        ("MFCC距离分析", "analyze_mfcc_distance"),
-        ("调制频谱分析", "analyze_modulation_spectrum"),
-        ("连续性指标", "analyze_frame_continuity"),
-    ]
-
-    # 创建进程池
-    cpu_count = mp.cpu_count()
-    pool_size = min(len(tasks), cpu_count * 2)  # 合理的进程数
-
-    print(f"开始并行分析，使用 {pool_size} 个进程...")
-
-    with mp.Pool(processes=pool_size) as pool:
-        # 使用partial固定wav_files参数
-        run_task = partial(import_and_run, wav_files=wav_files)
-
-        # 异步执行所有任务
-        results = []
-        for module_name, func_name in tasks:
-            result = pool.apply_async(run_task, (module_name, func_name))
-            results.append((module_name, result))
+    # 每个文件只解码一次，共享特征(STFT、MFCC、RMS、F0)只算一次，各模块读缓存
+    print(f"开始预计算特征缓存，共 {len(wav_files)} 个文件...")
+    tool_feature_store.warm(wav_files)
 
-        # 收集结果
-        completed_results = {}
-        errors = {}
+    pool_size = min(len(tasks), mp.cpu_count())
+    print(f"开始并行分析，使用 {pool_size} 个进程，每个进程内部按文件 {max(mp.cpu_count() // pool_size, 1)} 个并发...")
 
-        for module_name, result in results:
-            try:
-                name, data, error = result.get(timeout=300)  # 5分钟超时
-                if error:
-                    errors[name] = error
-                    print(f"❌ {name}: 失败 - {error}")
-                else:
-                    completed_results[name] = data
-                    print(f"✅ {name}: 完成")
-            except mp.TimeoutError:
-                errors[module_name] = "超时"
-                print(f"❌ {module_name}: 超时")
-            except Exception as e:
-                errors[module_name] = str(e)
-                print(f"❌ {module_name}: 异常 - {e}")
+    # 使用partial固定wav_files参数
+    completed_results, errors, timings = run_tasks(partial(import_and_run, wav_files=wav_files))
+    print_timings(timings)
 
     print(f"\n分析完成!")
     print(f"成功: {len(completed_results)} 个")
@@ -137,7 +270,143 @@ def main():
     return completed_results, errors
 
 
+def main_headless(output_dir, render=False):
+    """
+    无界面批量模式：只计算不画图，全部指标写入一张 文件 × 指标 的表；render 为 True 时再按指标并行把图表画成PNG
+
+    参数:
+        output_dir: 输出目录，写入 metrics.csv / metrics.parquet / frames/*.npz，PNG 写入其下的 png/
+        render: 是否在计算之后额外画图
+
+    返回:
+        (成功结果字典, 错误字典)
+    """
+    plt.switch_backend('Agg')
+    wav_files = get_sorted_wav_paths()
+
+    print(f"开始预计算特征缓存，共 {len(wav_files)} 个文件...")
+    tool_feature_store.warm(wav_files)
+
+    metric_files = [(module_name, func_name, wav_files) for module_name, func_name in tasks]
+    per_file, errors, timings = run_file_tasks(metric_files)
+    completed_results = {}
+    for module_name, _ in tasks:
+        results = [r for path in wav_files for r in per_file.get((module_name, path), [])]
+        if results:
+            completed_results[module_name] = results
+    tool_metrics.save_table(completed_results, wav_files, output_dir)
+
+    if render:
+        # 画图是独立的一步，各指标从特征缓存重新计算后各自出图
+        png_dir = os.path.join(output_dir, 'png')
+        os.makedirs(png_dir, exist_ok=True)
+        print(f"开始并行画图，输出到 {png_dir}...")
+        _, render_errors, render_timings = run_tasks(partial(import_and_render, wav_files=wav_files, png_dir=png_dir))
+        errors.update({f"{name}(画图)": error for name, error in render_errors.items()})
+        timings += [(f"{name}(画图)", file_name, seconds) for name, file_name, seconds in render_timings]
+
+    print_timings(timings)
+    tool_metrics.save_timings(timings, output_dir)
+
+    print(f"\n分析完成!")
+    print(f"成功: {len(set(completed_results) - set(errors))} 个")
+    print(f"失败: {len(errors)} 个")
+
+    return completed_results, errors
+
+
+def main_incremental(output_dir, render=False):
+    """
+    增量模式：每个文件的指标结果按 (文件hash, 指标版本) 存在结果库里，只计算新增或变化的文件，
+    指标表和趋势图都由库里的结果生成
+
+    参数:
+        output_dir: 输出目录，写入 metrics.csv / metrics.parquet / frames/*.npz，趋势图写入其下的 trend/
+        render: 是否由库里的结果画出各指标的趋势图
+
+    返回:
+        (指标结果字典, 错误字典)
+    """
+    plt.switch_backend('Agg')
+    wav_files = get_sorted_wav_paths()
+
+    with tool_result_db.ResultDB() as db:
+        path_hashes = {path: db.get_file_hash(path) for path in wav_files}
+        versions = {module_name: tool_result_db.get_metric_version(module_name) for module_name, _ in tasks}
+
+        # 每个指标只算库里还没有的文件
+        pending = []
+        for module_name, func_name in tasks:
+            missing = tool_result_db.missing_paths(db, module_name, versions[module_name], path_hashes)
+            if missing:
+                pending.append((module_name, func_name, missing))
+
+        new_files = sorted({path for _, _, missing in pending for path in missing}, key=wav_files.index)
+        print(f"共 {len(wav_files)} 个文件，{len(new_files)} 个需要计算，{len(pending)}/{len(tasks)} 个指标有新文件")
+
+        errors = {}
+        if pending:
+            print(f"开始预计算特征缓存，共 {len(new_files)} 个文件...")
+            tool_feature_store.warm(new_files)
+
+            per_file, errors, timings = run_file_tasks(pending)
+            print_timings(timings)
+            tool_metrics.save_timings(timings, output_dir)
+
+            # 结果按文件hash存库，没有返回结果或结果标记为失败的文件不存，下次会重新计算
+            for module_name, _, _ in pending:
+                stored = {path_hashes[path]: results[0] for (name, path), results in per_file.items()
+                          if name == module_name and results and not tool_metrics.get_result_error(results[0])}
+                db.put_results(module_name, versions[module_name], stored)
+
+        # 从库里取全部文件的结果，文件标识换成当前路径（同内容的文件可能改过名）
+        metric_results = {}
+        for module_name, _ in tasks:
+            stored = db.get_results(module_name, versions[module_name], path_hashes.values())
+            metric_results[module_name] = [dict(stored[file_hash], path=path)
+                                           for path, file_hash in path_hashes.items() if file_hash in stored]
+
+        deleted = db.prune(versions)
+        if deleted:
+            print(f"🧹 已清理 {deleted} 条旧版本指标结果")
+
+    tool_metrics.save_table(metric_results, wav_files, output_dir)
+    if render:
+        tool_metrics.save_trend_charts(metric_results, wav_files, os.path.join(output_dir, 'trend'))
+
+    print(f"\n分析完成!")
+    print(f"失败: {len(errors)} 个")
+
+    return metric_results, errors
+
+
 if __name__ == "__main__":
     # 在Windows上使用多进程必须要有这个判断
     mp.freeze_support()
-    results, errors = main()
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="AI翻唱音频质量评估")
+    parser.add_argument("--headless", action="store_true", help="无界面批量模式，只计算并输出指标表")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量模式，只计算新增或变化的文件，指标表和趋势图由结果库生成")
+    parser.add_argument("--output", default="evaluation_output", help="无界面/增量模式的输出目录")
+    parser.add_argument("--render", action="store_true",
+                        help="无界面模式下额外把各指标图表保存为PNG；增量模式下画出各指标的趋势图")
+    parser.add_argument("--clear-cache", action="store_true", help="运行前清空特征缓存")
+    parser.add_argument("--cache-max-gb", type=float, default=20,
+                        help="特征缓存容量上限(GB)，运行结束后删除源文件已不存在/已变化的缓存，超出上限时按最近使用时间淘汰")
+    args = parser.parse_args()
+
+    if args.clear_cache:
+        tool_feature_store.clear()
+        print("🧹 已清空特征缓存")
+
+    if args.incremental:
+        results, errors = main_incremental(args.output, render=args.render)
+    elif args.headless:
+        results, errors = main_headless(args.output, render=args.render)
+    else:
+        results, errors = main()
+
+    deleted, freed = tool_feature_store.prune(get_sorted_wav_paths(), max_bytes=int(args.cache_max_gb * 1024 ** 3))
+    if deleted:
+        print(f"🧹 已清理 {deleted} 个特征缓存目录，释放 {freed / 1024 ** 2:.1f} MB")
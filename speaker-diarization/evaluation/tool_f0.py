@@ -0,0 +1,136 @@
+"""
+F0（基频）提取，可切换后端：
+    yin     向量化YIN，按帧批量用FFT计算差分函数，默认后端，比pyin快一到两个数量级
+    pyin    librosa.pyin，概率YIN + HMM平滑，最慢但最鲁棒
+
+所有后端的入参和返回与 librosa.pyin 一致：
+    (f0, voiced_flag, voiced_probs)，帧数为 1 + len(y) // hop_length（center=True），无声帧f0为NaN
+
+新增后端时实现同样签名的函数，加入 backends 即可；精度和速度对比见 benchmark_f0.py。
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# C2 / C7，与 librosa.note_to_hz('C2') / librosa.note_to_hz('C7') 相同
+fmin_default = 65.40639132514966
+fmax_default = 2093.004522404789
+
+
+def yin(y: np.ndarray, sr: int, fmin: float = fmin_default, fmax: float = fmax_default,
+        frame_length: int = 2048, hop_length: int = 512,
+        threshold: float = 0.15, silence_db: float = -60.0,
+        block_frames: int = 512) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    向量化YIN（de Cheveigné & Kawahara, 2002）
+
+    参数:
+        y: 单声道采样
+        sr: 采样率
+        fmin/fmax: 搜索的基频范围
+        frame_length: 帧长，差分函数的积分窗口为帧长的一半
+        hop_length: 帧移
+        threshold: 累积均值归一化差分函数的绝对阈值，低于阈值的第一个谷为基音周期，找不到则为无声帧
+        silence_db: 积分窗口的RMS低于该值(dBFS)视为静音
+        block_frames: 每批处理的帧数，控制内存占用
+
+    返回:
+        (f0, voiced_flag, voiced_probs)
+    """
+    y = np.asarray(y, dtype=np.float64)
+    win_length = frame_length // 2
+    min_period = max(int(np.floor(sr / fmax)), 2)
+    max_period = min(int(np.ceil(sr / fmin)), frame_length - win_length - 1)
+    if min_period >= max_period:
+        raise ValueError(f"基频范围无效: fmin={fmin}, fmax={fmax}, sr={sr}, frame_length={frame_length}")
+
+    # 与 librosa 的 center=True 一致：两端补零，第 t 帧以 t * hop_length 为中心
+    n_frames = 1 + len(y) // hop_length
+    frames = sliding_window_view(np.pad(y, frame_length // 2), frame_length)[::hop_length][:n_frames]
+
+    taus = np.arange(1, max_period + 1, dtype=np.float64)
+    silence_energy = win_length * 10 ** (silence_db / 10)
+
+    f0 = np.full(n_frames, np.nan)
+    voiced_flag = np.zeros(n_frames, dtype=bool)
+    voiced_probs = np.zeros(n_frames)
+
+    for start in range(0, n_frames, block_frames):
+        x = frames[start:start + block_frames]
+        n = len(x)
+
+        # 差分函数 d(τ) = E(0) + E(τ) - 2·r(τ)，r为前半帧与整帧的互相关，E为长度win_length的滑动能量
+        spectrum = np.fft.rfft(x, n=frame_length, axis=1)
+        reference = np.fft.rfft(x[:, :win_length], n=frame_length, axis=1)
+        acf = np.fft.irfft(spectrum * np.conj(reference), n=frame_length, axis=1)[:, :max_period + 1]
+        energy = np.zeros((n, frame_length + 1))
+        np.cumsum(x ** 2, axis=1, out=energy[:, 1:])
+        energy = energy[:, win_length:win_length + max_period + 1] - energy[:, :max_period + 1]
+        diff = np.maximum(energy[:, :1] + energy - 2 * acf, 0)
+
+        # 累积均值归一化 d'(τ) = d(τ) · τ / Σ_{k≤τ} d(k)，只保留搜索范围 [min_period, max_period]
+        cumulative = np.cumsum(diff[:, 1:], axis=1)
+        cmnd = diff[:, 1:] * taus / np.maximum(cumulative, np.finfo(np.float64).tiny)
+        cmnd = cmnd[:, min_period - 1:]
+
+        # 低于阈值的第一个局部极小
+        is_trough = np.zeros_like(cmnd, dtype=bool)
+        is_trough[:, 1:-1] = (cmnd[:, 1:-1] <= cmnd[:, :-2]) & (cmnd[:, 1:-1] < cmnd[:, 2:])
+        candidates = is_trough & (cmnd < threshold)
+        has_candidate = candidates.any(axis=1)
+        best = np.where(has_candidate, candidates.argmax(axis=1), cmnd.argmin(axis=1))
+
+        # 抛物线插值得到亚采样精度的周期
+        rows = np.arange(n)
+        inner = np.clip(best, 1, cmnd.shape[1] - 2)
+        left, center, right = cmnd[rows, inner - 1], cmnd[rows, inner], cmnd[rows, inner + 1]
+        curvature = left - 2 * center + right
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shift = np.where(np.abs(curvature) > 1e-12, 0.5 * (left - right) / curvature, 0.0)
+        shift = np.where(best == inner, np.clip(shift, -1, 1), 0.0)
+        period = min_period + best + shift
+
+        voiced = has_candidate & (energy[:, 0] > silence_energy)
+        block = slice(start, start + n)
+        f0[block] = np.where(voiced, sr / period, np.nan)
+        voiced_flag[block] = voiced
+        voiced_probs[block] = np.clip(1 - cmnd[rows, best], 0, 1)
+
+    return f0, voiced_flag, voiced_probs
+
+
+def pyin(y: np.ndarray, sr: int, fmin: float = fmin_default, fmax: float = fmax_default,
+         frame_length: int = 2048, hop_length: int = 512) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """librosa.pyin"""
+    import librosa
+    return librosa.pyin(np.asarray(y), fmin=fmin, fmax=fmax, sr=sr,
+                        frame_length=frame_length, hop_length=hop_length)
+
+
+backends: Dict[str, Callable[..., Tuple[np.ndarray, np.ndarray, np.ndarray]]] = {
+    'yin': yin,
+    'pyin': pyin,
+}
+
+# 各音高模块默认使用的后端，需要与旧结果对比时改为 'pyin'
+default_backend = 'yin'
+
+
+def extract(y: np.ndarray, sr: int, fmin: float = fmin_default, fmax: float = fmax_default,
+            frame_length: int = 2048, hop_length: int = 512,
+            backend: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    用指定后端提取F0
+
+    参数:
+        backend: 后端名称，None为 default_backend
+
+    返回:
+        (f0, voiced_flag, voiced_probs)
+    """
+    backend = backend or default_backend
+    if backend not in backends:
+        raise ValueError(f"未知的F0后端: {backend}，可选: {', '.join(backends)}")
+    return backends[backend](y, sr, fmin=fmin, fmax=fmax, frame_length=frame_length, hop_length=hop_length)
@@ -0,0 +1,312 @@
+"""
+特征缓存：每个文件只解码一次，共享的中间结果（STFT幅度谱、MFCC、RMS、F0）按(文件, 参数)只算一次，
+保存为.npy，之后以内存映射方式读取。
+
+各分析模块原来各自调用 librosa.load / wavfile.read / sf.read，这里提供结果一致的替代函数：
+    read_wav(path)          等价于 scipy.io.wavfile.read(path)
+    read_float(path)        等价于 soundfile.read(path)
+    load(path, sr)          等价于 librosa.load(path, sr=sr)
+    get_stft(path, sr)      等价于 np.abs(librosa.stft(y, n_fft=2048, hop_length=512))
+    get_mfcc(path, sr)      等价于 librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)，由缓存的STFT计算
+    get_rms(path, sr)       等价于 librosa.feature.rms(y=y, frame_length=2048, hop_length=512)
+    get_f0(path, sr)        各音高模块共用的F0轨迹，后端见 tool_f0（默认向量化YIN，可选pyin），返回格式与 librosa.pyin 相同
+    get_sound(path)         等价于 parselmouth.Sound(path)
+
+缓存按 (绝对路径, 文件大小, 修改时间) 区分，文件变化后自动失效。
+
+磁盘占用：每个文件缓存原始采样、两种采样率的单声道信号、两份完整的STFT幅度谱及MFCC/RMS/F0，
+一首4分钟48kHz立体声的歌约240MB。每个缓存目录里的 source.json 记录对应的源文件，
+prune() 删除源文件已不存在或已变化（改名、重新渲染）的目录，超过容量上限时再按最近使用时间淘汰；
+clear() 清空整个缓存。
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Callable, Optional
+import tool_f0
+
+cache_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.feature_cache')
+source_name = 'source.json'
+
+
+def get_cache_dir(wav_path: str) -> str:
+    """文件对应的缓存目录，文件名 + (路径, 大小, 修改时间)的hash"""
+    wav_path = os.path.abspath(wav_path)
+    stat = os.stat(wav_path)
+    key = f"{wav_path}:{stat.st_size}:{stat.st_mtime_ns}"
+    name = os.path.splitext(os.path.basename(wav_path))[0]
+    return os.path.join(cache_root, f"{name}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}")
+
+
+def _write_source(cache_dir: str, wav_path: str) -> None:
+    """记录缓存目录对应的源文件(路径, 大小, 修改时间)，供prune判断是否过期"""
+    source_path = os.path.join(cache_dir, source_name)
+    if os.path.exists(source_path):
+        return
+    stat = os.stat(wav_path)
+    source = {'path': os.path.abspath(wav_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    tmp_path = f"{source_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(source, file, ensure_ascii=False)
+    os.replace(tmp_path, source_path)
+
+
+def touch(wav_path: str) -> None:
+    """更新缓存目录的最近使用时间（source.json的修改时间），prune按它淘汰"""
+    source_path = os.path.join(get_cache_dir(wav_path), source_name)
+    if os.path.exists(source_path):
+        os.utime(source_path)
+
+
+def _load_or_compute(wav_path: str, name: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+    """
+    读取缓存的npy（内存映射，只读），不存在时计算并保存。
+    先写临时文件再改名，多个进程同时计算同一个特征时不会读到半个文件。
+    返回普通ndarray视图（底层仍是映射），放进结果里时与原来的类型一致。
+    """
+    npy_path = os.path.join(get_cache_dir(wav_path), f"{name}.npy")
+    if os.path.exists(npy_path):
+        return np.asarray(np.load(npy_path, mmap_mode='r'))
+    data = np.asarray(compute())
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+    _write_source(os.path.dirname(npy_path), wav_path)
+    tmp_path = f"{npy_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        np.save(file, data)
+    os.replace(tmp_path, npy_path)
+    return np.asarray(np.load(npy_path, mmap_mode='r'))
+
+
+def get_sample_rate(wav_path: str) -> int:
+    """只读文件头"""
+    import soundfile as sf
+    return sf.info(wav_path).samplerate
+
+
+def read_wav(wav_path: str) -> Tuple[int, np.ndarray]:
+    """
+    原始采样，唯一一次解码。
+
+    返回:
+        (sample_rate, data): 与 scipy.io.wavfile.read 相同的采样率和数据（原始dtype）
+    """
+
+    def compute():
+        from scipy.io import wavfile
+        _, data = wavfile.read(wav_path)
+        return data
+
+    data = _load_or_compute(wav_path, 'raw', compute)
+    return get_sample_rate(wav_path), data
+
+
+def _to_float(data: np.ndarray, dtype) -> np.ndarray:
+    """按位深换算到[-1, 1)，与soundfile读取时的换算一致（24bit在scipy里是左对齐的int32）"""
+    if data.dtype == np.uint8:
+        return (data.astype(dtype) - 128) / dtype(128)
+    if np.issubdtype(data.dtype, np.integer):
+        return data.astype(dtype) / dtype(-float(np.iinfo(data.dtype).min))
+    return data.astype(dtype)
+
+
+def read_float(wav_path: str) -> Tuple[np.ndarray, int]:
+    """
+    返回:
+        (data, sample_rate): 与 soundfile.read(path) 相同，float64，单声道为(n,)，多声道为(n, channels)
+    """
+    sample_rate, data = read_wav(wav_path)
+    return _to_float(data, np.float64), sample_rate
+
+
+def load(wav_path: str, sr: Optional[int] = 22050) -> Tuple[np.ndarray, int]:
+    """
+    参数:
+        sr: 目标采样率，None表示原始采样率
+
+    返回:
+        (y, sr): 与 librosa.load(path, sr=sr) 相同，float32单声道
+    """
+    sample_rate = get_sample_rate(wav_path)
+    target_sr = sample_rate if sr is None else sr
+
+    def compute():
+        _, data = read_wav(wav_path)
+        y = _to_float(data, np.float32)
+        if y.ndim > 1:
+            y = np.mean(y, axis=1)
+        if target_sr != sample_rate:
+            import librosa
+            y = librosa.resample(y, orig_sr=sample_rate, target_sr=target_sr, res_type='soxr_hq')
+        return y
+
+    return _load_or_compute(wav_path, f"y_{target_sr}", compute), target_sr
+
+
+def get_stft(wav_path: str, sr: Optional[int] = None, n_fft: int = 2048, hop_length: int = 512) -> np.ndarray:
+    """
+    返回:
+        STFT幅度谱，shape为(1 + n_fft // 2, frames)，与 np.abs(librosa.stft(y, n_fft, hop_length)) 相同
+    """
+    y, sr = load(wav_path, sr)
+
+    def compute():
+        import librosa
+        return np.abs(librosa.stft(np.asarray(y), n_fft=n_fft, hop_length=hop_length))
+
+    return _load_or_compute(wav_path, f"stft_{sr}_{n_fft}_{hop_length}", compute)
+
+
+def get_mfcc(wav_path: str, sr: Optional[int] = None, n_mfcc: int = 13) -> np.ndarray:
+    """
+    由缓存的STFT幅度谱计算，与 librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc) 相同
+    """
+    y, sr = load(wav_path, sr)
+
+    def compute():
+        import librosa
+        S = get_stft(wav_path, sr)
+        mel = librosa.feature.melspectrogram(S=np.asarray(S) ** 2, sr=sr)
+        return librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=n_mfcc)
+
+    return _load_or_compute(wav_path, f"mfcc_{sr}_{n_mfcc}", compute)
+
+
+def get_rms(wav_path: str, sr: Optional[int] = None, frame_length: int = 2048, hop_length: int = 512) -> np.ndarray:
+    """
+    与 librosa.feature.rms(y=y, frame_length, hop_length) 相同，shape为(1, frames)
+    """
+    y, sr = load(wav_path, sr)
+
+    def compute():
+        import librosa
+        return librosa.feature.rms(y=np.asarray(y), frame_length=frame_length, hop_length=hop_length)
+
+    return _load_or_compute(wav_path, f"rms_{sr}_{frame_length}_{hop_length}", compute)
+
+
+def get_f0(wav_path: str, sr: int = 22050, fmin: float = tool_f0.fmin_default, fmax: float = tool_f0.fmax_default,
+           frame_length: int = 2048, hop_length: int = 512,
+           backend: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    参数:
+        fmin/fmax: 默认为C2/C7
+        backend: F0后端，None为 tool_f0.default_backend
+
+    返回:
+        (f0, voiced_flag, voiced_probs): 与 librosa.pyin 的返回格式相同，无声帧f0为NaN
+    """
+    backend = backend or tool_f0.default_backend
+    y, sr = load(wav_path, sr)
+    name = f"f0_{backend}_{sr}_{fmin:.2f}_{fmax:.2f}_{frame_length}_{hop_length}"
+
+    def compute():
+        return np.stack(tool_f0.extract(np.asarray(y), sr, fmin=fmin, fmax=fmax,
+                                        frame_length=frame_length, hop_length=hop_length, backend=backend))
+
+    f0, voiced_flag, voiced_probs = _load_or_compute(wav_path, name, compute)
+    return f0, voiced_flag.astype(bool), voiced_probs
+
+
+def get_sound(wav_path: str):
+    """
+    由缓存的采样构建 parselmouth.Sound，与 parselmouth.Sound(path) 相同
+    """
+    import parselmouth
+    data, sample_rate = read_float(wav_path)
+    values = np.asarray(data, dtype=np.float64).reshape(len(data), -1).T
+    return parselmouth.Sound(values, sampling_frequency=sample_rate)
+
+
+def _is_stale(cache_dir: str) -> bool:
+    """源文件不存在或大小/修改时间变了（缓存已失效，不会再被读到），没有source.json的旧目录也算过期"""
+    try:
+        with open(os.path.join(cache_dir, source_name), 'r', encoding='utf-8') as file:
+            source = json.load(file)
+        stat = os.stat(source['path'])
+    except (OSError, ValueError, KeyError):
+        return True
+    return stat.st_size != source['size'] or stat.st_mtime_ns != source['mtime_ns']
+
+
+def _get_dir_size(cache_dir: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file())
+
+
+def prune(keep_paths: List[str] = (), max_bytes: Optional[int] = None) -> Tuple[int, int]:
+    """
+    清理特征缓存：先删除过期目录，总大小仍超过max_bytes时按最近使用时间从旧到新淘汰，keep_paths对应的目录不淘汰
+
+    参数:
+        keep_paths: 本次要用的WAV路径
+        max_bytes: 缓存容量上限，None为不限
+
+    返回:
+        (删除的目录数, 释放的字节数)
+    """
+    if not os.path.isdir(cache_root):
+        return 0, 0
+    deleted = 0
+    freed = 0
+    entries = []
+    for entry in os.scandir(cache_root):
+        if not entry.is_dir():
+            continue
+        size = _get_dir_size(entry.path)
+        if _is_stale(entry.path):
+            shutil.rmtree(entry.path, ignore_errors=True)
+            deleted += 1
+            freed += size
+            continue
+        entries.append((os.stat(os.path.join(entry.path, source_name)).st_mtime, entry.path, size))
+
+    total = sum(size for _, _, size in entries)
+    if max_bytes is not None and total > max_bytes:
+        keep_dirs = {os.path.normcase(get_cache_dir(path)) for path in keep_paths}
+        for _, cache_dir, size in sorted(entries):
+            if total <= max_bytes:
+                break
+            if os.path.normcase(cache_dir) in keep_dirs:
+                continue
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            deleted += 1
+            freed += size
+            total -= size
+    return deleted, freed
+
+
+def clear() -> None:
+    """删除整个特征缓存"""
+    shutil.rmtree(cache_root, ignore_errors=True)
+
+
+def _warm_single(wav_path: str) -> str:
+    """
+    各模块共用的特征，每个文件一次。
+    分块流式计算的指标（集成响度、削波检测、峰均比、动态范围）直接按块读原文件，不用这里的缓存，
+    原采样率的RMS只有动态范围用过，不再预先计算。
+    """
+    touch(wav_path)
+    for sr in (None, 22050):
+        get_stft(wav_path, sr)
+        get_mfcc(wav_path, sr)
+    get_f0(wav_path)
+    return wav_path
+
+
+def warm(wav_paths: List[str], max_workers: Optional[int] = None) -> None:
+    """
+    按文件并行预先计算共享特征，之后各分析模块只读缓存
+
+    参数:
+        wav_paths: WAV文件路径列表
+        max_workers: 进程数，默认为CPU核数
+    """
+    max_workers = max_workers or os.cpu_count() or 4
+    with ProcessPoolExecutor(max_workers=min(max_workers, max(len(wav_paths), 1))) as executor:
+        for wav_path in executor.map(_warm_single, wav_paths):
+            print(f"📦 特征缓存: {os.path.basename(wav_path)}")
@@ -0,0 +1,245 @@
+"""
+指标结果表
+
+各指标模块在 render=False 时返回"每个文件一个字典"的结果列表，这里把它们整理成一张 文件 × 指标 的宽表：
+- 标量字段写入 metrics.csv（装了 pandas + pyarrow 时同时写 metrics.parquet），列名为 "指标.字段"
+- 逐帧序列（ndarray / 数值列表）按指标写入 frames/<指标>.npz，键为 "文件名.字段"
+- 也可以直接由表里的标量画出每个指标随文件（模型轮数）变化的趋势图，不需要重新计算
+"""
+
+import csv
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 结果字典里用来识别文件的字段，按优先级排列
+name_keys = ('path', 'file_path', 'filename', 'file_name', 'name')
+# 不写入表格的字段（文件标识和模块内部的排序序号）
+skip_keys = name_keys + ('index',)
+
+
+def get_file_key(result: Dict[str, Any]) -> Optional[str]:
+    """
+    取结果字典对应的文件名（不含扩展名），各模块有的返回完整路径、有的返回文件名，统一成stem
+
+    参数:
+        result: 单个文件的结果字典
+
+    返回:
+        文件名stem，找不到时返回None
+    """
+    for key in name_keys:
+        value = result.get(key)
+        if isinstance(value, str) and value:
+            return Path(value).stem
+    return None
+
+
+def get_result_error(result: Dict[str, Any]) -> Optional[str]:
+    """
+    单个文件的结果是否失败，各模块的失败标记不同：带 error 信息、valid 为 False 或 success 为 False
+
+    参数:
+        result: 单个文件的结果字典
+
+    返回:
+        失败原因，成功时返回None
+    """
+    if result.get('error'):
+        return str(result['error'])
+    if result.get('valid', True) is False or result.get('success', True) is False:
+        return "结果无效"
+    return None
+
+
+def split_fields(result: Dict[str, Any], prefix: str = '') -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    把结果字典拆成标量和逐帧序列两部分，嵌套字典展开为 "父.子" 的字段名
+
+    参数:
+        result: 单个文件的结果字典
+        prefix: 嵌套展开时的字段名前缀
+
+    返回:
+        (标量字典, 序列字典)
+    """
+    scalars = {}
+    arrays = {}
+    for key, value in result.items():
+        if key in skip_keys:
+            continue
+        field = f"{prefix}{key}"
+        if isinstance(value, dict):
+            sub_scalars, sub_arrays = split_fields(value, prefix=f"{field}.")
+            scalars.update(sub_scalars)
+            arrays.update(sub_arrays)
+        elif isinstance(value, (np.ndarray, list, tuple)):
+            array = np.asarray(value)
+            if array.ndim == 0:
+                scalars[field] = array.item()
+            elif array.dtype.kind in 'biuf':
+                arrays[field] = array
+        elif value is None or isinstance(value, (bool, int, float, str, np.generic)):
+            scalars[field] = value.item() if isinstance(value, np.generic) else value
+    return scalars, arrays
+
+
+def build_table(metric_results: Dict[str, List[Dict[str, Any]]],
+                wav_paths: List[str]) -> Tuple[List[str], List[str], Dict[str, Dict[str, Any]], Dict[str, Dict[str, np.ndarray]]]:
+    """
+    把各指标的结果合并成 文件 × 指标 的宽表
+
+    参数:
+        metric_results: {指标名: 每个文件的结果字典列表}
+        wav_paths: WAV文件路径列表，决定行的顺序
+
+    返回:
+        (行名列表, 列名列表, {行名: {列名: 值}}, {指标名: {"文件名.字段": 序列}})
+    """
+    file_keys = [Path(path).stem for path in wav_paths]
+    rows = {key: {} for key in file_keys}
+    columns = {}  # 按出现顺序去重的列名
+    frames = {}
+
+    for metric, results in metric_results.items():
+        if not isinstance(results, list):
+            continue
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            file_key = get_file_key(result)
+            if file_key is None:
+                continue
+            if file_key not in rows:
+                rows[file_key] = {}
+                file_keys.append(file_key)
+
+            scalars, arrays = split_fields(result)
+            for field, value in scalars.items():
+                column = f"{metric}.{field}"
+                columns.setdefault(column, None)
+                rows[file_key][column] = value
+            for field, array in arrays.items():
+                frames.setdefault(metric, {})[f"{file_key}.{field}"] = array
+
+    return file_keys, list(columns), rows, frames
+
+
+def save_table(metric_results: Dict[str, List[Dict[str, Any]]], wav_paths: List[str], output_dir: str) -> str:
+    """
+    写出指标宽表和逐帧序列
+
+    参数:
+        metric_results: {指标名: 每个文件的结果字典列表}
+        wav_paths: WAV文件路径列表
+        output_dir: 输出目录
+
+    返回:
+        metrics.csv 的路径
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    file_keys, columns, rows, frames = build_table(metric_results, wav_paths)
+
+    csv_path = os.path.join(output_dir, 'metrics.csv')
+    with open(csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['file'] + columns)
+        for file_key in file_keys:
+            writer.writerow([file_key] + [rows[file_key].get(column, '') for column in columns])
+
+    # Parquet 是可选的，缺少 pandas / pyarrow 时只写CSV
+    try:
+        import pandas as pd
+        df = pd.DataFrame([rows[key] for key in file_keys], index=pd.Index(file_keys, name='file'), columns=columns)
+        df.to_parquet(os.path.join(output_dir, 'metrics.parquet'))
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"⚠️ 写入Parquet失败，仅保留CSV: {e}")
+
+    if frames:
+        frame_dir = os.path.join(output_dir, 'frames')
+        os.makedirs(frame_dir, exist_ok=True)
+        for metric, arrays in frames.items():
+            np.savez_compressed(os.path.join(frame_dir, f"{metric}.npz"), **arrays)
+
+    print(f"📄 指标表已保存: {csv_path} ({len(file_keys)} 个文件 × {len(columns)} 列)")
+    return csv_path
+
+
+def save_timings(timings: List[Tuple[str, str, float]], output_dir: str) -> str:
+    """
+    写出每个任务的耗时
+
+    参数:
+        timings: [(指标, 文件名, 耗时秒)]，按指标执行的任务文件名为空
+        output_dir: 输出目录
+
+    返回:
+        timings.csv 的路径
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    csv_path = os.path.join(output_dir, 'timings.csv')
+    with open(csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['metric', 'file', 'seconds'])
+        for name, file_name, seconds in timings:
+            writer.writerow([name, file_name, f"{seconds:.4f}"])
+    return csv_path
+
+
+def save_trend_charts(metric_results: Dict[str, List[Dict[str, Any]]], wav_paths: List[str], png_dir: str) -> List[str]:
+    """
+    由已有结果画出每个指标的数值字段随文件（模型轮数）变化的折线图，每个指标一张PNG
+
+    参数:
+        metric_results: {指标名: 每个文件的结果字典列表}
+        wav_paths: WAV文件路径列表，决定横轴顺序
+        png_dir: PNG输出目录
+
+    返回:
+        保存的PNG路径列表
+    """
+    import matplotlib.pyplot as plt
+
+    os.makedirs(png_dir, exist_ok=True)
+    file_keys, columns, rows, _ = build_table(metric_results, wav_paths)
+    x = np.arange(len(file_keys))
+    tick_step = max(1, len(file_keys) // 25)
+
+    png_paths = []
+    for metric in metric_results:
+        fields = []
+        for column in columns:
+            if not column.startswith(f"{metric}."):
+                continue
+            values = [rows[key].get(column) for key in file_keys]
+            if any(isinstance(v, (bool, str)) for v in values):
+                continue
+            fields.append((column[len(metric) + 1:], np.array([np.nan if v is None else v for v in values], dtype=float)))
+        if not fields:
+            continue
+
+        n_cols = min(3, len(fields))
+        n_rows = (len(fields) + n_cols - 1) // n_cols
+        fig, axes = plt.subplots(n_rows, n_cols, figsize=(6 * n_cols, 3.2 * n_rows), squeeze=False)
+        for ax, (field, values) in zip(axes.flat, fields):
+            ax.plot(x, values, marker='o', markersize=3, linewidth=1.2, color='#3498db')
+            ax.set_title(field, fontsize=10)
+            ax.set_xticks(x[::tick_step])
+            ax.set_xticklabels(file_keys[::tick_step], rotation=45, ha='right', fontsize=7)
+            ax.grid(alpha=0.3)
+        for ax in list(axes.flat)[len(fields):]:
+            ax.axis('off')
+
+        fig.suptitle(f"{metric} - 随模型轮数的变化", fontsize=14, fontweight='bold')
+        fig.tight_layout()
+        png_path = os.path.join(png_dir, f"{metric}_趋势.png")
+        fig.savefig(png_path, dpi=120, bbox_inches='tight')
+        plt.close(fig)
+        png_paths.append(png_path)
+
+    print(f"🎨 趋势图已保存: {png_dir} ({len(png_paths)} 张)")
+    return png_paths
@@ -0,0 +1,87 @@
+"""
+并行度控制：评估时由 evaluation.py 的进程池统一调度，池里的每个进程只用1个线程干活。
+
+- limit_blas_threads()  在导入numpy之前调用，BLAS/OpenMP每个进程只开1个线程（子进程继承环境变量）
+- init_worker()         进程池的initializer，标记当前进程为调度器的工作进程，并记下进程内还能用的并发数
+- thread_pool() / process_pool()
+                        指标模块内部按文件并发时使用：单独调用模块时等同于 ThreadPoolExecutor / ProcessPoolExecutor；
+                        在调度器的工作进程里，并发数为1（按 (文件, 指标) 调度，进程池已占满CPU）时是当场串行执行的执行器，
+                        大于1（按指标调度，指标数少于CPU核数）时用不超过该并发数的线程池/进程池把空闲的核用上
+"""
+
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+# 调度器工作进程的标记
+worker_env = 'EVALUATION_WORKER'
+# 工作进程内部按文件并发时可用的并发数
+inner_workers_env = 'EVALUATION_INNER_WORKERS'
+
+blas_env_vars = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                 'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+
+
+def limit_blas_threads() -> None:
+    """BLAS/OpenMP每个进程1个线程，需在导入numpy之前调用，已经设置过的环境变量不覆盖"""
+    for name in blas_env_vars:
+        os.environ.setdefault(name, '1')
+
+
+def init_worker(inner_workers: int = 1) -> None:
+    """
+    进程池initializer：标记为工作进程；如果numpy已在父进程里加载（fork），用threadpoolctl再限制一次
+
+    参数:
+        inner_workers: 该进程内部 thread_pool() / process_pool() 可用的并发数，1为串行
+    """
+    os.environ[worker_env] = '1'
+    os.environ[inner_workers_env] = str(max(int(inner_workers), 1))
+    limit_blas_threads()
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+
+def in_worker() -> bool:
+    return os.environ.get(worker_env) == '1'
+
+
+def get_inner_workers(max_workers=None) -> int:
+    """工作进程内部可用的并发数，不超过模块自己的 max_workers"""
+    inner_workers = int(os.environ.get(inner_workers_env, '1'))
+    return min(max_workers, inner_workers) if max_workers else inner_workers
+
+
+class SerialExecutor(Executor):
+    """submit时当场执行，返回已完成的Future，可配合 as_completed / map 使用"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def thread_pool(max_workers=None) -> Executor:
+    """模块内部按文件并发的线程池，工作进程里按 init_worker 给的并发数，为1时串行执行"""
+    if in_worker():
+        max_workers = get_inner_workers(max_workers)
+        if max_workers <= 1:
+            return SerialExecutor()
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def process_pool(max_workers=None) -> Executor:
+    """
+    模块内部按文件并发的进程池，工作进程里按 init_worker 给的并发数，为1时串行执行
+    （调度器用 ProcessPoolExecutor，工作进程不是daemon进程，可以再开子进程）
+    """
+    if in_worker():
+        max_workers = get_inner_workers(max_workers)
+        if max_workers <= 1:
+            return SerialExecutor()
+    return ProcessPoolExecutor(max_workers=max_workers)
@@ -0,0 +1,154 @@
+"""
+评估结果库：按 (文件内容hash, 指标, 指标版本) 保存每个文件的指标结果，增量评估时只计算新增或变化的文件。
+
+- 文件hash是内容的sha1，文件改名/移动不影响；同时按 (路径, 大小, 修改时间) 记住hash，未变化的文件不重复读取
+- 指标版本是指标模块及共用特征模块源码的hash，代码改动后旧结果自动失效
+- 结果是 render=False 时模块返回的单个文件的字典，pickle后存入sqlite
+"""
+
+import hashlib
+import importlib.util
+import os
+import pickle
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+db_path_default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.result_db.sqlite')
+
+# 所有指标都依赖的模块，改动后全部指标的结果都失效
+shared_modules = ('tool_feature_store', 'tool_f0', 'tool_stream', 'tool_parallel')
+
+
+def get_metric_version(module_name: str) -> str:
+    """
+    指标模块和共用特征模块源码的hash，作为结果的版本号
+
+    参数:
+        module_name: 指标模块名，如 "集成响度"
+
+    返回:
+        16位十六进制字符串
+    """
+    sha1 = hashlib.sha1()
+    for name in (module_name,) + shared_modules:
+        spec = importlib.util.find_spec(name)
+        if spec is None or spec.origin is None:
+            raise ValueError(f"找不到模块: {name}")
+        with open(spec.origin, 'rb') as f:
+            sha1.update(f.read())
+    return sha1.hexdigest()[:16]
+
+
+class ResultDB:
+    """
+    sqlite结果库，只在主进程里读写
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or db_path_default
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS file_hash (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS result (
+                hash TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                version TEXT NOT NULL,
+                result BLOB NOT NULL,
+                PRIMARY KEY (hash, metric, version)
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_file_hash(self, wav_path: str) -> str:
+        """
+        文件内容的sha1，(路径, 大小, 修改时间) 未变时直接用记住的值
+        """
+        wav_path = os.path.abspath(wav_path)
+        stat = os.stat(wav_path)
+        row = self.conn.execute("SELECT size, mtime_ns, hash FROM file_hash WHERE path = ?", (wav_path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        sha1 = hashlib.sha1()
+        with open(wav_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha1.update(chunk)
+        file_hash = sha1.hexdigest()
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO file_hash (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                              (wav_path, stat.st_size, stat.st_mtime_ns, file_hash))
+        return file_hash
+
+    def get_stored_hashes(self, metric: str, version: str) -> set:
+        """
+        返回:
+            库里已有该指标当前版本结果的文件hash集合
+        """
+        rows = self.conn.execute("SELECT hash FROM result WHERE metric = ? AND version = ?", (metric, version))
+        return {row[0] for row in rows}
+
+    def get_results(self, metric: str, version: str, file_hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        返回:
+            {文件hash: 结果字典}，只包含库里已有的
+        """
+        results = {}
+        for file_hash in set(file_hashes):
+            row = self.conn.execute("SELECT result FROM result WHERE hash = ? AND metric = ? AND version = ?",
+                                    (file_hash, metric, version)).fetchone()
+            if row:
+                results[file_hash] = pickle.loads(row[0])
+        return results
+
+    def put_results(self, metric: str, version: str, results: Dict[str, Dict[str, Any]]) -> None:
+        """
+        参数:
+            results: {文件hash: 结果字典}
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO result (hash, metric, version, result) VALUES (?, ?, ?, ?)",
+                [(file_hash, metric, version, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+                 for file_hash, result in results.items()])
+
+    def prune(self, keep_versions: Dict[str, str]) -> int:
+        """
+        删除旧版本指标的结果
+
+        参数:
+            keep_versions: {指标: 当前版本}
+
+        返回:
+            删除的条数
+        """
+        deleted = 0
+        with self.conn:
+            for metric, version in keep_versions.items():
+                deleted += self.conn.execute("DELETE FROM result WHERE metric = ? AND version != ?",
+                                             (metric, version)).rowcount
+        return deleted
+
+
+def missing_paths(db: ResultDB, metric: str, version: str, path_hashes: Dict[str, str]) -> List[str]:
+    """
+    参数:
+        path_hashes: {WAV路径: 文件hash}
+
+    返回:
+        库里还没有该指标当前版本结果的WAV路径，保持原顺序
+    """
+    stored = db.get_stored_hashes(metric, version)
+    return [path for path, file_hash in path_hashes.items() if file_hash not in stored]
@@ -0,0 +1,332 @@
+"""
+分块流式统计：按块读取文件（soundfile.blocks），边读边累积统计量，不把整个文件读进内存，
+每个工作进程的内存占用与文件长度无关。
+
+    blocks(path)            等价于 soundfile.blocks(path, always_2d=True)，每块为(n, channels)
+    feed(block_iter, *acc)  读一遍块迭代器，每块依次交给各个累积器，一次解码可以同时算多个指标
+
+累积器都有 update(block) / result() 两个方法，block为(n, channels)：
+    PeakRms            峰值、RMS（先混为单声道，与原来整段读入时的算法相同）
+    ClippingCounter    削波采样数、削波段数、最长削波段（跨块的削波段会接起来）
+    LoudnessMeter      ITU-R BS.1770 集成响度：K加权滤波的状态跨块保留，400ms门限块/75%重叠，
+                       门限块的响度落入0.01 LU的直方图（每格记块数和能量和），最后做绝对/相对门限
+    FrameRmsRange      分帧RMS（与 librosa.feature.rms 的center=True分帧相同）的最大值，
+                       以及按dB分格的直方图（每格记帧数和最小值），用来找超过最大值1%的最小帧RMS
+"""
+
+from typing import Dict, Iterable, Iterator, Tuple
+import numpy as np
+
+# 每块的采样数，约1.5秒（44.1kHz），float64双声道约1MB
+block_size = 65536
+
+
+def info(wav_path: str):
+    """只读文件头，返回 soundfile.info"""
+    import soundfile as sf
+    return sf.info(wav_path)
+
+
+def blocks(wav_path: str, blocksize: int = block_size, dtype: str = 'float64') -> Iterator[np.ndarray]:
+    """按块读取，每块为(n, channels)，float按位深换算到[-1, 1)，与 soundfile.read 一致"""
+    import soundfile as sf
+    return sf.blocks(wav_path, blocksize=blocksize, dtype=dtype, always_2d=True)
+
+
+def native_scale(subtype: str) -> Tuple[str, float]:
+    """
+    按原始位深读取时使用的dtype和满幅值，与 scipy.io.wavfile.read 的原始数据一致
+    （24bit在scipy里是左对齐的int32，这里也按int32读）
+    """
+    if subtype == 'PCM_16':
+        return 'int16', 32767.0
+    if subtype in ('PCM_24', 'PCM_32'):
+        return 'int32', 2147483647.0
+    return 'float64', 1.0
+
+
+def feed(block_iter: Iterable[np.ndarray], *accumulators) -> None:
+    """读一遍块迭代器，每块依次交给各个累积器"""
+    for block in block_iter:
+        for accumulator in accumulators:
+            accumulator.update(block)
+
+
+def _to_mono(block: np.ndarray) -> np.ndarray:
+    """(n, channels) 取声道平均，与原来的 np.mean(data, axis=1) 相同"""
+    if block.ndim > 1:
+        if block.shape[1] == 1:
+            return block[:, 0].astype(np.float64)
+        return np.mean(block, axis=1)
+    return block.astype(np.float64)
+
+
+class PeakRms:
+    """单声道混合后的峰值和RMS"""
+
+    def __init__(self):
+        self.peak = 0.0
+        self.sum_squares = 0.0
+        self.samples = 0
+
+    def update(self, block: np.ndarray) -> None:
+        x = _to_mono(block)
+        if len(x) == 0:
+            return
+        self.peak = max(self.peak, float(np.max(np.abs(x))))
+        self.sum_squares += float(np.dot(x, x))
+        self.samples += len(x)
+
+    def result(self) -> Dict[str, float]:
+        rms = np.sqrt(self.sum_squares / self.samples) if self.samples else 0.0
+        return {'peak': self.peak, 'rms': float(rms), 'samples': self.samples}
+
+
+class ClippingCounter:
+    """
+    |样本值| / 满幅值 >= threshold 视为削波，先混为单声道。
+    跨块的削波段按一段计，记录当前段的长度接到下一块。
+    """
+
+    def __init__(self, max_val: float, threshold: float = 0.99):
+        self.max_val = max_val
+        self.threshold = threshold
+        self.clipping_samples = 0
+        self.total_samples = 0
+        self.runs = 0
+        self.longest_run = 0
+        self.current_run = 0
+
+    def update(self, block: np.ndarray) -> None:
+        x = _to_mono(block)
+        if len(x) == 0:
+            return
+        self.total_samples += len(x)
+        mask = np.abs(x / self.max_val) >= self.threshold
+        count = int(np.count_nonzero(mask))
+        if count == 0:
+            self.current_run = 0
+            return
+        self.clipping_samples += count
+
+        # 削波段的起止位置，前后补0保证每段都有起点和终点
+        edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+        lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        runs = len(lengths)
+        if self.current_run and mask[0]:
+            # 上一块末尾的削波段延续到这一块
+            lengths[0] += self.current_run
+            runs -= 1
+        self.runs += runs
+        self.longest_run = max(self.longest_run, int(lengths.max()))
+        self.current_run = int(lengths[-1]) if mask[-1] else 0
+
+    def result(self) -> Dict[str, float]:
+        return {
+            'clipping_samples': self.clipping_samples,
+            'total_samples': self.total_samples,
+            'clipping_runs': self.runs,
+            'longest_clipping_run': self.longest_run,
+        }
+
+
+class LoudnessMeter:
+    """
+    ITU-R BS.1770-4 集成响度，滤波系数和声道增益与 pyloudnorm.Meter 相同。
+    每100ms一个子块记各声道能量，连续4个子块为一个400ms门限块（75%重叠），
+    门限块的响度在[-70, +10) LUFS之间按0.01 LU分格，每格累积块数和加权能量和，内存与文件长度无关。
+    """
+
+    channel_gains = (1.0, 1.0, 1.0, 1.41, 1.41)
+    absolute_gate = -70.0
+    relative_gate = -10.0
+    bin_width = 0.01
+    max_loudness = 10.0
+
+    def __init__(self, sample_rate: int):
+        import pyloudnorm as pyln
+        self.sample_rate = sample_rate
+        self.filters = list(pyln.Meter(sample_rate)._filters.values())
+        self.step = int(round(0.1 * sample_rate))
+        self.bins = int(round((self.max_loudness - self.absolute_gate) / self.bin_width))
+        self.bin_counts = np.zeros(self.bins, dtype=np.int64)
+        self.bin_energy = np.zeros(self.bins, dtype=np.float64)
+        self.filter_states = None
+        self.partial = None
+        self.partial_fill = 0
+        self.history = None
+        self.samples = 0
+        self.blocks = 0
+
+    def _init_channels(self, channels: int) -> None:
+        # 滤波器初始状态为0，与整段调用 lfilter 相同
+        self.filter_states = [np.zeros((channels, max(len(f.a), len(f.b)) - 1)) for f in self.filters]
+        self.partial = np.zeros(channels)
+        self.history = np.zeros((0, channels))
+        self.gains = np.array([self.channel_gains[i] if i < len(self.channel_gains) else 1.0
+                               for i in range(channels)])
+
+    def update(self, block: np.ndarray) -> None:
+        from scipy.signal import lfilter
+        if block.ndim == 1:
+            block = block[:, np.newaxis]
+        if len(block) == 0:
+            return
+        if self.filter_states is None:
+            self._init_channels(block.shape[1])
+        self.samples += len(block)
+
+        # K加权：两级滤波，状态跨块保留
+        x = block.T.astype(np.float64)
+        for i, f in enumerate(self.filters):
+            x, self.filter_states[i] = lfilter(f.b, f.a, x, axis=1, zi=self.filter_states[i])
+            x = f.passband_gain * x
+        squares = np.square(x.T)
+
+        # 先补满上一块留下的子块，再按100ms整块切分，剩余部分留到下一块
+        energies = []
+        head = min(self.step - self.partial_fill, len(squares))
+        self.partial += squares[:head].sum(axis=0)
+        self.partial_fill += head
+        if self.partial_fill == self.step:
+            energies.append(self.partial[np.newaxis, :])
+            self.partial = np.zeros_like(self.partial)
+            self.partial_fill = 0
+        rest = squares[head:]
+        full = len(rest) // self.step
+        if full:
+            energies.append(rest[:full * self.step].reshape(full, self.step, -1).sum(axis=1))
+        tail = rest[full * self.step:]
+        if len(tail):
+            self.partial += tail.sum(axis=0)
+            self.partial_fill += len(tail)
+        if not energies:
+            return
+
+        # 连续4个子块组成门限块，保留最后3个子块给下一块
+        sub_blocks = np.vstack([self.history] + energies)
+        self.history = sub_blocks[-3:]
+        if len(sub_blocks) < 4:
+            return
+        gated = sub_blocks[:-3] + sub_blocks[1:-2] + sub_blocks[2:-1] + sub_blocks[3:]
+        self._add_blocks(gated @ self.gains / (4 * self.step), self.bin_counts, self.bin_energy)
+        self.blocks += len(gated)
+
+    def _add_blocks(self, z: np.ndarray, bin_counts: np.ndarray, bin_energy: np.ndarray) -> None:
+        """门限块的加权能量按响度落格，低于绝对门限的丢弃"""
+        with np.errstate(divide='ignore'):
+            loudness = -0.691 + 10.0 * np.log10(z)
+        keep = loudness >= self.absolute_gate
+        if not np.any(keep):
+            return
+        index = np.minimum(((loudness[keep] - self.absolute_gate) / self.bin_width).astype(np.int64), self.bins - 1)
+        np.add.at(bin_counts, index, 1)
+        np.add.at(bin_energy, index, z[keep])
+
+    def result(self) -> float:
+        """集成响度(LUFS)，没有超过绝对门限的块时为-inf"""
+        if self.samples < 4 * self.step:
+            raise ValueError("音频长度小于一个400ms门限块")
+        bin_counts = self.bin_counts.copy()
+        bin_energy = self.bin_energy.copy()
+
+        # pyloudnorm按四舍五入计块数，末尾不满400ms的块（最后3个子块加剩余采样）也算一块，能量仍除以400ms
+        total_blocks = int(np.round((self.samples / self.sample_rate - 0.4) / 0.1)) + 1
+        if total_blocks > self.blocks:
+            z = (self.history.sum(axis=0) + self.partial) @ self.gains / (4 * self.step)
+            self._add_blocks(np.array([z]), bin_counts, bin_energy)
+
+        count = bin_counts.sum()
+        if count == 0:
+            return float('-inf')
+        relative = -0.691 + 10.0 * np.log10(bin_energy.sum() / count) + self.relative_gate
+
+        # 跨过相对门限的那一格按该格的平均响度判断
+        filled = bin_counts > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bin_loudness = -0.691 + 10.0 * np.log10(bin_energy / np.maximum(bin_counts, 1))
+        selected = filled & (bin_loudness > relative)
+        count = bin_counts[selected].sum()
+        if count == 0:
+            return float('-inf')
+        return float(-0.691 + 10.0 * np.log10(bin_energy[selected].sum() / count))
+
+
+class FrameRmsRange:
+    """
+    分帧RMS，与 librosa.feature.rms(y, frame_length, hop_length) 相同（center=True，两端补0，float32单声道）。
+    记录最大帧RMS，并把RMS > 1e-10 的帧按0.01 dB分格，每格记帧数和最小值，
+    最后按最大值的比例找门限以上的最小帧RMS，误差不超过一格。
+    """
+
+    floor_db = -200.0
+    ceil_db = 20.0
+    bin_width = 0.01
+
+    def __init__(self, frame_length: int = 2048, hop_length: int = 512):
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.buffer = np.zeros(frame_length // 2, dtype=np.float32)
+        self.bins = int(round((self.ceil_db - self.floor_db) / self.bin_width))
+        self.bin_counts = np.zeros(self.bins, dtype=np.int64)
+        self.bin_min = np.full(self.bins, np.inf, dtype=np.float32)
+        self.rms_max = 0.0
+        self.frames = 0
+        self.samples = 0
+        self.finished = False
+
+    def _frames(self, y: np.ndarray) -> None:
+        """把已经够长的帧算掉，剩余采样留在buffer里"""
+        y = np.concatenate((self.buffer, y))
+        n = 0 if len(y) < self.frame_length else 1 + (len(y) - self.frame_length) // self.hop_length
+        if n == 0:
+            self.buffer = y
+            return
+        frames = np.lib.stride_tricks.sliding_window_view(y, self.frame_length)[::self.hop_length][:n]
+        rms = np.sqrt(np.mean(np.square(frames), axis=-1))
+        self.buffer = y[n * self.hop_length:]
+        self.frames += n
+        self.rms_max = max(self.rms_max, float(rms.max()))
+
+        rms = rms[rms > 1e-10]
+        if len(rms) == 0:
+            return
+        index = ((20.0 * np.log10(rms) - self.floor_db) / self.bin_width).astype(np.int64)
+        index = np.clip(index, 0, self.bins - 1)
+        np.add.at(self.bin_counts, index, 1)
+        np.minimum.at(self.bin_min, index, rms)
+
+    def update(self, block: np.ndarray) -> None:
+        y = block.astype(np.float32)
+        if y.ndim > 1:
+            y = np.mean(y, axis=1) if y.shape[1] > 1 else y[:, 0]
+        self.samples += len(y)
+        self._frames(y)
+
+    def finish(self) -> None:
+        """末尾补0，算完最后几帧"""
+        if not self.finished:
+            self._frames(np.zeros(self.frame_length // 2, dtype=np.float32))
+            self.finished = True
+
+    def min_above(self, threshold: float) -> Tuple[float, int]:
+        """
+        RMS > threshold 的帧里的最小RMS和帧数（门限所在那一格只在该格最小值超过门限时计入）。
+        没有符合的帧时返回 (0.0, 0)。
+        """
+        self.finish()
+        if threshold <= 1e-10:
+            start = 0
+        else:
+            start = int(np.clip((20.0 * np.log10(threshold) - self.floor_db) / self.bin_width, 0, self.bins - 1))
+            if not self.bin_min[start] > threshold:
+                start += 1
+        counts = self.bin_counts[start:]
+        filled = np.flatnonzero(counts)
+        if len(filled) == 0:
+            return 0.0, 0
+        return float(self.bin_min[start + filled[0]]), int(counts.sum())
+
+    def result(self) -> Dict[str, float]:
+        self.finish()
+        return {'rms_max': self.rms_max, 'frames': self.frames, 'samples': self.samples}
@@ -31,27 +31,29 @@ AI翻唱音频质量评估 - 信噪比(SNR)分析工具
 import os
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.io import wavfile
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional, Tuple
+import tool_feature_store
+import tool_parallel
+from concurrent.futures import as_completed
+from typing import List, Dict, Optional, Tuple, Union
 
 
-def analyze_audio_snr(wav_paths: List[str]) -> Dict[str, Optional[float]]:
+def analyze_audio_snr(wav_paths: List[str], render: bool = True) -> Union[List[Dict], Dict[str, Optional[float]]]:
     """
     分析多个WAV文件的信噪比(SNR)并可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组（按模型轮数递增排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        dict: {文件名: SNR值} 的字典
+        dict: {文件名: SNR值} 的字典；render为False时为每个文件的结果字典列表
     """
 
     # ==================== 内部函数定义 ====================
 
     def _read_wav_as_float(wav_path: str) -> Tuple[int, np.ndarray]:
         """读取WAV文件并转换为归一化浮点数组"""
-        sample_rate, audio = wavfile.read(wav_path)
+        sample_rate, audio = tool_feature_store.read_wav(wav_path)
 
         # 根据数据类型归一化
         if audio.dtype == np.int16:
@@ -353,7 +355,7 @@ def analyze_audio_snr(wav_paths: List[str]) -> Dict[str, Optional[float]]:
     results = [None] * len(wav_paths)
     max_workers = min(os.cpu_count() or 4, 8, len(wav_paths))
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=max_workers) as executor:
         future_to_idx = {executor.submit(_calculate_snr_single, path): idx
                          for idx, path in enumerate(wav_paths)}
 
@@ -390,6 +392,9 @@ def analyze_audio_snr(wav_paths: List[str]) -> Dict[str, Optional[float]]:
     print(f"  SNR范围: {min(snr_values):.1f} ~ {max(snr_values):.1f} dB")
     print(f"  平均SNR: {np.mean(snr_values):.1f} dB")
 
+    if not render:
+        return [d[1] for d in valid_data]
+
     # 可视化
     _create_visualization(snr_values, filenames, indices, len(wav_paths))
 
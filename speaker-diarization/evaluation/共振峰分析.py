@@ -37,10 +37,12 @@
 import os
 import numpy as np
 import matplotlib.pyplot as plt
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
+import tool_feature_store
+import tool_parallel
 
 
-def analyze_formant_quality(wav_paths):
+def analyze_formant_quality(wav_paths, render=True):
     """
     分析多个WAV文件的共振峰质量并可视化对比
 
@@ -56,6 +58,7 @@ def analyze_formant_quality(wav_paths):
 
     参数:
         wav_paths (list): wav文件路径的字符串数组（应按模型轮数排序）
+        render (bool): 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
         list: 包含各文件共振峰指标的字典列表
@@ -96,7 +99,7 @@ def analyze_formant_quality(wav_paths):
         from parselmouth.praat import call as pc
 
         try:
-            sound = parselmouth.Sound(wav_path)
+            sound = tool_feature_store.get_sound(wav_path)
             # Burg方法: 时间步长自动, 最大5个共振峰, 最大频率5500Hz, 窗口25ms, 预加重50Hz
             formant = pc(sound, "To Formant (burg)", 0.0, 5, 5500, 0.025, 50)
 
@@ -404,7 +407,7 @@ def analyze_formant_quality(wav_paths):
     formant_data = {}
     max_workers = min(os.cpu_count() or 4, 8)
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=max_workers) as executor:
         futures = {executor.submit(extract_formants_single, p): p for p in wav_paths}
         completed = 0
         for future in as_completed(futures):
@@ -439,6 +442,9 @@ def analyze_formant_quality(wav_paths):
     print("-" * 60)
     print("正在生成可视化图表...")
 
+    if not render:
+        return results
+
     # 可视化
     create_visualization(results)
 
@@ -37,20 +37,22 @@ pip install numpy scipy matplotlib
 import os
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.io import wavfile
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Tuple
+import tool_stream
+import tool_parallel
+from concurrent.futures import as_completed
+from typing import List, Dict, Any, Tuple, Union
 
 
-def analyze_clipping_detection(wav_paths: List[str]) -> Dict[str, Any]:
+def analyze_clipping_detection(wav_paths: List[str], render: bool = True) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """
     分析多个WAV文件的削波检测指标并可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组（按模型轮数递增排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        包含分析结果的字典
+        包含分析结果的字典；render为False时为每个文件的结果字典列表
     """
 
     # ================== 内部函数定义 ==================
@@ -59,32 +61,16 @@ def analyze_clipping_detection(wav_paths: List[str]) -> Dict[str, Any]:
         """计算单个文件的削波率"""
         index, wav_path = args
         try:
-            sample_rate, data = wavfile.read(wav_path)
-
-            # 立体声转单声道
-            if len(data.shape) > 1:
-                data = np.mean(data, axis=1)
-
-            # 根据数据类型确定理论最大值
-            dtype = data.dtype
-            if dtype == np.int16:
-                max_val = 32767.0
-            elif dtype == np.int32:
-                max_val = 2147483647.0
-            elif dtype in [np.float32, np.float64]:
-                max_val = 1.0
-            elif np.issubdtype(dtype, np.integer):
-                max_val = float(np.iinfo(dtype).max)
-            else:
-                max_val = float(np.max(np.abs(data))) if np.max(np.abs(data)) > 0 else 1.0
-
-            # 归一化到 [-1, 1]
-            data_normalized = data.astype(np.float64) / max_val
-
-            # 计算削波（|样本值| >= 0.99 视为削波）
-            clipping_threshold = 0.99
-            clipping_samples = int(np.sum(np.abs(data_normalized) >= clipping_threshold))
-            total_samples = len(data_normalized)
+            # 按块读取，按原始位深确定理论最大值（|样本值| >= 0.99 视为削波），内存与文件长度无关
+            info = tool_stream.info(wav_path)
+            dtype, max_val = tool_stream.native_scale(info.subtype)
+            counter = tool_stream.ClippingCounter(max_val, threshold=0.99)
+            tool_stream.feed(tool_stream.blocks(wav_path, dtype=dtype), counter)
+            stats = counter.result()
+
+            sample_rate = info.samplerate
+            clipping_samples = stats['clipping_samples']
+            total_samples = stats['total_samples']
             clipping_rate = (clipping_samples / total_samples) * 100.0
 
             return {
@@ -94,6 +80,8 @@ def analyze_clipping_detection(wav_paths: List[str]) -> Dict[str, Any]:
                 'clipping_rate': clipping_rate,
                 'clipping_samples': clipping_samples,
                 'total_samples': total_samples,
+                'clipping_runs': stats['clipping_runs'],
+                'longest_clipping_run': stats['longest_clipping_run'],
                 'sample_rate': sample_rate,
                 'duration': total_samples / sample_rate,
                 'error': None
@@ -142,7 +130,7 @@ def analyze_clipping_detection(wav_paths: List[str]) -> Dict[str, Any]:
     max_workers = min(n_total, (os.cpu_count() or 4) * 2, 16)
     results = []
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=max_workers) as executor:
         future_to_args = {
             executor.submit(calculate_clipping_rate, (i, path)): i
             for i, path in enumerate(wav_paths)
@@ -181,6 +169,9 @@ def analyze_clipping_detection(wav_paths: List[str]) -> Dict[str, Any]:
 
     n_valid = len(valid_results)
 
+    if not render:
+        return valid_results
+
     # ================== 可视化 ==================
 
     # 设置字体
@@ -22,13 +22,13 @@
     + 流行唱法：12-18 dB；艺术歌曲：>20 dB。
 """
 
-# pip install numpy librosa matplotlib
+# pip install numpy soundfile matplotlib
 
 """
 AI翻唱WAV文件质量评价 - RMS动态范围分析
 
 依赖安装:
-    pip install numpy librosa matplotlib
+    pip install numpy soundfile matplotlib
 
 使用示例:
     from rms_analyzer import analyze_rms_dynamic_range
@@ -39,47 +39,50 @@ AI翻唱WAV文件质量评价 - RMS动态范围分析
 import os
 import numpy as np
 import matplotlib.pyplot as plt
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Optional
+import tool_stream
+import tool_parallel
 
 
-def analyze_rms_dynamic_range(wav_paths: List[str]) -> None:
+def analyze_rms_dynamic_range(wav_paths: List[str], render: bool = True) -> Optional[List[Dict]]:
     """
     分析多个WAV文件的RMS动态范围并可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数递增排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
+
+    返回:
+        render为False时为每个文件的结果字典列表；画图时返回None
     """
 
     # ==================== 内部导入依赖 ====================
     try:
-        import librosa
+        import soundfile
     except ImportError:
-        raise ImportError("请先安装librosa: pip install librosa")
+        raise ImportError("请先安装soundfile: pip install soundfile")
 
     # ==================== 单文件处理函数 ====================
     def calculate_single_file(wav_path: str) -> Tuple[str, float, dict]:
         """计算单个文件的RMS动态范围"""
         filename = os.path.basename(wav_path)
         try:
-            # 加载音频文件
-            y, sr = librosa.load(wav_path, sr=None)
-
-            # 计算RMS能量（分帧）
-            rms = librosa.feature.rms(y=y, frame_length=2048, hop_length=512)[0]
+            # 按块读取，分帧RMS（帧长2048，跳步512）边读边累积最大值和按dB分格的直方图，内存与文件长度无关
+            sr = tool_stream.info(wav_path).samplerate
+            frame_rms = tool_stream.FrameRmsRange(frame_length=2048, hop_length=512)
+            tool_stream.feed(tool_stream.blocks(wav_path, dtype='float32'), frame_rms)
+            stats = frame_rms.result()
 
             # 过滤静音部分（保留超过最大值1%的帧，避免静音干扰）
-            threshold = np.max(rms) * 0.01
-            rms_filtered = rms[rms > threshold]
+            rms_min, count = frame_rms.min_above(stats['rms_max'] * 0.01)
 
-            if len(rms_filtered) < 2:
-                rms_filtered = rms[rms > 1e-10]
+            if count < 2:
+                rms_min, count = frame_rms.min_above(1e-10)
 
-            if len(rms_filtered) == 0:
+            if count == 0:
                 return filename, 0.0, {'valid': False}
 
-            rms_max = np.max(rms_filtered)
-            rms_min = np.min(rms_filtered)
+            rms_max = stats['rms_max']
 
             # 计算动态范围: DR = 20 × log₁₀(RMS_max / RMS_min)
             dr = 20 * np.log10(rms_max / rms_min) if rms_min > 0 else 0.0
@@ -88,7 +91,7 @@ def analyze_rms_dynamic_range(wav_paths: List[str]) -> None:
                 'valid': True,
                 'rms_max': rms_max,
                 'rms_min': rms_min,
-                'duration': len(y) / sr
+                'duration': stats['samples'] / sr
             }
 
         except Exception as e:
@@ -99,9 +102,12 @@ def analyze_rms_dynamic_range(wav_paths: List[str]) -> None:
     print(f"📂 开始处理 {len(wav_paths)} 个WAV文件...")
 
     max_workers = min(8, os.cpu_count() or 4, len(wav_paths))
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=max_workers) as executor:
         results = list(executor.map(calculate_single_file, wav_paths))
 
+    if not render:
+        return [{'filename': filename, 'dynamic_range': dr, **info} for filename, dr, info in results]
+
     print("✅ 音频分析完成，正在生成图表...")
 
     # 提取结果
@@ -25,24 +25,26 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.io import wavfile
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import tool_stream
+import tool_parallel
+from concurrent.futures import as_completed
 import os
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Union
 import warnings
 
 warnings.filterwarnings('ignore')
 
 
-def analyze_crest_factor(wav_paths: List[str]) -> Dict:
+def analyze_crest_factor(wav_paths: List[str], render: bool = True) -> Union[List[Dict], Dict]:
     """
     分析多个WAV文件的Crest Factor（峰均比）并可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数递增排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        包含分析结果的字典
+        包含分析结果的字典；render为False时为每个文件的结果字典列表（没有有效文件时仍为带errors的字典）
     """
 
     # ==================== 内部函数定义 ====================
@@ -51,27 +53,13 @@ def analyze_crest_factor(wav_paths: List[str]) -> Dict:
         """计算单个WAV文件的Crest Factor"""
         idx, wav_path = args
         try:
-            sample_rate, data = wavfile.read(wav_path)
-
-            # 立体声转单声道
-            if len(data.shape) > 1:
-                data = np.mean(data, axis=1)
-
-            # 归一化到 [-1, 1]
-            if data.dtype == np.int16:
-                data = data.astype(np.float64) / 32768.0
-            elif data.dtype == np.int32:
-                data = data.astype(np.float64) / 2147483648.0
-            elif data.dtype == np.uint8:
-                data = (data.astype(np.float64) - 128) / 128.0
-            elif data.dtype in [np.float32, np.float64]:
-                data = data.astype(np.float64)
-            else:
-                data = data.astype(np.float64) / np.max(np.abs(data))
-
-            # 计算峰值和RMS
-            peak = np.max(np.abs(data))
-            rms = np.sqrt(np.mean(data ** 2))
+            # 按块读取（float按位深归一化到[-1, 1)），累积单声道的峰值和平方和，内存与文件长度无关
+            sample_rate = tool_stream.info(wav_path).samplerate
+            accumulator = tool_stream.PeakRms()
+            tool_stream.feed(tool_stream.blocks(wav_path), accumulator)
+            stats = accumulator.result()
+            peak = stats['peak']
+            rms = stats['rms']
 
             # 计算Crest Factor (dB)
             if rms > 1e-10 and peak > 1e-10:
@@ -87,7 +75,7 @@ def analyze_crest_factor(wav_paths: List[str]) -> Dict:
                 'peak': peak,
                 'rms': rms,
                 'sample_rate': sample_rate,
-                'duration': len(data) / sample_rate,
+                'duration': stats['samples'] / sample_rate,
                 'error': None
             }
         except Exception as e:
@@ -131,7 +119,7 @@ def analyze_crest_factor(wav_paths: List[str]) -> Dict:
     max_workers = min(os.cpu_count() or 4, 16, len(wav_paths))
     results_list = []
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=max_workers) as executor:
         futures = {executor.submit(calculate_single_file, (i, path)): i
                    for i, path in enumerate(wav_paths)}
 
@@ -153,6 +141,9 @@ def analyze_crest_factor(wav_paths: List[str]) -> Dict:
         print("错误: 没有有效的WAV文件可供分析")
         return {'valid': [], 'errors': error_results}
 
+    if not render:
+        return valid_results
+
     # ==================== 数据准备 ====================
 
     n_files = len(valid_results)
@@ -27,15 +27,15 @@ AI翻唱音频质量分析 - THD+N（总谐波失真+噪声）评估
 """
 
 import numpy as np
-from scipy.io import wavfile
+import tool_feature_store
+import tool_parallel
 from scipy import signal
 import matplotlib.pyplot as plt
-from concurrent.futures import ThreadPoolExecutor
 import os
 from typing import List, Dict, Any
 
 
-def analyze_thdn(wav_paths: List[str]) -> List[Dict[str, Any]]:
+def analyze_thdn(wav_paths: List[str], render: bool = True) -> List[Dict[str, Any]]:
     """
     分析多个WAV文件的THD+N（总谐波失真+噪声）质量
 
@@ -47,6 +47,7 @@ def analyze_thdn(wav_paths: List[str]) -> List[Dict[str, Any]]:
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
         包含每个文件分析结果的字典列表
@@ -58,7 +59,7 @@ def analyze_thdn(wav_paths: List[str]) -> List[Dict[str, Any]]:
 
         try:
             # ====== 读取音频文件 ======
-            sample_rate, data = wavfile.read(file_path)
+            sample_rate, data = tool_feature_store.read_wav(file_path)
 
             # 转换为单声道
             if len(data.shape) > 1:
@@ -207,7 +208,7 @@ def analyze_thdn(wav_paths: List[str]) -> List[Dict[str, Any]]:
 
     max_workers = min(os.cpu_count() or 4, len(wav_paths), 8)
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=max_workers) as executor:
         futures = executor.map(_calculate_single_file, indexed_paths)
         results = list(futures)
 
@@ -228,6 +229,9 @@ def analyze_thdn(wav_paths: List[str]) -> List[Dict[str, Any]]:
 
     print(f"✓ 成功处理 {len(valid_results)}/{len(wav_paths)} 个文件")
 
+    if not render:
+        return results
+
     # ====== 可视化 ======
     _visualize_results(valid_results)
 
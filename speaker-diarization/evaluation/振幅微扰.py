@@ -38,8 +38,10 @@ import os
 import warnings
 import numpy as np
 import matplotlib.pyplot as plt
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Tuple, Optional, Dict
+from concurrent.futures import as_completed
+from typing import List, Tuple, Optional, Dict, Union
+import tool_feature_store
+import tool_parallel
 
 
 # 在函数外部定义计算函数，确保可被并发调用
@@ -56,7 +58,7 @@ def _calculate_shimmer_single(wav_path: str) -> Tuple[str, Optional[float], Opti
         filename = os.path.basename(wav_path)
 
         # 加载音频
-        sound = parselmouth.Sound(wav_path)
+        sound = tool_feature_store.get_sound(wav_path)
 
         # 创建 PointProcess 对象（用于检测基频周期）
         # 参数: 最低基频75Hz, 最高基频600Hz
@@ -85,7 +87,7 @@ def _calculate_shimmer_single(wav_path: str) -> Tuple[str, Optional[float], Opti
         return (filename, None, str(e))
 
 
-def analyze_shimmer_quality(wav_paths: List[str]) -> Dict:
+def analyze_shimmer_quality(wav_paths: List[str], render: bool = True) -> Union[List[Dict], Dict]:
     """
     分析多个WAV文件的振幅微扰（Shimmer）指标，并可视化对比
 
@@ -105,9 +107,10 @@ def analyze_shimmer_quality(wav_paths: List[str]) -> Dict:
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数递增排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        包含分析结果的字典
+        包含分析结果的字典；render为False时为每个文件的结果字典列表
     """
 
     # 检查依赖
@@ -137,7 +140,7 @@ def analyze_shimmer_quality(wav_paths: List[str]) -> Dict:
     results: Dict[str, Tuple[str, Optional[float], Optional[str]]] = {}
     completed = 0
 
-    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=num_workers) as executor:
         future_to_path = {
             executor.submit(_calculate_shimmer_single, path): path
             for path in wav_paths
@@ -189,6 +192,9 @@ def analyze_shimmer_quality(wav_paths: List[str]) -> Dict:
         print(f"Shimmer 标准差: {np.std(valid_values):.2f}%")
     print(f"{'═' * 60}\n")
 
+    if not render:
+        return [{'filename': filename, 'shimmer': value, 'error': error} for filename, value, error in ordered_results]
+
     # ═══════════════════════════════════════════════════════════════
     # 可视化
     # ═══════════════════════════════════════════════════════════════
@@ -68,14 +68,15 @@ pip install numpy scipy matplotlib pyloudnorm
 import os
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.io import wavfile
+import tool_feature_store
 
 
 def analyze_short_term_loudness_variance(
         wav_paths: list[str],
         window_sec: float = 3.0,
         hop_sec: float = 0.5,
-        output_path: str = "loudness_variance_analysis.png"
+        output_path: str = "loudness_variance_analysis.png",
+        render: bool = True
 ) -> list[dict]:
     """
     分析多个WAV文件的短时响度波动，并生成可视化对比图表。
@@ -85,6 +86,7 @@ def analyze_short_term_loudness_variance(
         window_sec: 短时窗口长度（秒），默认3秒
         hop_sec: 窗口滑动步长（秒），默认0.5秒
         output_path: 图表保存路径
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
         包含每个文件分析结果的字典列表
@@ -139,7 +141,7 @@ def analyze_short_term_loudness_variance(
     # ========================
     def load_audio(path: str) -> tuple[np.ndarray, int]:
         """加载WAV文件并归一化为 [-1, 1] 的单声道音频"""
-        sr, audio = wavfile.read(path)
+        sr, audio = tool_feature_store.read_wav(path)
 
         # 转换为 float64 并归一化
         if audio.dtype == np.int16:
@@ -229,6 +231,9 @@ def analyze_short_term_loudness_variance(
                 'error': str(e)
             })
 
+    if not render:
+        return results
+
     # ========================
     # 5. 可视化
     # ========================
@@ -23,14 +23,15 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.io import wavfile
+import tool_feature_store
+import tool_parallel
 from scipy.signal import hilbert, butter, filtfilt
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 import os
 import re
 
 
-def analyze_modulation_spectrum(wav_paths):
+def analyze_modulation_spectrum(wav_paths, render=True):
     """
     对AI翻唱WAV文件进行调制频谱分析
 
@@ -40,6 +41,7 @@ def analyze_modulation_spectrum(wav_paths):
 
     参数:
         wav_paths: list[str] - WAV文件路径的字符串数组（已按模型轮数递增排序）
+        render: bool - 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
         list[dict] - 各文件的分析结果
@@ -54,7 +56,7 @@ def analyze_modulation_spectrum(wav_paths):
         """提取单个WAV文件的调制频谱特征（线程安全）"""
         try:
             # 读取WAV文件
-            sr, audio = wavfile.read(wav_path)
+            sr, audio = tool_feature_store.read_wav(wav_path)
 
             # 转换为单声道
             if len(audio.shape) > 1:
@@ -149,7 +151,7 @@ def analyze_modulation_spectrum(wav_paths):
     results = [None] * len(wav_paths)
     max_workers = min(os.cpu_count() or 4, len(wav_paths), 16)
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=max_workers) as executor:
         future_to_idx = {
             executor.submit(extract_modulation_features, path): idx
             for idx, path in enumerate(wav_paths)
@@ -178,6 +180,9 @@ def analyze_modulation_spectrum(wav_paths):
         print("\n错误: 没有成功处理的文件，无法生成图表")
         return results
 
+    if not render:
+        return results
+
     print(f"\n成功处理 {len(valid_results)} 个文件，正在生成图表...")
 
     # ==================== 可视化设置 ====================
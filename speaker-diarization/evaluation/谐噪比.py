@@ -38,19 +38,22 @@ AI翻唱音频质量评估 - 谐噪比(HNR)分析
 import os
 import numpy as np
 import matplotlib.pyplot as plt
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import as_completed
+from typing import List, Dict, Optional, Tuple, Union
+import tool_feature_store
+import tool_parallel
 
 
-def analyze_hnr_quality(wav_paths: List[str]) -> Dict[str, Optional[float]]:
+def analyze_hnr_quality(wav_paths: List[str], render: bool = True) -> Union[List[Dict], Dict[str, Optional[float]]]:
     """
     分析多个WAV文件的谐噪比(HNR)并可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组，已按模型轮数排序
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        Dict[str, Optional[float]]: 文件名到HNR值的映射
+        Dict[str, Optional[float]]: 文件名到HNR值的映射；render为False时为每个文件的结果字典列表
     """
 
     # 延迟导入，确保依赖检查在函数内部
@@ -66,7 +69,7 @@ def analyze_hnr_quality(wav_paths: List[str]) -> Dict[str, Optional[float]]:
             if not os.path.exists(wav_path):
                 return (wav_path, None, "文件不存在")
 
-            sound = parselmouth.Sound(wav_path)
+            sound = tool_feature_store.get_sound(wav_path)
             # 使用Praat的自相关方法计算HNR
             # 参数: time_step=0.01, minimum_pitch=75Hz, silence_threshold=0.1, periods_per_window=1.0
             harmonicity = call(sound, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0)
@@ -95,7 +98,7 @@ def analyze_hnr_quality(wav_paths: List[str]) -> Dict[str, Optional[float]]:
     print(f"并发线程数: {num_workers}")
     print(f"{'=' * 60}\n")
 
-    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=num_workers) as executor:
         future_to_path = {executor.submit(calculate_hnr_single, path): path
                           for path in wav_paths}
         completed = 0
@@ -114,6 +117,9 @@ def analyze_hnr_quality(wav_paths: List[str]) -> Dict[str, Optional[float]]:
     hnr_values = [results.get(path) for path in wav_paths]
     file_names = [os.path.basename(path) for path in wav_paths]
 
+    if not render:
+        return [{'filename': name, 'hnr': hnr} for name, hnr in zip(file_names, hnr_values)]
+
     # 过滤有效数据
     valid_data = [(i, name, hnr) for i, (name, hnr) in enumerate(zip(file_names, hnr_values))
                   if hnr is not None]
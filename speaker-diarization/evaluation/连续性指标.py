@@ -36,15 +36,17 @@ import librosa
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 from matplotlib.ticker import MaxNLocator
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from pathlib import Path
 from typing import List, Dict, Optional
 import warnings
+import tool_feature_store
+import tool_parallel
 
 warnings.filterwarnings('ignore')
 
 
-def analyze_frame_continuity(wav_paths: List[str]) -> Optional[List[Dict]]:
+def analyze_frame_continuity(wav_paths: List[str], render: bool = True) -> Optional[List[Dict]]:
     """
     分析多个WAV文件的帧间连续性指标（Frame-level Continuity）
 
@@ -58,6 +60,7 @@ def analyze_frame_continuity(wav_paths: List[str]) -> Optional[List[Dict]]:
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数递增排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
         分析结果列表，每个元素包含文件的各项指标
@@ -70,10 +73,10 @@ def analyze_frame_continuity(wav_paths: List[str]) -> Optional[List[Dict]]:
         idx, wav_path = args
         try:
             # 加载音频
-            y, sr = librosa.load(wav_path, sr=None)
+            y, sr = tool_feature_store.load(wav_path, sr=None)
 
-            # 提取MFCC特征（13维，每帧一个向量）
-            mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+            # 提取MFCC特征（13维，每帧一个向量），由缓存的STFT计算
+            mfcc = tool_feature_store.get_mfcc(wav_path, sr=None, n_mfcc=13)
 
             # 计算相邻帧的余弦相似度
             n_frames = mfcc.shape[1]
@@ -381,7 +384,7 @@ def analyze_frame_continuity(wav_paths: List[str]) -> Optional[List[Dict]]:
     results = []
     completed = 0
 
-    with ThreadPoolExecutor(max_workers=min(8, len(wav_paths))) as executor:
+    with tool_parallel.thread_pool(max_workers=min(8, len(wav_paths))) as executor:
         futures = {executor.submit(compute_single_file, task): task for task in tasks}
 
         for future in as_completed(futures):
@@ -455,6 +458,9 @@ def analyze_frame_continuity(wav_paths: List[str]) -> Optional[List[Dict]]:
     print(f"  • 轻微断裂 (0.85-0.90): {fair} 个 ({fair / len(means) * 100:.1f}%)")
     print(f"  • 连贯性差 (<0.85): {poor} 个 ({poor / len(means) * 100:.1f}%)")
 
+    if not render:
+        return valid_results
+
     # 创建可视化
     print(f"\n🎨 正在生成可视化图表...")
     create_visualization(valid_results)
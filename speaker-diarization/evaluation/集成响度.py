@@ -23,16 +23,15 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-import soundfile as sf
-import pyloudnorm as pyln
+import tool_stream
 from pathlib import Path
-from typing import List, Dict, Tuple
-import warnings
+from typing import List, Dict, Tuple, Union
 
 
 def analyze_integrated_loudness(wav_paths: List[str],
                                 save_path: str = None,
-                                show_plot: bool = True) -> Dict[str, float]:
+                                show_plot: bool = True,
+                                render: bool = True) -> Union[List[Dict], Dict[str, float]]:
     """
     分析多个WAV文件的集成响度(LUFS)并可视化对比
 
@@ -40,9 +39,10 @@ def analyze_integrated_loudness(wav_paths: List[str],
         wav_paths: WAV文件路径的字符串数组
         save_path: 图表保存路径（可选）
         show_plot: 是否显示图表
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     Returns:
-        Dict[str, float]: 文件名到LUFS值的映射
+        Dict[str, float]: 文件名到LUFS值的映射；render为False时为每个文件的结果字典列表
     """
 
     # ========== 1. 计算每个文件的LUFS ==========
@@ -52,20 +52,10 @@ def analyze_integrated_loudness(wav_paths: List[str],
 
     for path in wav_paths:
         try:
-            # 读取音频文件
-            data, rate = sf.read(path)
-
-            # 如果是单声道，转换为二维数组
-            if len(data.shape) == 1:
-                data = data.reshape(-1, 1)
-
-            # 创建符合 ITU-R BS.1770 标准的响度测量器
-            meter = pyln.Meter(rate)
-
-            # 计算集成响度
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                loudness = meter.integrated_loudness(data)
+            # 按块读取，K加权滤波和门限块的统计跨块累积（ITU-R BS.1770），内存与文件长度无关
+            meter = tool_stream.LoudnessMeter(tool_stream.info(path).samplerate)
+            tool_stream.feed(tool_stream.blocks(path), meter)
+            loudness = meter.result()
 
             # 处理静音或极低音量的情况
             if np.isinf(loudness) or np.isnan(loudness):
@@ -86,6 +76,9 @@ def analyze_integrated_loudness(wav_paths: List[str],
     if not results:
         raise ValueError("没有成功处理任何文件")
 
+    if not render:
+        return [{'filename': name, 'lufs': lufs} for name, lufs in zip(file_names, results)]
+
     # ========== 2. 创建可视化图表 ==========
     fig, ax = plt.subplots(figsize=(14, max(8, len(file_names) * 0.6 + 3)))
 
@@ -36,21 +36,24 @@ analyze_zcr_quality(["path/to/file1.wav", "path/to/file2.wav", ...])
 import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import as_completed
+from typing import List, Dict, Optional, Tuple, Union
 import warnings
+import tool_feature_store
+import tool_parallel
 
 
-def analyze_zcr_quality(wav_paths: List[str], max_workers: int = 8) -> Optional[Dict]:
+def analyze_zcr_quality(wav_paths: List[str], max_workers: int = 8, render: bool = True) -> Optional[Union[List[Dict], Dict]]:
     """
     分析多个WAV文件的零交叉率(ZCR)，并可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组（按模型轮数递增排序）
         max_workers: 并发处理的最大线程数
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        包含分析结果的字典，如果失败返回None
+        包含分析结果的字典，render为False时为每个文件的结果字典列表，如果失败返回None
     """
 
     # ==================== 内部函数定义 ====================
@@ -71,7 +74,7 @@ def analyze_zcr_quality(wav_paths: List[str], max_workers: int = 8) -> Optional[
 
         try:
             # 加载音频
-            y, sr = librosa.load(wav_path, sr=None)
+            y, sr = tool_feature_store.load(wav_path, sr=None)
 
             # 计算帧级ZCR
             zcr = librosa.feature.zero_crossing_rate(y, frame_length=2048, hop_length=512)[0]
@@ -508,7 +511,7 @@ def analyze_zcr_quality(wav_paths: List[str], max_workers: int = 8) -> Optional[
     # 并发处理所有文件
     results = [None] * len(wav_paths)
 
-    with ThreadPoolExecutor(max_workers=min(max_workers, len(wav_paths))) as executor:
+    with tool_parallel.thread_pool(max_workers=min(max_workers, len(wav_paths))) as executor:
         future_to_idx = {
             executor.submit(_calculate_zcr_single, path): i
             for i, path in enumerate(wav_paths)
@@ -542,6 +545,9 @@ def analyze_zcr_quality(wav_paths: List[str], max_workers: int = 8) -> Optional[
     n_files = len(valid_results)
     print(f"\n✅ 成功分析 {n_files} 个文件，正在生成图表...")
 
+    if not render:
+        return valid_results
+
     # 创建可视化
     _create_visualization(valid_results, n_files)
 
@@ -39,9 +39,12 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import font_manager
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from functools import partial
 import warnings
+import tool_feature_store
+import tool_parallel
+import tool_f0
 
 warnings.filterwarnings('ignore')
 
@@ -57,18 +60,13 @@ def _extract_f0_features(wav_path: str, sr: int = 22050) -> dict:
     Returns:
         包含F0特征的字典
     """
-    import librosa
-
     try:
-        # 加载音频
-        y, sr = librosa.load(wav_path, sr=sr)
-
-        # 使用PYIN算法提取F0（比YIN更鲁棒）
-        f0, voiced_flag, voiced_probs = librosa.pyin(
-            y,
-            fmin=librosa.note_to_hz('C2'),  # 约65Hz
-            fmax=librosa.note_to_hz('C7'),  # 约2093Hz
+        # 提取F0（默认向量化YIN，后端见tool_f0），与音高漂移共用特征缓存里的同一条F0轨迹
+        f0, voiced_flag, voiced_probs = tool_feature_store.get_f0(
+            wav_path,
             sr=sr,
+            fmin=tool_f0.fmin_default,  # C2，约65Hz
+            fmax=tool_f0.fmax_default,  # C7，约2093Hz
             frame_length=2048,
             hop_length=512
         )
@@ -171,13 +169,14 @@ def _setup_chinese_font():
     return None
 
 
-def analyze_f0_stability(wav_paths: list, max_workers: int = None):
+def analyze_f0_stability(wav_paths: list, max_workers: int = None, render: bool = True):
     """
     分析多个wav文件的音高与基频稳定性（F0）
 
     Args:
         wav_paths: wav文件路径的字符串数组（已按模型轮数排序）
         max_workers: 并发处理的最大进程数，默认为CPU核心数
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     Returns:
         包含所有分析结果的列表
@@ -194,7 +193,7 @@ def analyze_f0_stability(wav_paths: list, max_workers: int = None):
     results = []
     failed_files = []
 
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.process_pool(max_workers=max_workers) as executor:
         future_to_path = {
             executor.submit(_extract_f0_features, path): path
             for path in wav_paths
@@ -225,6 +224,9 @@ def analyze_f0_stability(wav_paths: list, max_workers: int = None):
     print(f"\n✅ 成功处理 {len(results)} 个文件，失败 {len(failed_files)} 个")
     print("=" * 60)
 
+    if not render:
+        return results
+
     # ==================== 可视化 ====================
     _visualize_f0_results(results)
 
@@ -21,65 +21,55 @@
     + 长音保持稳定性，斜率符合自然演唱曲线。
 """
 
-# pip install numpy matplotlib scipy praat-parselmouth
+# pip install numpy matplotlib scipy
 
 import numpy as np
 import matplotlib.pyplot as plt
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from pathlib import Path
 from typing import List, Dict
 import warnings
+import tool_feature_store
+import tool_parallel
 
 warnings.filterwarnings('ignore')
 
 
-def analyze_pitch_drift(wav_paths: List[str]) -> List[Dict]:
+def analyze_pitch_drift(wav_paths: List[str], render: bool = True) -> List[Dict]:
     """
     分析AI翻唱WAV文件的Pitch Drift（音高漂移）指标并可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
         包含每个文件分析结果的字典列表
     """
 
     # ==================== 依赖导入 ====================
-    try:
-        import parselmouth
-        from parselmouth.praat import call
-    except ImportError:
-        raise ImportError("请安装 praat-parselmouth: pip install praat-parselmouth")
-
     try:
         from scipy import stats
     except ImportError:
         raise ImportError("请安装 scipy: pip install scipy")
 
+    # F0轨迹参数，与音高与基频稳定性一致，两个模块命中同一份缓存
+    f0_sr = 22050
+    f0_hop_length = 512
+
     # ==================== 单文件处理函数 ====================
     def process_single_file(args: tuple) -> Dict:
         """处理单个WAV文件，计算Pitch Drift指标"""
         idx, wav_path = args
 
         try:
-            # 使用Praat提取F0（更准确）
-            snd = parselmouth.Sound(wav_path)
-            pitch = call(snd, "To Pitch", 0.0, 75, 600)
+            # 与音高与基频稳定性共用特征缓存里的同一条F0轨迹，只保留75~600Hz的有声帧（人声范围）
+            f0, _, _ = tool_feature_store.get_f0(wav_path, sr=f0_sr, hop_length=f0_hop_length)
+            frame_times = np.arange(len(f0)) * f0_hop_length / f0_sr
+            voiced = ~np.isnan(f0) & (f0 >= 75) & (f0 <= 600)
 
-            # 获取F0序列
-            f0_values = []
-            times = []
-            num_frames = call(pitch, "Get number of frames")
-
-            for i in range(1, num_frames + 1):
-                t = call(pitch, "Get time from frame number", i)
-                f0 = call(pitch, "Get value in frame", i, "Hertz")
-                if not np.isnan(f0) and f0 > 0:
-                    f0_values.append(f0)
-                    times.append(t)
-
-            f0_values = np.array(f0_values)
-            times = np.array(times)
+            f0_values = np.asarray(f0[voiced], dtype=np.float64)
+            times = frame_times[voiced]
 
             if len(f0_values) < 10:
                 return {
@@ -175,12 +165,15 @@ def analyze_pitch_drift(wav_paths: List[str]) -> List[Dict]:
     print(f"开始分析 {len(wav_paths)} 个文件...")
     results = []
 
-    with ThreadPoolExecutor(max_workers=min(8, len(wav_paths))) as executor:
+    with tool_parallel.thread_pool(max_workers=min(8, len(wav_paths))) as executor:
         futures = list(executor.map(process_single_file, enumerate(wav_paths)))
         results = sorted(futures, key=lambda x: x['index'])
 
     print("分析完成，正在生成图表...")
 
+    if not render:
+        return results
+
     # ==================== 可视化 ====================
     # 设置中文字体（常规字体，非等宽）
     plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'PingFang SC', 'Hiragino Sans GB', 'DejaVu Sans']
@@ -25,18 +25,24 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Dict
 import warnings
+import tool_feature_store
+import tool_parallel
 
 
-def evaluate_spectral_bandwidth(wav_paths: List[str]) -> None:
+def evaluate_spectral_bandwidth(wav_paths: List[str], render: bool = True) -> Optional[List[Dict]]:
     """
     评估多个WAV文件的频谱带宽并进行可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数递增排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
+
+    返回:
+        render为False时为每个文件的结果字典列表；画图或失败时返回None
     """
 
     # 延迟导入，保持函数独立性
@@ -51,10 +57,11 @@ def evaluate_spectral_bandwidth(wav_paths: List[str]) -> None:
         idx, wav_path = args
         try:
             # 加载音频文件
-            y, sr = librosa.load(wav_path, sr=None)
+            y, sr = tool_feature_store.load(wav_path, sr=None)
 
             # 计算频谱带宽（每帧），然后取平均值
-            spectral_bw = librosa.feature.spectral_bandwidth(y=y, sr=sr)
+            S = tool_feature_store.get_stft(wav_path, sr=None)
+            spectral_bw = librosa.feature.spectral_bandwidth(S=S, sr=sr)
             mean_bw = float(np.mean(spectral_bw))
 
             filename = Path(wav_path).stem
@@ -81,7 +88,7 @@ def evaluate_spectral_bandwidth(wav_paths: List[str]) -> None:
 
     results: List[Tuple[int, str, Optional[float], Optional[str]]] = []
 
-    with ThreadPoolExecutor() as executor:
+    with tool_parallel.thread_pool() as executor:
         task_args = [(i, path) for i, path in enumerate(wav_paths)]
         futures = [executor.submit(process_single_file, args) for args in task_args]
 
@@ -112,6 +119,9 @@ def evaluate_spectral_bandwidth(wav_paths: List[str]) -> None:
 
     print(f"✅ 成功处理 {len(valid_results)} 个文件，正在生成图表...")
 
+    if not render:
+        return [{'filename': name, 'bandwidth': bw} for _, name, bw in valid_results]
+
     # 提取数据
     indices = [v[0] for v in valid_results]
     filenames = [v[1] for v in valid_results]
@@ -33,21 +33,24 @@ AI翻唱质量评估 - 频谱平坦度 (Spectral Flatness) 分析工具
 
 import numpy as np
 import matplotlib.pyplot as plt
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
 import warnings
+import tool_feature_store
+import tool_parallel
 
 
-def analyze_spectral_flatness(wav_paths: List[str]) -> dict:
+def analyze_spectral_flatness(wav_paths: List[str], render: bool = True) -> Union[List[dict], dict]:
     """
     分析多个WAV文件的频谱平坦度并可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        dict: 包含各文件分析结果的字典
+        dict: 包含各文件分析结果的字典；render为False时为每个文件的结果字典列表
     """
 
     # ==================== 延迟导入 ====================
@@ -82,11 +85,11 @@ def analyze_spectral_flatness(wav_paths: List[str]) -> dict:
         idx, wav_path = args
         try:
             # 加载音频文件
-            y, sr = librosa.load(wav_path, sr=None, mono=True)
+            y, sr = tool_feature_store.load(wav_path, sr=None)
 
             # 计算频谱平坦度 (返回每帧的值)
             # SF = 几何平均(功率谱) / 算术平均(功率谱)
-            sf = librosa.feature.spectral_flatness(y=y)[0]
+            sf = librosa.feature.spectral_flatness(S=tool_feature_store.get_stft(wav_path, sr=None))[0]
 
             return (
                 idx,
@@ -108,7 +111,7 @@ def analyze_spectral_flatness(wav_paths: List[str]) -> dict:
     results = []
     max_workers = min(8, max(1, n_files))
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=max_workers) as executor:
         # 提交所有任务
         futures = [
             executor.submit(process_single_file, (i, path))
@@ -145,6 +148,9 @@ def analyze_spectral_flatness(wav_paths: List[str]) -> dict:
 
     print(f"✅ 成功处理 {n_valid}/{n_files} 个文件\n")
 
+    if not render:
+        return [{'filename': r[1], 'mean': r[2], 'std': r[3], 'min': r[4], 'max': r[5], 'median': r[6]} for r in results]
+
     # ==================== 创建图表 ====================
     # 动态计算图表尺寸
     fig_width = max(14, min(48, n_valid * 0.4))
@@ -36,9 +36,11 @@ import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 from matplotlib.lines import Line2D
 import os
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from typing import List, Tuple, Optional
+from concurrent.futures import as_completed
+from typing import List, Tuple, Optional, Union
 import warnings
+import tool_feature_store
+import tool_parallel
 
 warnings.filterwarnings('ignore')
 
@@ -51,12 +53,12 @@ def _compute_single_rolloff(args: Tuple[int, str, float]) -> Tuple[int, str, flo
     """
     idx, wav_path, roll_percent = args
     try:
-        y, sr = librosa.load(wav_path, sr=None)
+        y, sr = tool_feature_store.load(wav_path, sr=None)
         duration = len(y) / sr
 
         # 计算频谱滚降点
         rolloff = librosa.feature.spectral_rolloff(
-            y=y, sr=sr, roll_percent=roll_percent
+            S=tool_feature_store.get_stft(wav_path, sr=None), sr=sr, roll_percent=roll_percent
         ).flatten()
 
         mean_rolloff = float(np.mean(rolloff))
@@ -72,8 +74,9 @@ def _compute_single_rolloff(args: Tuple[int, str, float]) -> Tuple[int, str, flo
 def analyze_spectral_rolloff(
         wav_paths: List[str],
         roll_percent: float = 0.85,
-        max_workers: Optional[int] = None
-) -> dict:
+        max_workers: Optional[int] = None,
+        render: bool = True
+) -> Union[List[dict], dict]:
     """
     分析多个WAV文件的频谱滚降点（Spectral Roll-off）并可视化对比
 
@@ -81,9 +84,10 @@ def analyze_spectral_rolloff(
         wav_paths: WAV文件路径的字符串数组（已按模型轮数递增排序）
         roll_percent: 滚降点的能量百分比阈值，默认0.85（85%）
         max_workers: 最大并发数，默认为CPU核心数
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        包含分析结果的字典
+        包含分析结果的字典；render为False时为每个文件的结果字典列表
     """
 
     if not wav_paths:
@@ -100,7 +104,7 @@ def analyze_spectral_rolloff(
 
     # 并发执行
     results = [None] * len(wav_paths)
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.process_pool(max_workers=max_workers) as executor:
         futures = {executor.submit(_compute_single_rolloff, args): args[0] for args in task_args}
 
         completed = 0
@@ -119,6 +123,9 @@ def analyze_spectral_rolloff(
     std_rolloffs = np.array([r[4] for r in results])
     durations = np.array([r[5] for r in results])
 
+    if not render:
+        return [{'filename': r[1], 'mean_rolloff': r[2], 'std_rolloff': r[4], 'duration': r[5], 'rolloff': r[3]} for r in results]
+
     # ==================== 可视化配置 ====================
     # 设置中文字体
     plt.rcParams['font.family'] = ['Microsoft YaHei', 'SimHei', 'DejaVu Sans', 'sans-serif']
@@ -38,13 +38,15 @@ import librosa
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 from matplotlib.lines import Line2D
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 import os
 import warnings
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
+import tool_feature_store
+import tool_parallel
 
 
-def analyze_spectral_entropy(wav_paths: List[str]) -> dict:
+def analyze_spectral_entropy(wav_paths: List[str], render: bool = True) -> Union[List[dict], dict]:
     """
     分析多个WAV文件的频谱熵并可视化对比
 
@@ -57,11 +59,13 @@ def analyze_spectral_entropy(wav_paths: List[str]) -> dict:
     ----------
     wav_paths : List[str]
         WAV文件路径的字符串数组，按模型轮数递增排序
+    render : bool
+        是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     Returns
     -------
-    dict
-        包含各文件名及其对应频谱熵值的字典
+    dict or list
+        包含各文件名及其对应频谱熵值的字典；render为False时为每个文件的结果字典列表
     """
 
     warnings.filterwarnings('ignore')
@@ -77,10 +81,10 @@ def analyze_spectral_entropy(wav_paths: List[str]) -> dict:
         filename = os.path.basename(wav_path)
         try:
             # 加载音频文件
-            y, sr = librosa.load(wav_path, sr=None)
+            y, sr = tool_feature_store.load(wav_path, sr=None)
 
-            # 短时傅里叶变换获取频谱
-            S = np.abs(librosa.stft(y, n_fft=2048, hop_length=512))
+            # 短时傅里叶变换获取频谱（缓存）
+            S = tool_feature_store.get_stft(wav_path, sr=None, n_fft=2048, hop_length=512)
 
             # 计算每帧的归一化频谱熵
             frame_entropies = []
@@ -115,7 +119,7 @@ def analyze_spectral_entropy(wav_paths: List[str]) -> dict:
     results_map = {}
     max_workers = min(os.cpu_count() or 4, 8, len(wav_paths))
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=max_workers) as executor:
         future_to_path = {
             executor.submit(_compute_spectral_entropy, path): path
             for path in wav_paths
@@ -152,6 +156,9 @@ def analyze_spectral_entropy(wav_paths: List[str]) -> dict:
 
     print(f"成功处理 {len(valid_data)}/{len(wav_paths)} 个文件")
 
+    if not render:
+        return [{'filename': name, 'entropy': entropy} for name, entropy in zip(filenames, entropies)]
+
     # ==================== 可视化配置 ====================
     # 设置中文字体（按优先级尝试）
     plt.rcParams.update({
@@ -32,11 +32,12 @@ pip install soundfile
 
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.io import wavfile
+import tool_feature_store
+import tool_parallel
 from scipy import signal
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Tuple, Optional
+from concurrent.futures import as_completed
+from typing import List, Dict, Tuple, Optional, Union
 import warnings
 
 warnings.filterwarnings('ignore')
@@ -45,8 +46,9 @@ warnings.filterwarnings('ignore')
 def analyze_high_frequency_quality(
         wav_paths: List[str],
         max_workers: int = 8,
-        show_table: bool = True
-) -> Dict:
+        show_table: bool = True,
+        render: bool = True
+) -> Union[List[Dict], Dict]:
     """
     分析AI翻唱wav文件的高频质量（频谱空洞与高频缺失）
 
@@ -54,24 +56,18 @@ def analyze_high_frequency_quality(
         wav_paths: wav文件路径列表（按模型轮数递增排序）
         max_workers: 并发处理的最大线程数
         show_table: 是否显示详情表格窗口
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        包含分析结果的字典
+        包含分析结果的字典；render为False时为每个文件的结果字典列表（没有成功的文件时仍为带error的字典）
     """
 
     # ==================== 内部函数定义 ====================
 
     def read_audio(wav_path: str) -> Tuple[int, np.ndarray]:
-        """读取音频文件，支持多种格式"""
-        try:
-            # 优先使用soundfile（支持更多格式）
-            import soundfile as sf
-            audio, sample_rate = sf.read(wav_path)
-            return sample_rate, audio
-        except ImportError:
-            # 回退到scipy
-            sample_rate, audio = wavfile.read(wav_path)
-            return sample_rate, audio
+        """读取音频文件，与soundfile.read结果一致，采样来自特征缓存"""
+        audio, sample_rate = tool_feature_store.read_float(wav_path)
+        return sample_rate, audio
 
     def analyze_single_file(wav_path: str) -> Dict:
         """分析单个wav文件的频谱特征"""
@@ -211,7 +207,7 @@ def analyze_high_frequency_quality(
 
     # 并发处理所有文件
     results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with tool_parallel.thread_pool(max_workers=max_workers) as executor:
         future_to_path = {
             executor.submit(analyze_single_file, path): path
             for path in wav_paths
@@ -245,6 +241,10 @@ def analyze_high_frequency_quality(
 
     print(f"\n✓ 成功分析 {len(successful_results)} 个文件")
 
+    # 评分是按本批文件归一化的相对值，只计算时返回每个文件自身的指标
+    if not render:
+        return successful_results
+
     # ==================== 数据准备 ====================
 
     n_files = len(successful_results)
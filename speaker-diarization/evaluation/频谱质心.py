@@ -35,22 +35,25 @@ AI翻唱质量评价 - 频谱质心 (Spectral Centroid) 分析
 
 import numpy as np
 import matplotlib.pyplot as plt
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
 import warnings
+import tool_feature_store
+import tool_parallel
 
 
-def analyze_spectral_centroid(wav_paths: List[str], max_workers: int = 16) -> Optional[dict]:
+def analyze_spectral_centroid(wav_paths: List[str], max_workers: int = 16, render: bool = True) -> Optional[Union[List[dict], dict]]:
     """
     分析多个WAV文件的频谱质心并可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数排序）
         max_workers: 并发处理的最大线程数
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        dict: 包含所有计算结果的字典，如果失败返回None
+        dict: 包含所有计算结果的字典，render为False时为每个文件的结果字典列表，如果失败返回None
     """
 
     # ========== 导入依赖（函数内部导入，便于错误提示） ==========
@@ -71,10 +74,11 @@ def analyze_spectral_centroid(wav_paths: List[str], max_workers: int = 16) -> Op
         """
         try:
             # 加载音频
-            y, sr = librosa.load(wav_path, sr=None)
+            y, sr = tool_feature_store.load(wav_path, sr=None)
 
             # 计算频谱质心 (每帧一个值)
-            centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+            S = tool_feature_store.get_stft(wav_path, sr=None)
+            centroid = librosa.feature.spectral_centroid(S=S, sr=sr)[0]
 
             filename = Path(wav_path).stem
             return (
@@ -100,7 +104,7 @@ def analyze_spectral_centroid(wav_paths: List[str], max_workers: int = 16) -> Op
     results = [None] * n_files
     completed = 0
 
-    with ThreadPoolExecutor(max_workers=min(max_workers, n_files)) as executor:
+    with tool_parallel.thread_pool(max_workers=min(max_workers, n_files)) as executor:
         future_to_idx = {
             executor.submit(compute_single_file, path): idx
             for idx, path in enumerate(wav_paths)
@@ -129,6 +133,9 @@ def analyze_spectral_centroid(wav_paths: List[str], max_workers: int = 16) -> Op
         print("错误: 所有文件处理都失败了")
         return None
 
+    if not render:
+        return [{'filename': r[0], 'mean': r[1], 'std': r[2], 'median': r[3], 'centroid': r[4]} for r in results]
+
     # ========== 配置 matplotlib ==========
     # 设置常规字体（非等宽字体）
     plt.rcParams['font.family'] = ['Microsoft YaHei', 'SimHei', 'Hiragino Sans GB',
@@ -34,22 +34,25 @@ pip install numpy matplotlib librosa soundfile
 import numpy as np
 import matplotlib.pyplot as plt
 import librosa
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Tuple, Union
 import warnings
+import tool_feature_store
+import tool_parallel
 
 
-def analyze_spectral_flux(wav_paths: List[str], max_workers: int = 8) -> dict:
+def analyze_spectral_flux(wav_paths: List[str], max_workers: int = 8, render: bool = True) -> Union[List[dict], dict]:
     """
     分析多个WAV文件的频谱通量并可视化对比
 
     参数:
         wav_paths: WAV文件路径的字符串数组（已按模型轮数递增排序）
         max_workers: 并发处理的最大线程数
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        dict: 包含各文件分析结果的字典
+        dict: 包含各文件分析结果的字典；render为False时为每个文件的结果字典列表
     """
 
     warnings.filterwarnings('ignore')
@@ -76,10 +79,10 @@ def analyze_spectral_flux(wav_paths: List[str], max_workers: int = 8) -> dict:
 
         try:
             # 加载音频（统一采样率确保可比性）
-            y, sr = librosa.load(wav_path, sr=22050, mono=True)
+            y, sr = tool_feature_store.load(wav_path, sr=22050)
 
-            # 计算短时傅里叶变换的幅度谱
-            S = np.abs(librosa.stft(y, n_fft=2048, hop_length=512))
+            # 短时傅里叶变换的幅度谱（缓存）
+            S = tool_feature_store.get_stft(wav_path, sr=22050, n_fft=2048, hop_length=512)
 
             # L2归一化（每帧独立归一化，消除音量影响）
             frame_norms = np.linalg.norm(S, axis=0, keepdims=True) + 1e-10
@@ -108,7 +111,7 @@ def analyze_spectral_flux(wav_paths: List[str], max_workers: int = 8) -> dict:
     results_dict = {}
     tasks = [(i, path) for i, path in enumerate(wav_paths)]
 
-    with ThreadPoolExecutor(max_workers=min(max_workers, len(wav_paths))) as executor:
+    with tool_parallel.thread_pool(max_workers=min(max_workers, len(wav_paths))) as executor:
         futures = {executor.submit(compute_single_file, task): task[0] for task in tasks}
 
         completed = 0
@@ -135,6 +138,9 @@ def analyze_spectral_flux(wav_paths: List[str], max_workers: int = 8) -> dict:
     print("=" * 50)
     print("✅ 数据分析完成，正在生成可视化图表...")
 
+    if not render:
+        return [{'filename': r[1], 'mean_flux': r[2], 'p5_flux': r[3], 'p95_flux': r[4], 'valid': r[5]} for r in results]
+
     # ==================== 可视化 ====================
     n_files = len(wav_paths)
     fig_width = max(14, min(24, n_files * 0.2))
@@ -35,10 +35,12 @@ pip install matplotlib-inline
 
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.io import wavfile
+import tool_feature_store
+import tool_parallel
 from scipy import signal
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from pathlib import Path
+from typing import Union
 import warnings
 
 warnings.filterwarnings('ignore')
@@ -52,7 +54,7 @@ def _calculate_single_hf_ratio(args):
     """
     wav_path, index = args
     try:
-        sr, audio = wavfile.read(wav_path)
+        sr, audio = tool_feature_store.read_wav(wav_path)
 
         # 立体声转单声道
         if len(audio.shape) > 1:
@@ -92,7 +94,7 @@ def _calculate_single_hf_ratio(args):
         return (filename, None, None, str(e), index)
 
 
-def analyze_hf_energy_ratio(wav_paths: list) -> dict:
+def analyze_hf_energy_ratio(wav_paths: list, render: bool = True) -> Union[list, dict]:
     """
     分析多个WAV文件的高频能量比例（HF Energy Ratio）
 
@@ -104,9 +106,10 @@ def analyze_hf_energy_ratio(wav_paths: list) -> dict:
 
     参数:
         wav_paths: WAV文件路径的字符串列表（已按模型轮数递增排序）
+        render: 是否画图；False时只计算不画图，返回每个文件的结果字典列表
 
     返回:
-        dict: {文件名: 高频能量比例(%)} 的字典
+        dict: {文件名: 高频能量比例(%)} 的字典；render为False时为每个文件的结果字典列表
     """
 
     if not wav_paths:
@@ -129,7 +132,7 @@ def analyze_hf_energy_ratio(wav_paths: list) -> dict:
     args_list = [(path, i) for i, path in enumerate(wav_paths)]
 
     # 使用进程池并发处理
-    with ProcessPoolExecutor() as executor:
+    with tool_parallel.process_pool() as executor:
         futures = {executor.submit(_calculate_single_hf_ratio, args): args[1]
                    for args in args_list}
 
@@ -168,6 +171,9 @@ def analyze_hf_energy_ratio(wav_paths: list) -> dict:
     names = list(names)
     ratios = np.array(ratios)
 
+    if not render:
+        return [{'filename': r['name'], 'hf_ratio': r['ratio'], 'sr': r['sr'], 'error': r['error']} for r in ordered_results]
+
     # ==================== 图表绘制 ====================
     n_files = len(names)
 
@@ -0,0 +1,143 @@
+import sys
+import time
+import random
+import util
+import tool_subt
+import part_divide
+
+logger = util.get_logger()
+
+
+def split_segments(segments, index):
+    left = []
+    middle = []
+    right = []
+    for i, segment in enumerate(segments):
+        if i < index:
+            left.append(segment)
+        elif i == index:
+            middle.append(segment)
+        else:
+            right.append(segment)
+    return left, middle, right
+
+
+def sum_segments_duration(segments):
+    duration = 0
+    for i, segment in enumerate(segments):
+        duration += segments[i]['duration']
+    return duration
+
+
+def group_segments_recursive(segments, min_speech_ms=1000 * 3, min_silence_ms=200):
+    """原递归实现，作为对照"""
+    segments = util.deepcopy_obj(segments)
+    segments = tool_subt.init_segments(segments)
+
+    silences = []
+    for i, segment in enumerate(segments):
+        if i == 0 or i == len(segments) - 1:
+            continue
+        if segments[i]['vad_type'] != 'silence':
+            continue
+        silences.append(segments[i])
+    silences = sorted(silences, key=lambda x: x['duration'], reverse=True)
+
+    for i, silence in enumerate(silences):
+        index = silence['index']
+        left, middle, right = split_segments(segments, index)
+        left_duration = sum_segments_duration(left)
+        right_duration = sum_segments_duration(right)
+        if min_speech_ms <= left_duration and min_speech_ms <= right_duration:
+            return join_groups(left, middle, right, min_speech_ms)
+
+    for i, silence in enumerate(silences):
+        index = silence['index']
+        if min_silence_ms <= silence['duration']:
+            left, middle, right = split_segments(segments, index)
+            return join_groups(left, middle, right, min_speech_ms)
+
+    speechs = []
+    for i, segment in enumerate(segments):
+        if segments[i]['vad_type'] != 'speech':
+            continue
+        speechs.append(segments[i])
+    speechs = sorted(speechs, key=lambda x: x['duration'], reverse=True)
+
+    for i, speech in enumerate(speechs):
+        index = speech['index']
+        if min_speech_ms <= speech['duration']:
+            left, middle, right = split_segments(segments, index)
+            return join_groups(left, middle, right, min_speech_ms)
+
+    groups = []
+    left_silence = []
+    if segments and segments[0]['vad_type'] == 'silence':
+        left_silence.append(segments[0])
+        segments.pop(0)
+    right_silence = []
+    if segments and segments[-1]['vad_type'] == 'silence':
+        right_silence.append(segments[-1])
+        segments.pop(-1)
+    if left_silence:
+        groups.append(left_silence)
+    if segments:
+        groups.append(segments)
+    if right_silence:
+        groups.append(right_silence)
+    return groups
+
+
+def join_groups(left, middle, right, min_speech_ms):
+    groups = []
+    groups.extend(group_segments_recursive(left, min_speech_ms))
+    if middle:
+        groups.append(middle)
+    groups.extend(group_segments_recursive(right, min_speech_ms))
+    return groups
+
+
+def make_segments(count, seed=0):
+    """交替的人声/静音片段，时长随机，与part_detect的输出形式一致"""
+    rng = random.Random(seed)
+    segments = []
+    start = 0
+    vad_type = rng.choice(['speech', 'silence'])
+    for i in range(count):
+        if vad_type == 'speech':
+            duration = rng.randint(50, 8000)
+        else:
+            duration = rng.choice([rng.randint(50, 300), rng.randint(50, 3000)])
+        segments.append({'start': start, 'end': start + duration, 'vad_type': vad_type})
+        start += duration
+        vad_type = 'silence' if vad_type == 'speech' else 'speech'
+    return tool_subt.init_segments(segments)
+
+
+def get_spans(groups):
+    return [[(segment['start'], segment['end'], segment['vad_type']) for segment in group] for group in groups]
+
+
+def bench(count, run_recursive=True):
+    segments = make_segments(count)
+    start = time.perf_counter()
+    groups = part_divide.group_segments(segments)
+    fast_s = time.perf_counter() - start
+    logger.info("分组基准，%s段，线性实现: %.3fs, %s组", count, fast_s, len(groups))
+    if not run_recursive:
+        return
+    start = time.perf_counter()
+    expected = group_segments_recursive(segments)
+    slow_s = time.perf_counter() - start
+    logger.info("分组基准，%s段，递归实现: %.3fs, %s组, 加速%.1f倍", count, slow_s, len(expected), slow_s / fast_s)
+    if get_spans(groups) != get_spans(expected):
+        logger.error("分组基准，结果不一致: %s", count)
+        raise ValueError(f"分组基准，结果不一致: {count}")
+
+
+if __name__ == '__main__':
+    # 递归实现在10万段上很慢，传参skip_recursive只跑线性实现
+    sys.setrecursionlimit(100000)
+    run_recursive = 'skip_recursive' not in sys.argv[1:]
+    for count in [100, 1000, 10000, 100000]:
+        bench(count, run_recursive)
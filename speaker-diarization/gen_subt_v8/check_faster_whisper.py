@@ -0,0 +1,77 @@
+import sys
+import numpy as np
+import util
+import tool_wav
+import tool_faster_whisper
+import segment_detect_faster_whisper
+
+logger = util.get_logger()
+
+
+def make_audio(clip_ms=3000, gap_ms=1000, count=3, seed=0):
+    """静音间隔的合成片段（基频+泛音的类元音），16kHz单声道，返回(audio, clips)"""
+    rate = tool_faster_whisper.sample_rate
+    rng = np.random.default_rng(seed)
+    parts = []
+    clips = []
+    start = 0
+    for i in range(count):
+        parts.append(np.zeros(gap_ms * rate // 1000))
+        start += gap_ms
+        t = np.arange(clip_ms * rate // 1000) / rate
+        f0 = rng.uniform(120, 240)
+        wave = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        wave *= 0.5 * (1 - np.cos(2 * np.pi * t * 2)) / 2
+        parts.append(wave)
+        clips.append({'start': start, 'end': start + clip_ms})
+        start += clip_ms
+    parts.append(np.zeros(gap_ms * rate // 1000))
+    samples = (np.concatenate(parts) * 0.3 * 32767).astype(np.int16).reshape(-1, 1)
+    return tool_wav.AudioView(samples, rate, 2), clips
+
+
+def check(audio, clips):
+    """同一批片段分别走单条转写和批量转写：批量路径不能报错，结果都要落在片段内，文本打印出来对照"""
+    if audio.frame_rate != tool_faster_whisper.sample_rate:
+        logger.error("faster-whisper检查，采样率需为%s: %s", tool_faster_whisper.sample_rate, audio.frame_rate)
+        raise ValueError(f"faster-whisper检查，采样率需为{tool_faster_whisper.sample_rate}: {audio.frame_rate}")
+
+    single_texts = []
+    for clip in clips:
+        segs, _ = segment_detect_faster_whisper.transcribe(audio[clip['start']:clip['end']])
+        single_texts.append(''.join(seg['text'] for seg in segs).strip())
+
+    segs, language = segment_detect_faster_whisper.transcribe_clips(audio, clips)
+    batched_texts = [''] * len(clips)
+    for seg in segs:
+        indexes = [j for j, clip in enumerate(clips) if clip['start'] <= seg['start'] and seg['end'] <= clip['end']]
+        if not indexes:
+            logger.error("faster-whisper检查，批量结果不在任何片段内: %s", seg)
+            raise ValueError(f"faster-whisper检查，批量结果不在任何片段内: {seg}")
+        batched_texts[indexes[0]] += seg['text']
+
+    missing = 0
+    for clip, single_text, batched_text in zip(clips, single_texts, batched_texts):
+        logger.info("faster-whisper检查，%s-%s，单条: %s，批量: %s", clip['start'], clip['end'], single_text,
+                    batched_text.strip())
+        if single_text and not batched_text.strip():
+            missing += 1
+    logger.info("faster-whisper检查，%s个片段，批量%s段，语言: %s", len(clips), len(segs), language)
+    return missing
+
+
+if __name__ == '__main__':
+    # 不传参用合成片段，只检查批量路径能跑通、时间正确；传16kHz人声wav和片段(毫秒)时还要求单条有字的片段批量也有字
+    args = sys.argv[1:]
+    if not args:
+        audio, clips = make_audio()
+        check(audio, clips)
+    else:
+        audio = tool_wav.read_audio(args[0])
+        clips = [{'start': int(start), 'end': int(end)} for start, end in zip(args[1::2], args[2::2])]
+        if not clips:
+            clips = [{'start': 0, 'end': min(len(audio), 30 * 1000)}]
+        missing = check(audio, clips)
+        if missing:
+            logger.error("faster-whisper检查，%s个片段批量转写没有结果", missing)
+            raise ValueError(f"faster-whisper检查，{missing}个片段批量转写没有结果")
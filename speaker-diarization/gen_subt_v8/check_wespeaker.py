@@ -0,0 +1,75 @@
+import sys
+import numpy as np
+import util
+import tool_wav
+import speaker_detect_pyannote_wespeaker
+
+logger = util.get_logger()
+
+# 批量与单条embedding的余弦相似度下限，差别只来自片段末尾几帧的卷积
+min_similarity = 0.99
+
+
+def make_audio(clip_ms_list=(2000, 3500, 5000, 8000), gap_ms=500, rate=16000, seed=0):
+    """静音间隔、长度不同的合成片段（基频+泛音的类元音），单声道，返回(audio, clips)"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    clips = []
+    start = 0
+    for clip_ms in clip_ms_list:
+        parts.append(np.zeros(gap_ms * rate // 1000))
+        start += gap_ms
+        t = np.arange(clip_ms * rate // 1000) / rate
+        f0 = rng.uniform(100, 250) * (1 + 0.05 * np.sin(2 * np.pi * 3 * t))
+        phase = 2 * np.pi * np.cumsum(f0) / rate
+        wave = sum(np.sin(k * phase) / k for k in range(1, 8))
+        wave += 0.05 * rng.standard_normal(len(t))
+        parts.append(wave)
+        clips.append({'start': start, 'end': start + clip_ms})
+        start += clip_ms
+    parts.append(np.zeros(gap_ms * rate // 1000))
+    samples = np.concatenate(parts)
+    samples = (samples / np.max(np.abs(samples)) * 0.5 * 32767).astype(np.int16).reshape(-1, 1)
+    return tool_wav.AudioView(samples, rate, 2), clips
+
+
+def get_similarity(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def check(audio, clips):
+    """
+    同一批片段分别走单条 extract_embedding 和批量 extract_embeddings，
+    批量再按不同的批大小各算一次：每个片段的批量结果与单条结果、不同分批的结果之间的余弦相似度都不能低于下限
+    """
+    cuts = [audio[clip['start']:clip['end']] for clip in clips]
+    singles = [speaker_detect_pyannote_wespeaker.extract_embedding(cut) for cut in cuts]
+    batched_all = speaker_detect_pyannote_wespeaker.extract_embeddings(cuts, batch_size=len(cuts))
+    batched_pair = speaker_detect_pyannote_wespeaker.extract_embeddings(cuts, batch_size=2)
+
+    failed = 0
+    for clip, single, all_embedding, pair_embedding in zip(clips, singles, batched_all, batched_pair):
+        single_similarity = get_similarity(single, all_embedding)
+        batch_similarity = get_similarity(all_embedding, pair_embedding)
+        logger.info("wespeaker检查，%s-%s，批量与单条: %.5f，不同分批: %.5f", clip['start'], clip['end'],
+                    single_similarity, batch_similarity)
+        if single_similarity < min_similarity or batch_similarity < min_similarity:
+            failed += 1
+    if failed:
+        logger.error("wespeaker检查，%s个片段批量embedding与单条不一致", failed)
+        raise ValueError(f"wespeaker检查，{failed}个片段批量embedding与单条不一致")
+    logger.info("wespeaker检查，%s个片段一致", len(clips))
+
+
+if __name__ == '__main__':
+    # 不传参用合成片段；传wav和片段(毫秒)时用真实人声
+    args = sys.argv[1:]
+    if not args:
+        audio, clips = make_audio()
+    else:
+        audio = tool_wav.read_audio(args[0])
+        clips = [{'start': int(start), 'end': int(end)} for start, end in zip(args[1::2], args[2::2])]
+        if not clips:
+            logger.error("wespeaker检查，需要传入片段的起止毫秒")
+            raise ValueError("wespeaker检查，需要传入片段的起止毫秒")
+    check(audio, clips)
@@ -33,12 +33,12 @@ def extract_audio(video_path, output_dir):
 
 
 def exec(manager):
-    logger.info("extract_audio,enter: %s", util.json_dumps(manager))
+    logger.info("extract_audio,enter: %s", util.log_json(manager))
     video_path = manager.get('video_path')
     output_dir = os.path.join(manager.get('output_dir'), "extract_audio")
     output_path = extract_audio(video_path, output_dir)
     manager['extract_audio_path'] = output_path
     manager['audio_path'] = output_path
     manager['split_audio_path'] = output_path
-    logger.info("extract_audio,leave: %s", util.json_dumps(manager))
+    logger.info("extract_audio,leave: %s", util.log_json(manager))
     util.exec_gc()
@@ -17,12 +17,12 @@ def extract_loudness(input_path_map, output_dir):
 
 
 def exec(manager):
-    logger.info("extract_loudness,enter: %s", util.json_dumps(manager))
+    logger.info("extract_loudness,enter: %s", util.log_json(manager))
     input_path_map = manager.get('extract_stem_path_map')
     output_dir = os.path.join(manager.get('output_dir'), "extract_loudness")
     output_path_map = extract_loudness(input_path_map, output_dir)
     manager['extract_loudness_path_map'] = output_path_map
     manager['audio_path'] = output_path_map['audio_path']
     manager['split_audio_path'] = output_path_map['split_audio_path']
-    logger.info("extract_loudness,leave: %s", util.json_dumps(manager))
+    logger.info("extract_loudness,leave: %s", util.log_json(manager))
     util.exec_gc()
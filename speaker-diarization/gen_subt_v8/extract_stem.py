@@ -26,18 +26,12 @@ class Extract:
         util.copy_file(self.slave_path, self.slave_copy_path)
 
 
-def extract_stem(audio_path, handlers, output_dir):
+def get_path_map(extracts):
     path_map = {}
-    extracts = []
-    for i, handler in enumerate(handlers):
-        extracts.append(Extract(handler))
     for i, extract in enumerate(extracts):
-        extract.extract(audio_path, output_dir)
-        extract.copy_slave()
         slave_copy_path = extract.slave_copy_path
         file_name = util.get_file_name(slave_copy_path)
         path_map[f'{file_name}_path'] = slave_copy_path
-        audio_path = extract.master_path
     if len(extracts) > 0:
         extracts[-1].copy_master()
         master_copy_path = extracts[-1].master_copy_path
@@ -48,16 +42,54 @@ def extract_stem(audio_path, handlers, output_dir):
     return path_map
 
 
-def exec(manager, handlers):
-    logger.info("extract_stem,enter: %s", util.json_dumps(manager))
-    audio_path = manager.get('audio_path')
-    output_dir = os.path.join(manager.get('output_dir'), "extract_stem")
-    done_path = os.path.join(output_dir, 'done.json')
-    done_path_ctx.set(done_path)
-    path_map = extract_stem(audio_path, handlers, output_dir)
-    manager['extract_stem_path_map'] = path_map
-    manager['audio_path'] = path_map['audio_path']
-    manager['split_audio_path'] = path_map['split_audio_path']
-    util.save_as_json(manager, done_path)
-    logger.info("extract_stem,leave: %s", util.json_dumps(manager))
+def extract_stem_batch(audio_paths, handlers, output_dirs, done_paths):
+    """
+    多个音频按handler顺序逐个模型处理：同一模型连续处理完所有音频再换下一个，
+    配合extract_stem_uvr的模型池，每个模型在一次运行中只加载一次。
+    """
+    audio_paths = list(audio_paths)
+    extracts_list = []
+    for j, audio_path in enumerate(audio_paths):
+        extracts_list.append([Extract(handler) for handler in handlers])
+    for i, handler in enumerate(handlers):
+        for j, extracts in enumerate(extracts_list):
+            done_path_ctx.set(done_paths[j])
+            extract = extracts[i]
+            extract.extract(audio_paths[j], output_dirs[j])
+            extract.copy_slave()
+            audio_paths[j] = extract.master_path
+    path_maps = []
+    for j, extracts in enumerate(extracts_list):
+        path_maps.append(get_path_map(extracts))
+    return path_maps
+
+
+def extract_stem(audio_path, handlers, output_dir):
+    path_maps = extract_stem_batch([audio_path], handlers, [output_dir], [done_path_ctx.get()])
+    return path_maps[0]
+
+
+def exec_batch(managers, handlers):
+    for i, manager in enumerate(managers):
+        logger.info("extract_stem,enter: %s", util.log_json(manager))
+    audio_paths = []
+    output_dirs = []
+    done_paths = []
+    for i, manager in enumerate(managers):
+        output_dir = os.path.join(manager.get('output_dir'), "extract_stem")
+        audio_paths.append(manager.get('audio_path'))
+        output_dirs.append(output_dir)
+        done_paths.append(os.path.join(output_dir, 'done.json'))
+    path_maps = extract_stem_batch(audio_paths, handlers, output_dirs, done_paths)
+    for i, manager in enumerate(managers):
+        path_map = path_maps[i]
+        manager['extract_stem_path_map'] = path_map
+        manager['audio_path'] = path_map['audio_path']
+        manager['split_audio_path'] = path_map['split_audio_path']
+        util.save_as_json(manager, done_paths[i])
+        logger.info("extract_stem,leave: %s", util.log_json(manager))
     util.exec_gc()
+
+
+def exec(manager, handlers):
+    exec_batch([manager], handlers)
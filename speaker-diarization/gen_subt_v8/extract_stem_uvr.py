@@ -2,17 +2,55 @@ import util
 import os
 from audio_separator.separator import Separator
 import extract_stem
+import tool_stem_chunk
 
 model_file_dir = os.path.join(util.get_home_dir(), '.cache', 'uvr')
 
 logger = util.get_logger()
 
+separator_map = {}
+
+
+def get_separator(model_name, output_dir):
+    """按模型名缓存已加载的Separator，跨视频复用，只切换输出目录"""
+    separator = separator_map.get(model_name, None)
+    if not separator:
+        separator = Separator(model_file_dir=model_file_dir, output_dir=output_dir)
+        separator.load_model(model_filename=model_name)
+        separator_map[model_name] = separator
+    util.mkdir(output_dir)
+    separator.output_dir = output_dir
+    separator.model_instance.output_dir = output_dir
+    return separator
+
+
+def separate(model_name, audio_path, output_dir, output_names, chunk_s=None, overlap_s=5):
+    """chunk_s为空或音频不超过chunk_s秒时整段分离，否则按重叠窗口分块分离"""
+    if not chunk_s or tool_stem_chunk.get_duration(audio_path) <= chunk_s:
+        separator = get_separator(model_name, output_dir)
+        separator.separate([audio_path], output_names)
+        return
+
+    def separate_window(window_path, chunk_dir):
+        window_separator = get_separator(model_name, chunk_dir)
+        window_separator.separate([window_path], output_names)
+
+    tool_stem_chunk.separate_chunked(separate_window, audio_path, output_dir, output_names,
+                                     window_s=chunk_s, overlap_s=overlap_s)
+
+
+def exec_gc():
+    separator_map.clear()
+    util.exec_gc()
+
 
 class VocalHandler:
-    def __init__(self, model_name=None):
+    def __init__(self, model_name=None, chunk_s=None, overlap_s=5):
         if not model_name:
             model_name = 'vocals_mel_band_roformer.ckpt'
         self.model_name = model_name
+        self.chunk_s = chunk_s
+        self.overlap_s = overlap_s
 
     def get_name(self):
         return "vocal"
@@ -25,31 +63,32 @@ class VocalHandler:
 
     def extract(self, audio_path, output_dir):
         output_dir = os.path.join(output_dir, self.model_name)
-        vocals_path, others_path = extract_vocal(self.model_name, audio_path, output_dir)
+        vocals_path, others_path = extract_vocal(self.model_name, audio_path, output_dir,
+                                                 self.chunk_s, self.overlap_s)
         return vocals_path, others_path
 
 
-def extract_vocal(model_name, audio_path, output_dir):
+def extract_vocal(model_name, audio_path, output_dir, chunk_s=None, overlap_s=5):
     vocals_path = os.path.join(output_dir, 'vocals.wav')
     others_path = os.path.join(output_dir, 'others.wav')
     done_path = extract_stem.done_path_ctx.get()
     if done_path and util.path_exist(done_path):
         return vocals_path, others_path
-    separator = Separator(model_file_dir=model_file_dir, output_dir=output_dir)
-    separator.load_model(model_filename=model_name)
     output_names = {
         "Vocals": "vocals",
         "Other": "others",
     }
-    separator.separate([audio_path], output_names)
+    separate(model_name, audio_path, output_dir, output_names, chunk_s, overlap_s)
     return vocals_path, others_path
 
 
 class MainVocalHandler:
-    def __init__(self, model_name=None):
+    def __init__(self, model_name=None, chunk_s=None, overlap_s=5):
         if not model_name:
             model_name = 'bs_roformer_karaoke_frazer_becruily.ckpt'
         self.model_name = model_name
+        self.chunk_s = chunk_s
+        self.overlap_s = overlap_s
 
     def get_name(self):
         return "main_vocal"
@@ -62,32 +101,33 @@ class MainVocalHandler:
 
     def extract(self, audio_path, output_dir):
         output_dir = os.path.join(output_dir, self.model_name)
-        vocals_path, instrumental_path = extract_main_vocal(self.model_name, audio_path, output_dir)
+        vocals_path, instrumental_path = extract_main_vocal(self.model_name, audio_path, output_dir,
+                                                            self.chunk_s, self.overlap_s)
         return vocals_path, instrumental_path
 
 
-def extract_main_vocal(model_name, audio_path, output_dir):
+def extract_main_vocal(model_name, audio_path, output_dir, chunk_s=None, overlap_s=5):
     vocals_path = os.path.join(output_dir, 'vocals.wav')
     instrumental_path = os.path.join(output_dir, 'instrumental.wav')
     done_path = extract_stem.done_path_ctx.get()
     if done_path and util.path_exist(done_path):
         return vocals_path, instrumental_path
-    separator = Separator(model_file_dir=model_file_dir, output_dir=output_dir)
-    separator.load_model(model_filename=model_name)
     output_names = {
         "Vocals": "vocals",
         "Instrumental": "instrumental",
     }
-    separator.separate([audio_path], output_names)
+    separate(model_name, audio_path, output_dir, output_names, chunk_s, overlap_s)
     return vocals_path, instrumental_path
 
 
 class DeReverbHandler:
-    def __init__(self, model_name=None):
+    def __init__(self, model_name=None, chunk_s=None, overlap_s=5):
         if not model_name:
             # MDX23C-De-Reverb-aufr33-jarredou.ckpt
             model_name = 'dereverb_mel_band_roformer_mono_anvuew.ckpt'
         self.model_name = model_name
+        self.chunk_s = chunk_s
+        self.overlap_s = overlap_s
 
     def get_name(self):
         return "dereverb"
@@ -100,18 +140,17 @@ class DeReverbHandler:
 
     def extract(self, audio_path, output_dir):
         output_dir = os.path.join(output_dir, self.model_name)
-        noreverb_path, reverb_path = extract_dereverb(self.model_name, audio_path, output_dir)
+        noreverb_path, reverb_path = extract_dereverb(self.model_name, audio_path, output_dir,
+                                                       self.chunk_s, self.overlap_s)
         return noreverb_path, reverb_path
 
 
-def extract_dereverb(model_name, audio_path, output_dir):
+def extract_dereverb(model_name, audio_path, output_dir, chunk_s=None, overlap_s=5):
     noreverb_path = os.path.join(output_dir, 'noreverb.wav')
     reverb_path = os.path.join(output_dir, 'reverb.wav')
     done_path = extract_stem.done_path_ctx.get()
     if done_path and util.path_exist(done_path):
         return noreverb_path, reverb_path
-    separator = Separator(model_file_dir=model_file_dir, output_dir=output_dir)
-    separator.load_model(model_filename=model_name)
     output_names = {
         "Noreverb": "noreverb",
         "Reverb": "reverb",
@@ -121,5 +160,5 @@ def extract_dereverb(model_name, audio_path, output_dir):
             "dry": "noreverb",
             "No dry": "reverb",
         }
-    separator.separate([audio_path], output_names)
+    separate(model_name, audio_path, output_dir, output_names, chunk_s, overlap_s)
     return noreverb_path, reverb_path
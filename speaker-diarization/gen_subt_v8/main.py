@@ -1,6 +1,7 @@
 import os
 import util
 import split_audio
+import split_audio_audiosr_shell
 import init
 import extract_audio
 import extract_stem
@@ -12,57 +13,169 @@ import segment_detect
 import segment_divide
 import speaker_detect
 import part_silence
+import tool_pipeline
+import time
 logger = util.get_logger()
 
 
+def get_stem_handlers(conf):
+    handlers = []
+    chunk_s = conf.get('chunk_s', None)
+    overlap_s = conf.get('overlap_s', 5)
+    vocal_models = conf.get('vocal_model', None) or []
+    for j, model in enumerate(vocal_models):
+        if not model.get('enable', False):
+            continue
+        model_name = model.get('name', None)
+        handlers.append(extract_stem_uvr.VocalHandler(model_name, chunk_s, overlap_s))
+    main_vocal_models = conf.get('main_vocal_model', None) or []
+    for j, model in enumerate(main_vocal_models):
+        if not model.get('enable', False):
+            continue
+        model_name = model.get('name', None)
+        handlers.append(extract_stem_uvr.MainVocalHandler(model_name, chunk_s, overlap_s))
+    de_reverb_models = conf.get('de_reverb_model', None) or []
+    for j, model in enumerate(de_reverb_models):
+        if not model.get('enable', False):
+            continue
+        model_name = model.get('name', None)
+        handlers.append(extract_stem_uvr.DeReverbHandler(model_name, chunk_s, overlap_s))
+    return handlers
+
+
+def exec_stage(manager, conf):
+    name = conf.get('name', None)
+    if name == 'init':
+        init.exec(manager)
+    if name == 'extract_audio':
+        extract_audio.exec(manager)
+    if name == 'extract_stem':
+        extract_stem.exec(manager, get_stem_handlers(conf))
+        if not conf.get('keep_model', True):
+            extract_stem_uvr.exec_gc()
+    if name == 'extract_simple':
+        extract_simple.exec(manager)
+    if name == 'part_detect':
+        part_detect.exec(manager)
+    if name == 'part_silence':
+        fade_ms = conf.get('fade_ms', 0)
+        part_silence.exec(manager, fade_ms)
+    if name == 'part_divide':
+        part_divide.exec(manager)
+    if name == 'segment_detect':
+        batch_size = conf.get('batch_size', None)
+        segment_detect.exec(manager, batch_size)
+    if name == 'segment_divide':
+        batch_size = conf.get('batch_size', None)
+        segment_divide.exec(manager, batch_size)
+    if name == 'speaker_detect':
+        batch_size = conf.get('batch_size', 16)
+        num_threads = conf.get('num_threads', None)
+        speaker_detect.exec(manager, batch_size, num_threads)
+    if name == 'split_audio':
+        path_key = conf.get('path_key', None)
+        workers = conf.get('workers', None)
+        split_audio.exec(manager, path_key, workers=workers)
+    if name == 'split_audio_audiosr':
+        path_key = conf.get('path_key', None)
+        batch_size = conf.get('batch_size', 1)
+        split_audio_audiosr_shell.exec(manager, path_key, batch_size=batch_size)
+
+
+def get_stem_params(conf):
+    """只有启用的模型和分块参数影响分离结果，remark、keep_model的修改不应使缓存失效"""
+    params = {'chunk_s': conf.get('chunk_s', None), 'overlap_s': conf.get('overlap_s', 5)}
+    for key in ['vocal_model', 'main_vocal_model', 'de_reverb_model']:
+        models = conf.get(key, None) or []
+        params[key] = [model.get('name', None) for model in models if model.get('enable', False)]
+    return params
+
+
+# segment_detect与segment_divide共用segment_detect_faster_whisper的模型单例（含exec_gc），共用一把锁
+stages = {
+    'init': tool_pipeline.Stage(['video_path'], ['output_dir'], cache=False),
+    'extract_audio': tool_pipeline.Stage(
+        ['video_path', 'output_dir'], ['extract_audio_path', 'audio_path', 'split_audio_path'],
+        clean_dir='extract_audio'),
+    'extract_stem': tool_pipeline.Stage(
+        ['audio_path', 'output_dir'], ['extract_stem_path_map', 'audio_path', 'split_audio_path'],
+        params=get_stem_params, clean_dir='extract_stem'),
+    'extract_simple': tool_pipeline.Stage(
+        ['audio_path', 'output_dir'], ['extract_simple_path', 'audio_path'], clean_dir='extract_simple'),
+    'part_detect': tool_pipeline.Stage(
+        ['audio_path', 'output_dir'], ['part_detect_path'], clean_dir='part_detect'),
+    'part_silence': tool_pipeline.Stage(
+        ['part_detect_path', 'audio_path', 'split_audio_path', 'output_dir'], ['audio_path', 'split_audio_path'],
+        params=['fade_ms'], clean_dir='part_silence'),
+    'part_divide': tool_pipeline.Stage(
+        ['part_detect_path', 'output_dir'], ['part_divide_path', 'segment_divide_path'], clean_dir='part_divide'),
+    'segment_detect': tool_pipeline.Stage(
+        ['audio_path', 'part_divide_path', 'output_dir'], ['segment_detect_path', 'segment_divide_path'],
+        params=['batch_size'], clean_dir='segment_detect', resource='faster_whisper'),
+    'segment_divide': tool_pipeline.Stage(
+        ['audio_path', 'part_detect_path', 'segment_detect_path', 'output_dir'], ['segment_divide_path'],
+        params=['batch_size'], clean_dir='segment_divide', resource='faster_whisper'),
+    'speaker_detect': tool_pipeline.Stage(
+        ['audio_path', 'segment_divide_path', 'output_dir'], ['speaker_detect_path'],
+        params=['batch_size'], clean_dir='speaker_detect'),
+    # split_audio每次执行会先删自己的子目录，不需要clean_dir
+    'split_audio': tool_pipeline.Stage(
+        lambda conf: ['split_audio_path', 'output_dir', conf.get('path_key', None)], [],
+        params=['path_key']),
+    'split_audio_audiosr': tool_pipeline.Stage(
+        lambda conf: ['split_audio_path', 'output_dir', conf.get('path_key', None)], [],
+        params=['path_key', 'batch_size']),
+}
+
+
+def exec_by_pipeline(video_paths, exec_conf, workers=1):
+    """
+    按阶段声明调度：未变化的阶段直接复用上次结果，多个视频并发执行，
+    结束后把每个阶段的耗时、CPU时间、峰值内存写到运行报告。
+    """
+    report = tool_pipeline.RunReport()
+    pipeline = tool_pipeline.Pipeline(stages, exec_conf, exec_stage, report)
+    try:
+        pipeline.run_all(video_paths, workers)
+    finally:
+        report_path = os.path.join('output', 'report', f"{time.strftime('%Y%m%d_%H%M%S')}.json")
+        report.save(report_path)
+        logger.info("运行报告: %s", report_path)
+
+
 def exec(video_path, exec_conf):
     manager = {"video_path": video_path}
     for i, conf in enumerate(exec_conf):
         if not conf.get('enable', False):
             continue
-        name = conf.get('name', None)
-        if name == 'init':
-            init.exec(manager)
-        if name == 'extract_audio':
-            extract_audio.exec(manager)
-        if name == 'extract_stem':
-            handlers = []
-            vocal_models = conf.get('vocal_model', None) or []
-            for j, model in enumerate(vocal_models):
-                if not model.get('enable', False):
-                    continue
-                model_name = model.get('name', None)
-                handlers.append(extract_stem_uvr.VocalHandler(model_name))
-            main_vocal_models = conf.get('main_vocal_model', None) or []
-            for j, model in enumerate(main_vocal_models):
-                if not model.get('enable', False):
-                    continue
-                model_name = model.get('name', None)
-                handlers.append(extract_stem_uvr.MainVocalHandler(model_name))
-            de_reverb_models = conf.get('de_reverb_model', None) or []
-            for j, model in enumerate(de_reverb_models):
-                if not model.get('enable', False):
-                    continue
-                model_name = model.get('name', None)
-                handlers.append(extract_stem_uvr.DeReverbHandler(model_name))
-            extract_stem.exec(manager, handlers)
-        if name == 'extract_simple':
-            extract_simple.exec(manager)
-        if name == 'part_detect':
-            part_detect.exec(manager)
-        if name == 'part_silence':
-            part_silence.exec(manager)
-        if name == 'part_divide':
-            part_divide.exec(manager)
-        if name == 'segment_detect':
-            segment_detect.exec(manager)
-        if name == 'segment_divide':
-            segment_divide.exec(manager)
-        if name == 'speaker_detect':
-            speaker_detect.exec(manager)
-        if name == 'split_audio':
-            path_key = conf.get('path_key', None)
-            split_audio.exec(manager, path_key)
+        exec_stage(manager, conf)
+
+
+def exec_by_stage(video_paths, exec_conf):
+    """
+    按阶段执行：一个阶段处理完所有视频再进入下一阶段。
+    extract_stem阶段每个模型只加载一次，依次分离所有视频。
+    """
+    managers = [{"video_path": video_path} for video_path in video_paths]
+    for i, conf in enumerate(exec_conf):
+        if not conf.get('enable', False):
+            continue
+        if conf.get('name', None) == 'extract_stem':
+            try:
+                extract_stem.exec_batch(managers, get_stem_handlers(conf))
+                extract_stem_uvr.exec_gc()
+                continue
+            except Exception as e:
+                logger.error("批量分离异常，逐个执行", exc_info=True)
+        results = []
+        for j, manager in enumerate(managers):
+            try:
+                exec_stage(manager, conf)
+                results.append(manager)
+            except Exception as e:
+                logger.error("异常", exc_info=True)
+                util.input_timeout("异常，回车继续: ", 60)
+        managers = results
 
 
 if __name__ == '__main__':
@@ -75,9 +188,14 @@ if __name__ == '__main__':
 
     video_paths = conf.get('video', None) or []
     exec_conf = conf.get('exec', None) or []
-    for i, video_path in enumerate(video_paths):
-        try:
-            exec(video_path, exec_conf)
-        except Exception as e:
-            logger.error("异常", exc_info=True)
-            util.input_timeout("异常，回车继续: ", 60)
+    if conf.get('exec_mode', None) == 'stage':
+        exec_by_stage(video_paths, exec_conf)
+    elif conf.get('exec_mode', None) == 'pipeline':
+        exec_by_pipeline(video_paths, exec_conf, conf.get('workers', 1))
+    else:
+        for i, video_path in enumerate(video_paths):
+            try:
+                exec(video_path, exec_conf)
+            except Exception as e:
+                logger.error("异常", exc_info=True)
+                util.input_timeout("异常，回车继续: ", 60)
@@ -1,44 +1,91 @@
-from pydub import AudioSegment
 import util
+import tool_wav
 import tool_ten_vad
-import tool_subt
+import tool_segment_table
 import tool_loudness
 import os
+import numpy as np
 
 logger = util.get_logger()
 
 
 def diffusion(tags, tag):
-    for i, _ in enumerate(tags):
-        if i == 0:
-            continue
-        if tags[i - 1] == tag and tags[i] == 0:
-            tags[i] = tag
-    for i in range(len(tags) - 2, -1, -1):
-        if tags[i] == 0 and tags[i + 1] == tag:
-            tags[i] = tag
+    """
+    将0标签向前、向后扩散为tag，等价于逐个元素的前向填充再后向填充：
+    前向：0之前最近的非0标签为tag时填充；后向：0之后最近的非0标签为tag时填充。
+    """
+    tags = np.array(tags)
+    size = tags.shape[0]
+    if size == 0:
+        return tags
+    index = np.arange(size)
+
+    prev_index = np.maximum.accumulate(np.where(tags != 0, index, -1))
+    prev_tags = np.where(0 <= prev_index, tags[np.maximum(prev_index, 0)], 0)
+    tags[(tags == 0) & (prev_tags == tag)] = tag
+
+    next_index = np.minimum.accumulate(np.where(tags != 0, index, size)[::-1])[::-1]
+    next_tags = np.where(next_index < size, tags[np.minimum(next_index, size - 1)], 0)
+    tags[(tags == 0) & (next_tags == tag)] = tag
     return tags
 
 
+def merge_runs(starts, ends, tags):
+    """游程编码：合并首尾相接且标签相同的区间"""
+    if tags.shape[0] == 0:
+        return starts, ends, tags
+    heads = np.flatnonzero(np.concatenate([[True], tags[1:] != tags[:-1]]))
+    run_ends = np.append(starts[heads[1:]], ends[-1])
+    return starts[heads], run_ends, tags[heads]
+
+
+def tag_runs(volumes, vads, last_end,
+             vad_speech_threshold=0.8,
+             vad_silence_threshold=0.2,
+             volume_silence_threshold=-70,
+             ):
+    """
+    volumes、vads在同一帧内取值不变，按两者帧边界的并集切分区间，
+    在区间上做阈值判定与扩散，计算量与帧数/跳变数相关，与毫秒数无关。
+    """
+    bounds = np.concatenate([[0, last_end], volumes.frame_bounds(), vads.frame_bounds()])
+    bounds = np.unique(np.clip(bounds, 0, last_end))
+    starts = bounds[:-1]
+    ends = bounds[1:]
+    vad_values = vads.values_at(starts)
+    volume_values = volumes.values_at(starts)
+
+    tags = np.zeros(starts.shape[0], dtype=np.int8)
+    tags[vad_speech_threshold <= vad_values] = 1
+    tags[vad_values <= vad_silence_threshold] = -1
+    tags[(tags == 0) & (volume_values <= volume_silence_threshold)] = -1
+    starts, ends, tags = merge_runs(starts, ends, tags)
+
+    tags = diffusion(tags, 1)
+    tags = diffusion(tags, -1)
+    starts, ends, tags = merge_runs(starts, ends, tags)
+    return starts, ends, tags
+
+
 def part_detect(audio_path, output_dir,
                 vad_speech_threshold=0.8,
                 vad_silence_threshold=0.2,
                 volume_silence_threshold=-70,
                 ):
-    volume_path = os.path.join(output_dir, 'volume.json')
-    vad_path = os.path.join(output_dir, 'vad.json')
+    volume_path = os.path.join(output_dir, 'volume.npy')
+    vad_path = os.path.join(output_dir, 'vad.npy')
     tag_path = os.path.join(output_dir, 'tag.json')
 
-    audio = AudioSegment.from_wav(audio_path)
+    audio = tool_wav.read_audio(audio_path)
     last_end = len(audio)
 
     volumes = tool_loudness.get_loudness(audio)
-    util.save_as_json(volumes, volume_path)
+    volumes.save(volume_path)
     if len(volumes) == 0:
         logger.error(f"响度为空")
         raise ValueError(f"响度为空")
     ten_vads = tool_ten_vad.vad_confidence(audio)
-    util.save_as_json(ten_vads, vad_path)
+    ten_vads.save(vad_path)
     if len(ten_vads) == 0:
         logger.error(f"人声置信度为空")
         raise ValueError(f"人声置信度为空")
@@ -47,45 +94,31 @@ def part_detect(audio_path, output_dir,
         logger.error(f"人声置信度与响度长度不一致, ten_vads:{len(ten_vads)}")
         raise ValueError(f"人声置信度与响度长度不一致")
 
-    tags = [0] * last_end
-    for i, vad in enumerate(ten_vads):
-        if tags[i] == 0 and vad <= vad_silence_threshold:
-            tags[i] = -1
-        elif tags[i] == 0 and vad_speech_threshold <= vad:
-            tags[i] = 1
-    for i, volume in enumerate(volumes):
-        if tags[i] == 0 and volumes[i] <= volume_silence_threshold:
-            tags[i] = -1
+    starts, ends, tags = tag_runs(volumes, ten_vads, last_end,
+                                  vad_speech_threshold=vad_speech_threshold,
+                                  vad_silence_threshold=vad_silence_threshold,
+                                  volume_silence_threshold=volume_silence_threshold,
+                                  )
+    runs = []
+    for start, end, tag in zip(starts.tolist(), ends.tolist(), tags.tolist()):
+        runs.append({'start': start, 'end': end, 'tag': tag})
+    util.save_as_json(runs, tag_path)
 
-    tags = diffusion(tags, 1)
-    tags = diffusion(tags, -1)
-    util.save_as_json(tags, tag_path)
-
-    segments = []
-    for i, tag in enumerate(tags):
-        if tag == 1:
-            vad_type = 'speech'
-        elif tag == -1:
-            vad_type = 'silence'
-        else:
-            logger.error(f"非法人声标签: {tag}")
-            raise ValueError(f"非法人声标签: {tag}")
-        if i > 0 and tags[i - 1] != tags[i]:
-            pre_end = segments[-1]['end']
-            segments.append({'start': pre_end, 'end': 0, 'vad_type': vad_type})
-        if len(segments) == 0:
-            segments.append({'start': 0, 'end': 0, 'vad_type': vad_type})
-        segments[-1]['end'] = i + 1
-
-    if last_end < segments[-1]['end']:
-        segments[-1]['end'] = last_end
-    if segments[-1]['end'] < last_end:
-        pre_end = segments[-1]['end']
-        segments.append({'start': pre_end, 'end': last_end, 'vad_type': 'silence'})
-
-    segments = tool_subt.fix_overlap_segments(segments)
-    segments = tool_subt.unit_segments(segments, 'vad_type')
-    segments = tool_subt.init_segments(segments)
-    tool_subt.check_coherent_segments(segments)
-
-    return segments
+    invalid = np.flatnonzero((tags != 1) & (tags != -1))
+    if len(invalid) > 0:
+        logger.error(f"非法人声标签: {tags[invalid[0]]}")
+        raise ValueError(f"非法人声标签: {tags[invalid[0]]}")
+    vad_type = tool_segment_table.CategoryColumn(np.where(tags == 1, 0, 1).astype(np.int16), ['speech', 'silence'])
+    table = tool_segment_table.SegmentTable(starts, ends, vad_type=vad_type)
+
+    if last_end < table.end[-1]:
+        table.end[-1] = last_end
+    if table.end[-1] < last_end:
+        table = table.append(int(table.end[-1]), last_end, vad_type='silence')
+
+    table = table.fix_overlap()
+    table = table.unit('vad_type')
+    table = table.init()
+    table.check_coherent()
+
+    return table
@@ -1,114 +1,115 @@
 import util
-import tool_subt
+import tool_segment_table
 import os
 import sys
+import bisect
+import numpy as np
 
 logger = util.get_logger()
 
 
-def split_segments(segments, index):
-    left = []
-    middle = []
-    right = []
-    for i, segment in enumerate(segments):
-        if i < index:
-            left.append(segment)
-        elif i == index:
-            middle.append(segment)
-        else:
-            right.append(segment)
-    return left, middle, right
+class RangeMin:
+    """稀疏表，O(n log n)预处理，O(1)查询闭区间[lo, hi]的最小值"""
 
+    def __init__(self, values):
+        self.tables = [values]
+        size = 1
+        while size * 2 <= values.shape[0]:
+            table = self.tables[-1]
+            self.tables.append(np.minimum(table[:-size], table[size:]))
+            size *= 2
 
-def sum_segments_duration(segments):
-    duration = 0
-    for i, segment in enumerate(segments):
-        duration += segments[i]['duration']
-    return duration
+    def query(self, lo, hi):
+        if hi < lo:
+            return None
+        level = (hi - lo + 1).bit_length() - 1
+        table = self.tables[level]
+        return int(min(table[lo], table[hi - (1 << level) + 1]))
+
+
+class LongestIndex:
+    """区间内mask为真、时长最长的段的下标，时长相同取靠前的，与按时长稳定降序排序后取第一个一致"""
+
+    def __init__(self, durations, mask):
+        positions = np.flatnonzero(mask)
+        self.order = positions[np.argsort(-durations[positions], kind='stable')]
+        self.sentinel = self.order.shape[0]
+        rank = np.full(durations.shape[0], self.sentinel, dtype=np.int64)
+        rank[self.order] = np.arange(self.sentinel, dtype=np.int64)
+        self.range_min = RangeMin(rank)
+
+    def query(self, lo, hi):
+        rank = self.range_min.query(lo, hi)
+        if rank is None or rank == self.sentinel:
+            return None
+        return int(self.order[rank])
 
 
 def group_segments(segments, min_speech_ms=1000 * 3, min_silence_ms=200):
-    segments = util.deepcopy_obj(segments)
-    segments = tool_subt.init_segments(segments)
+    """
+    按静音把片段切成组，规则：
+    1. 两侧总时长都不小于min_speech_ms的中间静音里，取最长的切开；
+    2. 否则取最长的中间静音，不短于min_silence_ms就切开；
+    3. 否则取最长的人声，不短于min_speech_ms就单独成组；
+    4. 都不满足时，首尾静音各自成组，其余成一组。
+    切开后左右两侧继续按同样规则处理。
+    两侧总时长用前缀和求，满足规则1的切点是连续区间，区间内最长的静音用稀疏表查询，整体O(n log n)。
+    组内是原片段对象，不做拷贝。
+    """
+    n = len(segments)
+    if n == 0:
+        return []
+    durations = np.array([segment['end'] - segment['start'] for segment in segments])
+    vad_types = np.array([segment['vad_type'] for segment in segments])
+    prefix = [0]
+    prefix.extend(np.cumsum(durations).tolist())
+    silence_index = LongestIndex(durations, vad_types == 'silence')
+    speech_index = LongestIndex(durations, vad_types == 'speech')
+
+    def find_split(lo, hi):
+        if 3 <= hi - lo:
+            # 左侧时长prefix[k]-prefix[lo]、右侧时长prefix[hi]-prefix[k+1]都随k单调，可用二分求出切点范围
+            first = max(bisect.bisect_left(prefix, prefix[lo] + min_speech_ms), lo + 1)
+            last = min(bisect.bisect_right(prefix, prefix[hi] - min_speech_ms) - 2, hi - 2)
+            index = silence_index.query(first, last)
+            if index is not None:
+                return index
+            index = silence_index.query(lo + 1, hi - 2)
+            if index is not None and min_silence_ms <= durations[index]:
+                return index
+        index = speech_index.query(lo, hi - 1)
+        if index is not None and min_speech_ms <= durations[index]:
+            return index
+        return None
 
-    silences = []
-    for i, segment in enumerate(segments):
-        if i == 0 or i == len(segments) - 1:
+    groups = []
+    # 用栈代替递归：先压右侧、再压切点、最后压左侧，出栈顺序即从左到右
+    stack = [(0, n)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            groups.append(item)
             continue
-        if segments[i]['vad_type'] != 'silence':
+        lo, hi = item
+        if hi <= lo:
             continue
-        silences.append(segments[i])
-    silences = sorted(silences, key=lambda x: x['duration'], reverse=True)
-
-    for i, silence in enumerate(silences):
-        index = silence['index']
-        left, middle, right = split_segments(segments, index)
-        left_duration = sum_segments_duration(left)
-        right_duration = sum_segments_duration(right)
-        if min_speech_ms <= left_duration and min_speech_ms <= right_duration:
-            left_groups = group_segments(left, min_speech_ms)
-            right_groups = group_segments(right, min_speech_ms)
-            groups = []
-            if left_groups:
-                groups.extend(left_groups)
-            if middle:
-                groups.append(middle)
-            if right_groups:
-                groups.extend(right_groups)
-            return groups
-
-    for i, silence in enumerate(silences):
-        index = silence['index']
-        if min_silence_ms <= silence['duration']:
-            left, middle, right = split_segments(segments, index)
-            left_groups = group_segments(left, min_speech_ms)
-            right_groups = group_segments(right, min_speech_ms)
-            groups = []
-            if left_groups:
-                groups.extend(left_groups)
-            if middle:
-                groups.append(middle)
-            if right_groups:
-                groups.extend(right_groups)
-            return groups
-
-    speechs = []
-    for i, segment in enumerate(segments):
-        if segments[i]['vad_type'] != 'speech':
+        index = find_split(lo, hi)
+        if index is not None:
+            stack.append((index + 1, hi))
+            stack.append([segments[index]])
+            stack.append((lo, index))
             continue
-        speechs.append(segments[i])
-    speechs = sorted(speechs, key=lambda x: x['duration'], reverse=True)
-
-    for i, speech in enumerate(speechs):
-        index = speech['index']
-        if min_speech_ms <= speech['duration']:
-            left, middle, right = split_segments(segments, index)
-            left_groups = group_segments(left, min_speech_ms)
-            right_groups = group_segments(right, min_speech_ms)
-            groups = []
-            if left_groups:
-                groups.extend(left_groups)
-            if middle:
-                groups.append(middle)
-            if right_groups:
-                groups.extend(right_groups)
-            return groups
-
-    groups = []
-    left_silence = []
-    if segments and segments[0]['vad_type'] == 'silence':
-        left_silence.append(segments[0])
-        segments.pop(0)
-    right_silence = []
-    if segments and segments[-1]['vad_type'] == 'silence':
-        right_silence.append(segments[-1])
-        segments.pop(-1)
-    if left_silence:
-        groups.append(left_silence)
-    if segments:
-        groups.append(segments)
-    if right_silence:
-        groups.append(right_silence)
+        right_silence = []
+        if segments[lo]['vad_type'] == 'silence':
+            groups.append([segments[lo]])
+            lo += 1
+        if lo < hi and segments[hi - 1]['vad_type'] == 'silence':
+            right_silence.append(segments[hi - 1])
+            hi -= 1
+        if lo < hi:
+            groups.append(segments[lo:hi])
+        if right_silence:
+            groups.append(right_silence)
     return groups
 
 
@@ -118,16 +119,16 @@ def part_divide(part_detect_path, output_dir, min_duration=50):
     if util.path_exist(json_path):
         return json_path
 
-    segments = util.read_file_to_obj(part_detect_path)
+    table = tool_segment_table.read_table(part_detect_path)
 
-    for i, segment in enumerate(segments):
-        if segments[i]['vad_type'] == 'silence' and segments[i]['duration'] < min_duration:
-            segments[i]['vad_type'] = 'speech'
-    segments = tool_subt.unit_segments(segments, 'vad_type')
-    segments = tool_subt.init_segments(segments)
-    util.save_as_json(segments, os.path.join(output_dir, 'unit_mini.json'))
-    tool_subt.save_segments_as_srt(segments, os.path.join(output_dir, 'unit_mini.srt'), skip_silence=True)
+    mini = (table.vad_type.codes == table.vad_type.get_code('silence')) & (table.duration < min_duration)
+    table.vad_type.codes[mini] = table.vad_type.get_code('speech', create=True)
+    table = table.unit('vad_type')
+    table = table.init()
+    table.save_as_json(os.path.join(output_dir, 'unit_mini.json'))
+    table.save_as_srt(os.path.join(output_dir, 'unit_mini.srt'), skip_silence=True)
 
+    segments = table.to_segments()
     groups = group_segments(segments)
     util.save_as_json(groups, os.path.join(output_dir, 'groups.json'))
     results = []
@@ -140,22 +141,22 @@ def part_divide(part_detect_path, output_dir, min_duration=50):
                 result['vad_type'] = 'speech'
         results.append(result)
 
-    results = tool_subt.fix_overlap_segments(results)
-    results = tool_subt.unit_segments(results, 'vad_type')
-    results = tool_subt.init_segments(results)
-    tool_subt.check_coherent_segments(results)
+    table = tool_segment_table.SegmentTable.from_segments(results)
+    table = table.fix_overlap()
+    table = table.unit('vad_type')
+    table = table.init()
+    table.check_coherent()
 
-    util.save_as_json(results, json_path)
-    tool_subt.save_segments_as_srt(results, srt_path)
+    tool_segment_table.save_table(table, json_path, srt_path)
     return json_path
 
 
 def exec(manager):
-    logger.info("part_divide,enter: %s", util.json_dumps(manager))
+    logger.info("part_divide,enter: %s", util.log_json(manager))
     part_detect_path = manager.get('part_detect_path')
     output_dir = os.path.join(manager.get('output_dir'), "part_divide")
     part_divide_path = part_divide(part_detect_path, output_dir)
     manager['part_divide_path'] = part_divide_path
     manager['segment_divide_path'] = part_divide_path
-    logger.info("part_divide,leave: %s", util.json_dumps(manager))
+    logger.info("part_divide,leave: %s", util.log_json(manager))
     util.exec_gc()
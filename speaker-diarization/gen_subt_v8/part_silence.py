@@ -1,38 +1,81 @@
 import util
+import tool_wav
 import os
+import numpy as np
+import tool_loudness
+import tool_segment_table
 from pydub import AudioSegment
 
 logger = util.get_logger()
 
 
-def part_silence(audio_path, part_detect_path, output_path):
+def get_mute_ranges(segments):
+    """非speech段即需要静音的区间(毫秒)，相邻区间合并"""
+    ranges = []
+    for i, segment in enumerate(segments):
+        if segment['vad_type'] == 'speech':
+            continue
+        if ranges and ranges[-1][1] == segment['start']:
+            ranges[-1][1] = segment['end']
+            continue
+        ranges.append([segment['start'], segment['end']])
+    return ranges
+
+
+def get_gain_window(size, gain, fade_size):
+    """区间内的增益：两端从1线性过渡到gain，中间保持gain"""
+    window = np.full(size, gain, dtype=np.float32)
+    fade_size = min(fade_size, size // 2)
+    if fade_size > 0:
+        ramp = np.linspace(1.0, gain, fade_size, dtype=np.float32)
+        window[:fade_size] = ramp
+        window[-fade_size:] = ramp[::-1]
+    return window
+
+
+def part_silence(audio_path, ranges, output_path, gain_db=-120, fade_ms=0):
     if util.path_exist(output_path):
         return output_path
-    audio = AudioSegment.from_wav(audio_path)
-    segments = util.read_file_to_obj(part_detect_path)
-    for i, segment in enumerate(segments):
-        if segment['vad_type'] != 'speech':
-            start = segment['start']
-            end = segment['end']
-            audio = (
-                    audio[:start] +
-                    audio[start:end].apply_gain(-120) +
-                    audio[end:]
-            )
+    audio = tool_wav.read_audio(audio_path)
+    samples = tool_loudness.pydub_numpy(audio).copy().reshape((-1, audio.channels))
+    sample_cnt = samples.shape[0]
+    gain = 10.0 ** (gain_db / 20.0)
+    fade_size = int(fade_ms * audio.frame_rate / 1000)
+    # 只改写静音区间的采样，整段音频不做拼接复制
+    for start, end in ranges:
+        sample_start = min(int(start * audio.frame_rate / 1000), sample_cnt)
+        sample_end = min(int(end * audio.frame_rate / 1000), sample_cnt)
+        if sample_end <= sample_start:
+            continue
+        window = get_gain_window(sample_end - sample_start, gain, fade_size)
+        part = samples[sample_start:sample_end]
+        part[:] = part * window[:, np.newaxis]
+    audio = AudioSegment(
+        data=samples.tobytes(),
+        sample_width=audio.sample_width,
+        frame_rate=audio.frame_rate,
+        channels=audio.channels
+    )
     util.mkdir(output_path)
     audio.export(output_path, format="wav")
     return output_path
 
 
-def exec(manager):
-    logger.info("part_silence,enter: %s", util.json_dumps(manager))
+def exec(manager, fade_ms=0):
+    logger.info("part_silence,enter: %s", util.log_json(manager))
     part_detect_path = manager.get('part_detect_path')
     audio_path = manager.get('audio_path')
     split_audio_path = manager.get('split_audio_path')
     output_dir = os.path.join(manager.get('output_dir'), "part_silence")
-    audio_path = part_silence(audio_path, part_detect_path, os.path.join(output_dir, "audio.wav"))
-    split_audio_path = part_silence(split_audio_path, part_detect_path, os.path.join(output_dir, "split_audio.wav"))
-    manager['audio_path'] = audio_path
-    manager['split_audio_path'] = split_audio_path
-    logger.info("part_silence,leave: %s", util.json_dumps(manager))
+    segments = tool_segment_table.read_segments(part_detect_path)
+    ranges = get_mute_ranges(segments)
+    silence_audio_path = part_silence(audio_path, ranges, os.path.join(output_dir, "audio.wav"), fade_ms=fade_ms)
+    if split_audio_path == audio_path:
+        silence_split_audio_path = silence_audio_path
+    else:
+        silence_split_audio_path = part_silence(split_audio_path, ranges,
+                                                os.path.join(output_dir, "split_audio.wav"), fade_ms=fade_ms)
+    manager['audio_path'] = silence_audio_path
+    manager['split_audio_path'] = silence_split_audio_path
+    logger.info("part_silence,leave: %s", util.log_json(manager))
     util.exec_gc()
@@ -1,36 +1,77 @@
 import util
+import tool_wav
 import os
+import time
 import segment_detect_faster_whisper
-from pydub import AudioSegment
 import tool_subt
 import segment_detect_align_whisperx
 
 logger = util.get_logger()
 
 
-def segment_detect(audio_path, part_divide_path, output_dir):
-    json_path = os.path.join(output_dir, 'segment_detect.json')
-    srt_path = os.path.join(output_dir, 'segment_detect.srt')
-    if util.path_exist(json_path):
-        return json_path
-
-    logger.info("字幕生成: %s", audio_path)
-
-    audio = AudioSegment.from_wav(audio_path)
-    last_end = len(audio)
+def transcribe_parts(audio, segments):
+    results = []
+    languages = []
+    for i, segment in enumerate(segments):
+        if segment['vad_type'] != 'speech':
+            continue
+        cut = audio[segment['start']:segment['end']]
+        segs, language = segment_detect_faster_whisper.transcribe(cut)
+        segs = tool_subt.shift_segments_time(segs, segment['start'])
+        results.extend(segs)
+        languages.append(language)
+    return results, languages
 
-    segments = util.read_file_to_obj(part_divide_path)
 
+def transcribe_parts_batched(audio, segments, batch_size):
+    """
+    不超过30秒的speech段打包成一次批量转写（时间已是绝对时间）；
+    更长的段单独批量转写（内部按VAD切块），再平移回绝对时间。
+    """
     results = []
     languages = []
+    clips = []
     for i, segment in enumerate(segments):
         if segment['vad_type'] != 'speech':
             continue
+        if segment['end'] - segment['start'] <= segment_detect_faster_whisper.max_clip_ms:
+            clips.append({'start': segment['start'], 'end': segment['end']})
+            continue
         cut = audio[segment['start']:segment['end']]
-        segs, language = segment_detect_faster_whisper.transcribe(cut)
+        segs, language = segment_detect_faster_whisper.transcribe_batched(cut, batch_size=batch_size)
         segs = tool_subt.shift_segments_time(segs, segment['start'])
         results.extend(segs)
         languages.append(language)
+    if clips:
+        segs, language = segment_detect_faster_whisper.transcribe_clips(audio, clips, batch_size=batch_size)
+        results.extend(segs)
+        languages.append(language)
+    results = sorted(results, key=lambda x: x['start'])
+    return results, languages
+
+
+def segment_detect(audio_path, part_divide_path, output_dir, batch_size=None):
+    json_path = os.path.join(output_dir, 'segment_detect.json')
+    srt_path = os.path.join(output_dir, 'segment_detect.srt')
+    if util.path_exist(json_path):
+        return json_path
+
+    logger.info("字幕生成: %s", audio_path)
+
+    audio = tool_wav.read_audio(audio_path)
+    last_end = len(audio)
+
+    segments = util.read_file_to_obj(part_divide_path)
+
+    start_time = time.time()
+    if batch_size:
+        results, languages = transcribe_parts_batched(audio, segments, batch_size)
+    else:
+        results, languages = transcribe_parts(audio, segments)
+    elapsed = time.time() - start_time
+    speech_ms = sum(segment['end'] - segment['start'] for segment in segments if segment['vad_type'] == 'speech')
+    rtf = elapsed / max(speech_ms / 1000.0, 1e-6)
+    logger.info("字幕生成，耗时: %.2fs, 语音时长: %.2fs, 实时率: %.4f", elapsed, speech_ms / 1000.0, rtf)
     language = util.get_list_most(languages)
 
     results, language = segment_detect_align_whisperx.transcribe(audio, results, language)
@@ -47,14 +88,14 @@ def segment_detect(audio_path, part_divide_path, output_dir):
     return json_path
 
 
-def exec(manager):
-    logger.info("segment_detect,enter: %s", util.json_dumps(manager))
+def exec(manager, batch_size=None):
+    logger.info("segment_detect,enter: %s", util.log_json(manager))
     audio_path = manager.get('audio_path')
     part_divide_path = manager.get('part_divide_path')
     output_dir = os.path.join(manager.get('output_dir'), "segment_detect")
-    json_path = segment_detect(audio_path, part_divide_path, output_dir)
+    json_path = segment_detect(audio_path, part_divide_path, output_dir, batch_size)
     manager['segment_detect_path'] = json_path
     manager['segment_divide_path'] = json_path
-    logger.info("segment_detect,leave: %s", util.json_dumps(manager))
+    logger.info("segment_detect,leave: %s", util.log_json(manager))
     segment_detect_faster_whisper.exec_gc()
     segment_detect_align_whisperx.exec_gc()
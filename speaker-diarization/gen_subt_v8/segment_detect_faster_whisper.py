@@ -1,23 +1,37 @@
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, BatchedInferencePipeline
 import util
 import tool_faster_whisper
 
 logger = util.get_logger()
 
+model_name = "large-v3"
+# 批量转写时不超过这个时长的片段可以打包到一次调用里（whisper单窗口30秒）
+max_clip_ms = 30 * 1000
 model = None
+batched_model = None
 
 
 def get_model() -> WhisperModel:
     global model
     if model:
         return model
-    model = WhisperModel("large-v3", device=util.get_device_type(), compute_type=util.get_compute_type())
+    model = WhisperModel(model_name, device=util.get_device_type(), compute_type=util.get_compute_type())
     return model
 
 
+def get_batched_model() -> BatchedInferencePipeline:
+    global batched_model
+    if batched_model:
+        return batched_model
+    batched_model = BatchedInferencePipeline(model=get_model())
+    return batched_model
+
+
 def exec_gc():
     global model
+    global batched_model
     model = None
+    batched_model = None
     util.exec_gc()
 
 
@@ -25,3 +39,17 @@ def transcribe(audio, language=None):
     model = get_model()
     segments, language = tool_faster_whisper.transcribe(model, audio, language=language)
     return segments, language
+
+
+def transcribe_clips(audio, clips, language=None, batch_size=16):
+    batched_model = get_batched_model()
+    segments, language = tool_faster_whisper.transcribe_clips(batched_model, audio, clips,
+                                                              language=language, batch_size=batch_size)
+    return segments, language
+
+
+def transcribe_batched(audio, language=None, batch_size=16):
+    batched_model = get_batched_model()
+    segments, language = tool_faster_whisper.transcribe_batched(batched_model, audio,
+                                                                language=language, batch_size=batch_size)
+    return segments, language
@@ -1,32 +1,30 @@
 import os
 import tool_subt
 import math
+import time
 import util
-from pydub import AudioSegment
+import tool_wav
 import segment_detect_faster_whisper
 import segment_detect_align_whisperx
+import tool_interval
+import tool_segment_table
+import tool_transcribe_cache
+import bisect
+import numpy as np
 
 logger = util.get_logger()
 
 back_ms = 500
 
 
-def box_segments(segments, start, end):
-    segments = util.deepcopy_obj(segments)
-    result = []
-    for i, segment in enumerate(segments):
-        if start < segment['end'] and segment['start'] < end:
-            result.append(segment)
-    tool_subt.check_discrete_segments(result)
-    if len(result) > 0 and result[0]['start'] < start:
-        result[0]['start'] = start
-    if len(result) > 0 and end < result[-1]['end']:
-        result[-1]['end'] = end
+def box_segments(silence_index, start, end):
+    result = silence_index.box(start, end)
     tool_subt.check_discrete_segments(result)
     return result
 
 
 def scrap_segments(segments, time):
+    """segments是box_segments截出的一小段，直接遍历"""
     left = None
     middle = None
     right = None
@@ -40,14 +38,14 @@ def scrap_segments(segments, time):
     return left, middle, right
 
 
-def cut_segment(left_segment, right_segment, silences):
+def cut_segment(left_segment, right_segment, silence_index):
     left_side = (left_segment['end'] + left_segment['start']) / 2.0
     left_side = math.ceil(left_side)
     left_side = max(left_segment['end'] - back_ms, left_side)
     right_side = (right_segment['end'] + right_segment['start']) / 2.0
     right_side = math.floor(right_side)
     right_side = min(right_segment['start'] + back_ms, right_side)
-    gaps = box_segments(silences, left_side, right_side)
+    gaps = box_segments(silence_index, left_side, right_side)
     left_gap, middle_gap, right_gap = scrap_segments(gaps, right_segment['start'])
     left_cut = -1
     if left_gap:
@@ -64,14 +62,9 @@ def cut_segment(left_segment, right_segment, silences):
     return left_cut, middle_cut, right_cut
 
 
-def trim_silence(segment, silences):
-    start_silence = None
-    end_silence = None
-    for i, silence in enumerate(silences):
-        if silence['start'] <= segment['start'] and segment['start'] < silence['end']:
-            start_silence = silence
-        if silence['start'] < segment['end'] and segment['end'] <= silence['end']:
-            end_silence = silence
+def trim_silence(segment, silence_index):
+    start_silence = silence_index.find_start_in(segment['start'])
+    end_silence = silence_index.find_end_in(segment['end'])
     if start_silence:
         segment['start'] = start_silence['end']
     if end_silence:
@@ -81,22 +74,116 @@ def trim_silence(segment, silences):
     return segment
 
 
-def segment_divide(audio_path, part_detect_path, segment_detect_path, output_dir):
+def transcribe_window(audio, window, language):
+    cut = audio[window['start']:window['end']]
+    segs, _ = segment_detect_faster_whisper.transcribe(cut, language)
+    segs, _ = segment_detect_align_whisperx.transcribe(cut, segs, language)
+    segs = tool_subt.shift_segments_time(segs, window['start'])
+    return segs
+
+
+def assign_windows(segments, windows):
+    """按中点把绝对时间的segments分到各自的窗口（窗口有序且不重叠），并裁剪到窗口范围内"""
+    starts = [window['start'] for window in windows]
+    results = [[] for window in windows]
+    for i, segment in enumerate(segments):
+        middle = (segment['start'] + segment['end']) / 2.0
+        j = bisect.bisect_right(starts, middle) - 1
+        if j < 0 or windows[j]['end'] <= middle:
+            continue
+        segment['start'] = max(segment['start'], windows[j]['start'])
+        segment['end'] = min(segment['end'], windows[j]['end'])
+        if segment['end'] <= segment['start']:
+            continue
+        results[j].append(segment)
+    return results
+
+
+def transcribe_windows_batched(audio, windows, language, batch_size):
+    """不超过30秒的窗口打包成一次faster-whisper调用和一次对齐调用，更长的窗口逐个转写"""
+    results = [None] * len(windows)
+    clip_windows = []
+    clip_indexes = []
+    for j, window in enumerate(windows):
+        if window['end'] - window['start'] <= segment_detect_faster_whisper.max_clip_ms:
+            clip_windows.append(window)
+            clip_indexes.append(j)
+            continue
+        results[j] = transcribe_window(audio, window, language)
+    if not clip_windows:
+        return results
+    segs, _ = segment_detect_faster_whisper.transcribe_clips(audio, clip_windows, language, batch_size)
+    segs = [seg for group in assign_windows(segs, clip_windows) for seg in group]
+    if segs:
+        segs, _ = segment_detect_align_whisperx.transcribe(audio, segs, language)
+    for j, group in zip(clip_indexes, assign_windows(segs, clip_windows)):
+        results[j] = group
+    return results
+
+
+def transcribe_windows(audio, windows, language, batch_size, cache, audio_hash):
+    model_name = f"{segment_detect_faster_whisper.model_name}+whisperx_align"
+    if batch_size:
+        model_name = f"{model_name}:batched"
+    keys = [cache.get_key(audio_hash, window['start'], window['end'], language, model_name) for window in windows]
+    results = [cache.get(key) for key in keys]
+    miss_indexes = [j for j, result in enumerate(results) if result is None]
+    if not miss_indexes:
+        return results
+    miss_windows = [windows[j] for j in miss_indexes]
+    if batch_size:
+        miss_results = transcribe_windows_batched(audio, miss_windows, language, batch_size)
+    else:
+        miss_results = [transcribe_window(audio, window, language) for window in miss_windows]
+    for j, segs in zip(miss_indexes, miss_results):
+        cache.put(keys[j], segs)
+        results[j] = segs
+    return results
+
+
+def resplit_segments(audio, segments, language, batch_size, cache, audio_hash):
+    """
+    没找到静音切点的相邻两段，合并成窗口重新转写。
+    后一对的窗口起点取决于前一对的转写结果，所以分轮处理：每轮取前一对已完成的窗口一起转写。
+    """
+    pending = set(i for i in range(1, len(segments)) if not segments[i].get('segment_divide_type', None))
+    heads = {}
+    while pending:
+        indexes = sorted(i for i in pending if i - 1 not in pending)
+        windows = [{'start': segments[i - 1]['start'], 'end': segments[i]['end']} for i in indexes]
+        segs_list = transcribe_windows(audio, windows, language, batch_size, cache, audio_hash)
+        for i, segs in zip(indexes, segs_list):
+            if not segs:
+                segs = [segments[i]]
+            heads[i] = segs[:-1]
+            segments[i] = segs[-1]
+            pending.discard(i)
+
+    results = []
+    for i, segment in enumerate(segments):
+        if i == 0:
+            continue
+        if i in heads:
+            results.extend(heads[i])
+        else:
+            results.append(segments[i - 1])
+    if segments:
+        results.append(segments[-1])
+    return results
+
+
+def segment_divide(audio_path, part_detect_path, segment_detect_path, output_dir, batch_size=None):
     json_path = os.path.join(output_dir, 'segment_divide.json')
     srt_path = os.path.join(output_dir, 'segment_divide.srt')
     if util.path_exist(json_path):
         return json_path
 
-    audio = AudioSegment.from_wav(audio_path)
+    audio = tool_wav.read_audio(audio_path)
     last_end = len(audio)
 
-    parts = util.read_file_to_obj(part_detect_path)
-
-    silences = []
-    for i, part in enumerate(parts):
-        if part['vad_type'] != 'silence':
-            continue
-        silences.append(part)
+    parts = tool_segment_table.read_table(part_detect_path)
+    silences = parts.take(np.flatnonzero(parts.vad_type.codes == parts.vad_type.get_code('silence'))).to_segments()
+    silence_index = tool_interval.IntervalIndex(silences)
 
     segments = util.read_file_to_obj(segment_detect_path)
 
@@ -122,7 +209,7 @@ def segment_divide(audio_path, part_detect_path, segment_detect_path, output_dir
     for i, segment in enumerate(segments):
         if i == 0:
             continue
-        left_cut, middle_cut, right_cut = cut_segment(segments[i - 1], segments[i], silences)
+        left_cut, middle_cut, right_cut = cut_segment(segments[i - 1], segments[i], silence_index)
         if middle_cut >= 0:
             segments[i - 1]['end'] = middle_cut
             segments[i]['start'] = middle_cut
@@ -137,22 +224,12 @@ def segment_divide(audio_path, part_detect_path, segment_detect_path, output_dir
             segments[i]['segment_divide_type'] = 'right_only'
     tool_subt.check_coherent_segments(segments)
 
-    results = []
-    for i, segment in enumerate(segments):
-        if i == 0:
-            continue
-        if segments[i].get('segment_divide_type', None):
-            results.append(segments[i - 1])
-        else:
-            cut = audio[segments[i - 1]['start']:segments[i]['end']]
-            segs, _ = segment_detect_faster_whisper.transcribe(cut, language)
-            segs, _ = segment_detect_align_whisperx.transcribe(cut, segs, language)
-            segs = tool_subt.shift_segments_time(segs, segments[i - 1]['start'])
-            if not segs:
-                segs = [segments[i]]
-            results.extend(segs[:-1])
-            segments[i] = segs[-1]
-    results.append(segments[-1])
+    cache = tool_transcribe_cache.TranscribeCache()
+    audio_hash = util.get_file_hash(audio_path)
+    start_time = time.time()
+    results = resplit_segments(audio, segments, language, batch_size, cache, audio_hash)
+    logger.info("segment_divide,重新转写耗时: %.2fs, 缓存: %s", time.time() - start_time,
+                util.json_dumps(cache.get_stats()))
     segments = results
     for i, segment in enumerate(segments):
         if i == 0:
@@ -171,7 +248,7 @@ def segment_divide(audio_path, part_detect_path, segment_detect_path, output_dir
             continue
         if segments[i].get('segment_divide_type', None):
             continue
-        left_cut, middle_cut, right_cut = cut_segment(segments[i - 1], segments[i], silences)
+        left_cut, middle_cut, right_cut = cut_segment(segments[i - 1], segments[i], silence_index)
         if middle_cut >= 0:
             segments[i - 1]['end'] = middle_cut
             segments[i]['start'] = middle_cut
@@ -203,7 +280,7 @@ def segment_divide(audio_path, part_detect_path, segment_detect_path, output_dir
     for i, segment in enumerate(segments):
         if segment.get('vad_type', None) == 'silene':
             continue
-        segment = trim_silence(segment, silences)
+        segment = trim_silence(segment, silence_index)
         if not segment:
             continue
         results.append(segment)
@@ -244,14 +321,14 @@ def segment_divide(audio_path, part_detect_path, segment_detect_path, output_dir
     return json_path
 
 
-def exec(manager):
-    logger.info("segment_divide,enter: %s", util.json_dumps(manager))
+def exec(manager, batch_size=None):
+    logger.info("segment_divide,enter: %s", util.log_json(manager))
     audio_path = manager.get('audio_path')
     part_detect_path = manager.get('part_detect_path')
     segment_detect_path = manager.get('segment_detect_path')
     output_dir = os.path.join(manager.get('output_dir'), "segment_divide")
-    json_path = segment_divide(audio_path, part_detect_path, segment_detect_path, output_dir)
+    json_path = segment_divide(audio_path, part_detect_path, segment_detect_path, output_dir, batch_size)
     manager['segment_divide_path'] = json_path
-    logger.info("segment_divide,leave: %s", util.json_dumps(manager))
+    logger.info("segment_divide,leave: %s", util.log_json(manager))
     segment_detect_faster_whisper.exec_gc()
     segment_detect_align_whisperx.exec_gc()
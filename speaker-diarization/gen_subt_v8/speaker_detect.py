@@ -1,11 +1,12 @@
 import util
+import tool_wav
 import os
 import speaker_detect_pyannote_wespeaker
-from pydub import AudioSegment
 from pyannote.audio.pipelines.clustering import AgglomerativeClustering
 import math
 import numpy as np
 import tool_subt
+import tool_embedding_cache
 from collections import Counter
 
 logger = util.get_logger()
@@ -51,13 +52,12 @@ def rank_arr(arr):
     return result
 
 
-def speaker_detect(audio_path, segment_divide_path, output_dir, min_duration=2000):
+def speaker_detect(audio_path, segment_divide_path, output_dir, min_duration=2000, batch_size=16, num_threads=None):
     json_path = os.path.join(output_dir, 'speaker_detect.json')
     srt_path = os.path.join(output_dir, 'speaker_detect.srt')
     if util.path_exist(json_path):
         return json_path
 
-    audio = AudioSegment.from_wav(audio_path)
     segments = util.read_file_to_obj(segment_divide_path)
     for i, segment in enumerate(segments):
         if segments[i].get('speaker', None):
@@ -72,14 +72,33 @@ def speaker_detect(audio_path, segment_divide_path, output_dir, min_duration=200
             segments[i]['speaker'] = 'other'
             continue
 
-    embedding_list = []
+    cache = tool_embedding_cache.EmbeddingCache()
+    audio_hash = util.get_file_hash(audio_path)
+    keys = []
+    spans = []
     for i, segment in enumerate(segments):
         if segments[i].get('speaker', None):
             continue
-        cut = audio[segments[i]['start']:segments[i]['end']]
-        embedding = speaker_detect_pyannote_wespeaker.extract_embedding(cut)
-        embedding_list.append(embedding)
-    embeddings = np.array(embedding_list)
+        spans.append((segments[i]['start'], segments[i]['end']))
+        key = cache.get_key(audio_hash, segments[i]['start'], segments[i]['end'],
+                            speaker_detect_pyannote_wespeaker.cache_name)
+        keys.append(key)
+    embeddings = cache.get_many(keys)
+    miss_indexes = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if miss_indexes:
+        audio = tool_wav.read_audio(audio_path)
+        cuts = []
+        for i, index in enumerate(miss_indexes):
+            start, end = spans[index]
+            cuts.append(audio[start:end])
+        miss_embeddings = speaker_detect_pyannote_wespeaker.extract_embeddings(cuts, batch_size=batch_size,
+                                                                               num_threads=num_threads)
+        for i, index in enumerate(miss_indexes):
+            embeddings[index] = miss_embeddings[i]
+        cache.put_many([keys[index] for index in miss_indexes], miss_embeddings)
+    logger.info("speaker_detect,embedding缓存: %s", util.json_dumps(cache.get_stats()))
+    embeddings = np.array(embeddings)
+    embedding_list = list(embeddings)
 
     # threshold越小簇越多
     clustering = AgglomerativeClustering().instantiate({"method": "average", "min_cluster_size": 0, "threshold": 0.5})
@@ -108,12 +127,13 @@ def speaker_detect(audio_path, segment_divide_path, output_dir, min_duration=200
     return json_path
 
 
-def exec(manager):
-    logger.info("speaker_detect,enter: %s", util.json_dumps(manager))
+def exec(manager, batch_size=16, num_threads=None):
+    logger.info("speaker_detect,enter: %s", util.log_json(manager))
     audio_path = manager.get('audio_path')
     segment_divide_path = manager.get('segment_divide_path')
     output_dir = os.path.join(manager.get('output_dir'), 'speaker_detect')
-    json_path = speaker_detect(audio_path, segment_divide_path, output_dir)
+    json_path = speaker_detect(audio_path, segment_divide_path, output_dir,
+                               batch_size=batch_size, num_threads=num_threads)
     manager['speaker_detect_path'] = json_path
-    logger.info("speaker_detect,leave: %s", util.json_dumps(manager))
+    logger.info("speaker_detect,leave: %s", util.log_json(manager))
     speaker_detect_pyannote_wespeaker.exec_gc()
@@ -1,4 +1,5 @@
 import util
+import tool_wav
 import math
 import torch
 from pyannote.audio import Pipeline
@@ -19,9 +20,8 @@ def get_pipeline():
 
 
 def pydub_pyannote(audio):
-    samples = np.array(audio.get_array_of_samples())
-    samples_float = samples.astype(np.float32) / audio.max_possible_amplitude
-    waveform = torch.tensor(samples_float, dtype=torch.float32)
+    samples_float = tool_wav.get_float32(audio)
+    waveform = torch.from_numpy(samples_float)
     waveform = waveform.unsqueeze(0)
     signal = {'waveform': waveform, 'sample_rate': audio.frame_rate}
     return signal
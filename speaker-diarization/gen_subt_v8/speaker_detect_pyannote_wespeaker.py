@@ -1,4 +1,6 @@
 import util
+import tool_wav
+import tool_batch
 from pyannote.audio import Inference
 import numpy as np
 import torch
@@ -6,6 +8,9 @@ from pyannote.audio import Model
 
 logger = util.get_logger()
 
+model_name = "pyannote/wespeaker-voxceleb-resnet34-LM"
+# embedding缓存的模型名，批量提取的算法改变时加版本号，旧缓存不再命中
+cache_name = f"{model_name}:v2"
 inference = None
 
 
@@ -13,16 +18,15 @@ def get_inference():
     global inference
     if inference:
         return inference
-    model = Model.from_pretrained("pyannote/wespeaker-voxceleb-resnet34-LM")
+    model = Model.from_pretrained(model_name)
     inference = Inference(model, window="whole")
     inference.to(torch.device(util.get_device_type()))
     return inference
 
 
 def pydub_pyannote(audio):
-    samples = np.array(audio.get_array_of_samples())
-    samples_float = samples.astype(np.float32) / audio.max_possible_amplitude
-    waveform = torch.tensor(samples_float, dtype=torch.float32)
+    samples_float = tool_wav.get_float32(audio)
+    waveform = torch.from_numpy(samples_float)
     waveform = waveform.unsqueeze(0)
     signal = {'waveform': waveform, 'sample_rate': audio.frame_rate}
     return signal
@@ -37,6 +41,46 @@ def extract_embedding(audio):
     return embedding
 
 
+def pydub_numpy(audio, sample_rate):
+    if audio.channels != 1:
+        audio = audio.set_channels(1)
+    if audio.frame_rate != sample_rate:
+        audio = audio.set_frame_rate(sample_rate)
+    samples_float = tool_wav.get_float32(audio)
+    return samples_float
+
+
+def extract_embeddings(audios, batch_size=16, num_threads=None):
+    """
+    批量提取embedding，返回(len(audios), dim)，顺序与输入一致。
+    fbank和减均值按每个片段的真实长度单独算（补零帧参与均值会让短片段的特征整体偏移），
+    长度相近的片段的fbank补零后一起过ResNet，用weights屏蔽补零帧参与统计池化。
+    与单条 extract_embedding 只在片段末尾几帧的卷积上有差别，见 check_wespeaker.py。
+    """
+    tool_batch.set_num_threads(num_threads)
+    inference = get_inference()
+    model = inference.model
+    sample_rate = model.hparams.sample_rate
+    samples_list = [pydub_numpy(audio, sample_rate) for audio in audios]
+    lengths = [samples.shape[0] for samples in samples_list]
+    embeddings = [None] * len(samples_list)
+    for indexes in tool_batch.get_length_batches(lengths, batch_size):
+        with torch.inference_mode():
+            fbanks = []
+            for i in indexes:
+                waveform = torch.from_numpy(samples_list[i]).reshape(1, 1, -1).to(inference.device)
+                fbanks.append(model.compute_fbank(waveform)[0])
+            frame_counts = torch.tensor([fbank.shape[0] for fbank in fbanks])
+            fbanks = torch.nn.utils.rnn.pad_sequence(fbanks, batch_first=True)
+            weights = torch.arange(fbanks.shape[1])[None, :] < frame_counts[:, None]
+            weights = weights.to(torch.float32).to(inference.device)
+            outputs = model.resnet(fbanks, weights=weights)[1]
+        outputs = outputs.detach().cpu().numpy()
+        for j, index in enumerate(indexes):
+            embeddings[index] = outputs[j]
+    return np.array(embeddings)
+
+
 def exec_gc():
     global inference
     inference = None
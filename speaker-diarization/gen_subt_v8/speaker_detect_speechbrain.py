@@ -1,4 +1,6 @@
 import util
+import tool_wav
+import tool_batch
 from speechbrain.inference.speaker import EncoderClassifier
 import numpy as np
 import torch
@@ -24,9 +26,8 @@ def exec_gc():
 
 
 def pydub_speechbrain(audio):
-    samples = np.array(audio.get_array_of_samples()).astype(np.float32)
-    samples /= np.iinfo(audio.array_type).max
-    signal = torch.tensor(samples).unsqueeze(0)
+    samples = tool_wav.get_float32(audio, np.iinfo(audio.array_type).max)
+    signal = torch.from_numpy(samples).unsqueeze(0)
     return signal
 
 
@@ -35,3 +36,24 @@ def extract_embedding(audio):
     model = get_model()
     embedding = model.encode_batch(signal).squeeze().detach().cpu().numpy()
     return embedding
+
+
+def extract_embeddings(audios, batch_size=16, num_threads=None):
+    """批量提取embedding，wav_lens传相对长度，补零部分不参与编码。返回顺序与输入一致"""
+    tool_batch.set_num_threads(num_threads)
+    model = get_model()
+    samples_list = []
+    for i, audio in enumerate(audios):
+        samples = np.array(audio.get_array_of_samples()).astype(np.float32)
+        samples /= np.iinfo(audio.array_type).max
+        samples_list.append(samples)
+    lengths = [samples.shape[0] for samples in samples_list]
+    embeddings = [None] * len(samples_list)
+    for indexes in tool_batch.get_length_batches(lengths, batch_size):
+        batch, batch_lengths = tool_batch.pad_samples([samples_list[i] for i in indexes])
+        signal = torch.from_numpy(batch)
+        wav_lens = torch.from_numpy(batch_lengths / max(batch.shape[1], 1)).float()
+        outputs = model.encode_batch(signal, wav_lens).squeeze(1).detach().cpu().numpy()
+        for j, index in enumerate(indexes):
+            embeddings[index] = outputs[j]
+    return np.array(embeddings)
@@ -1,18 +1,19 @@
 import util
 import os
-from pydub import AudioSegment
+from concurrent.futures import ProcessPoolExecutor
 import tool_loudness
+import tool_wav
 
 logger = util.get_logger()
 
+worker_audio = None
 
-def split_audio(audio_path, json_path, output_dir, path_key, min_duration=None):
-    wav_dir = os.path.join(output_dir, path_key)
-    util.delete_path(wav_dir)
-    audio = AudioSegment.from_wav(audio_path)
-    segments = util.read_file_to_obj(json_path)
+
+def get_cut_tasks(segments, wav_dir, min_duration=None, skip_silence=True):
+    """按segments顺序生成(start, end, cut_path)，同时写入file_name"""
+    tasks = []
     for i, segment in enumerate(segments):
-        if segment['vad_type'] == 'silence':
+        if skip_silence and segment['vad_type'] == 'silence':
             continue
         if min_duration and segment['duration'] < min_duration:
             continue
@@ -29,18 +30,54 @@ def split_audio(audio_path, json_path, output_dir, path_key, min_duration=None):
         if segment.get('speaker', ''):
             cut_path = os.path.join(wav_dir, segment.get('speaker', ''), file_name)
         cut_path = util.truncate_path(cut_path)
-        util.mkdir(cut_path)
-        cut = audio[segment['start']:segment['end']]
-        cut = tool_loudness.normalize_loudness(cut)
-        cut.export(cut_path, format='wav')
+        tasks.append((segment['start'], segment['end'], cut_path))
+    return tasks
+
+
+def export_cut(cut, cut_path):
+    util.mkdir(cut_path)
+    cut = tool_loudness.normalize_loudness(cut)
+    cut.export(cut_path, format='wav')
+
+
+def init_worker(audio_path):
+    global worker_audio
+    worker_audio = tool_wav.read_audio(audio_path)
+
+
+def export_task(task):
+    start, end, cut_path = task
+    export_cut(tool_wav.to_audio_segment(worker_audio[start:end]), cut_path)
+    return cut_path
+
+
+def export_parallel(audio_path, tasks, workers):
+    """每个进程只映射一次源wav，任务只传(start, end, cut_path)"""
+    chunksize = max(len(tasks) // (workers * 8), 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(audio_path,)) as executor:
+        cut_paths = list(executor.map(export_task, tasks, chunksize=chunksize))
+    logger.info("split_audio,并行导出: %s, 进程数: %s", len(cut_paths), workers)
+
+
+def split_audio(audio_path, json_path, output_dir, path_key, min_duration=None, workers=None):
+    wav_dir = os.path.join(output_dir, path_key)
+    util.delete_path(wav_dir)
+    segments = util.read_file_to_obj(json_path)
+    tasks = get_cut_tasks(segments, wav_dir, min_duration)
+    if workers and workers > 1:
+        export_parallel(audio_path, tasks, workers)
+    else:
+        audio = tool_wav.read_audio(audio_path)
+        for i, (start, end, cut_path) in enumerate(tasks):
+            export_cut(tool_wav.to_audio_segment(audio[start:end]), cut_path)
     json_path = os.path.join(output_dir, f'{path_key}.json')
     util.save_as_json(segments, json_path)
 
 
-def exec(manager, path_key, min_duration=None):
-    logger.info("split_audio,enter: %s", util.json_dumps(manager))
+def exec(manager, path_key, min_duration=None, workers=None):
+    logger.info("split_audio,enter: %s", util.log_json(manager))
     audio_path = manager.get('split_audio_path')
     json_path = manager.get(path_key)
     output_dir = os.path.join(manager.get('output_dir'), 'split_audio')
-    split_audio(audio_path, json_path, output_dir, path_key, min_duration)
-    logger.info("split_audio,leave: %s", util.json_dumps(manager))
+    split_audio(audio_path, json_path, output_dir, path_key, min_duration, workers)
+    logger.info("split_audio,leave: %s", util.log_json(manager))
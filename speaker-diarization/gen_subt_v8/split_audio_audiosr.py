@@ -1,5 +1,4 @@
-import tempfile
-import numpy as np, soundfile as sf
+import numpy as np
 import util
 import os
 from pydub import AudioSegment
@@ -7,6 +6,7 @@ from pydub import AudioSegment
 logger = util.get_logger(name='split_audio_audiosr')
 
 model = None
+ready_prefix = "audiosr_worker,ready: "
 
 
 def get_model():
@@ -19,26 +19,143 @@ def get_model():
     return model
 
 
-def audiosr_audio(audio):
-    from audiosr import super_resolution
-
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        input_path = tmp.name
-        audio.export(input_path, format="wav")
+def get_pad_duration(duration):
+    if duration % 5.12 != 0:
+        return duration + (5.12 - duration % 5.12)
+    return duration
+
+
+def read_waveform(samples, sample_rate):
+    """与audiosr.utils.read_wav_file一致，输入是内存里的float32单声道采样而不是文件"""
+    import torch
+    import torchaudio
+    from audiosr.utils import normalize_wav, pad_wav
+
+    waveform = torch.from_numpy(np.ascontiguousarray(samples, dtype=np.float32)).unsqueeze(0)
+    duration = waveform.size(-1) / sample_rate
+    pad_duration = get_pad_duration(duration)
+    target_frame = int(pad_duration * 100)
+    waveform = torchaudio.functional.resample(waveform, sample_rate, 48000)
+    waveform = waveform.numpy()[0, ...]
+    waveform = normalize_wav(waveform)
+    waveform = waveform[None, ...]
+    waveform = pad_wav(waveform, target_length=int(48000 * pad_duration))
+    return waveform, target_frame, pad_duration
+
+
+def make_batch(samples, sample_rate):
+    """与audiosr.pipeline.make_batch_for_super_resolution一致，返回(batch, duration, target_frame)"""
+    import torch
+    from audiosr.utils import wav_feature_extraction, lowpass_filtering_prepare_inference
+
+    waveform, target_frame, duration = read_waveform(samples, sample_rate)
+    log_mel_spec, stft = wav_feature_extraction(waveform, target_frame)
+    batch = {
+        "waveform": torch.FloatTensor(waveform),
+        "stft": torch.FloatTensor(stft),
+        "log_mel_spec": torch.FloatTensor(log_mel_spec),
+        "sampling_rate": 48000,
+    }
+    batch.update(lowpass_filtering_prepare_inference(batch))
+    lowpass_mel, lowpass_stft = wav_feature_extraction(batch["waveform_lowpass"], target_frame)
+    batch["lowpass_mel"] = lowpass_mel
+    for key in batch.keys():
+        if type(batch[key]) == torch.Tensor:
+            batch[key] = torch.FloatTensor(batch[key]).unsqueeze(0)
+    return batch, duration, target_frame
+
+
+def super_resolution_batch(clips, sample_rate, batch_size=1, seed=42, guidance_scale=3.5, ddim_steps=50):
+    """
+    多个片段超分，补齐后时长相同的片段拼成一批一起生成。
+    按完成顺序逐个yield (下标, 48k的float32采样)；batch_size为1时与逐个调用super_resolution结果一致。
+    """
+    import torch
+    from audiosr.pipeline import seed_everything
 
     model = get_model()
-    waveform = super_resolution(model, input_path, seed=42, guidance_scale=3.5, ddim_steps=50)
+    groups = {}
+    for i, clip in enumerate(clips):
+        # 补齐后的帧数、采样数都相同才能拼成一批
+        pad_duration = get_pad_duration(clip.shape[0] / sample_rate)
+        key = (int(pad_duration * 100), int(48000 * pad_duration))
+        groups.setdefault(key, []).append(i)
+    for key, indexes in sorted(groups.items()):
+        for start in range(0, len(indexes), batch_size):
+            batch_indexes = indexes[start:start + batch_size]
+            seed_everything(int(seed))
+            batches = []
+            duration = None
+            for i in batch_indexes:
+                batch, duration, target_frame = make_batch(clips[i], sample_rate)
+                batches.append(batch)
+            batch = {}
+            for name, value in batches[0].items():
+                if type(value) == torch.Tensor:
+                    batch[name] = torch.cat([item[name] for item in batches], dim=0)
+                else:
+                    batch[name] = value
+            with torch.no_grad():
+                waveform = model.generate_batch(batch, unconditional_guidance_scale=guidance_scale,
+                                                ddim_steps=ddim_steps, duration=duration)
+            for j, i in enumerate(batch_indexes):
+                yield i, np.asarray(waveform[j][0], dtype=np.float32)
+
+
+def audiosr_audio(audio):
+    samples = np.array(audio.get_array_of_samples()).reshape((-1, audio.channels))[:, 0]
+    samples = samples.astype(np.float32) / audio.max_possible_amplitude
+    for i, waveform in super_resolution_batch([samples], audio.frame_rate):
+        out_wav = (waveform * 32767).astype(np.int16)
+        return AudioSegment(data=out_wav.tobytes(), sample_width=2, frame_rate=48000, channels=1)
+
+
+def handle_conn(conn):
+    """
+    处理一个客户端连接，返回False表示客户端要求退出。
+    请求：json头 + count个float32采样；响应：每个片段一个json头 + float32采样，最后{"done": true}。
+    """
+    while True:
+        try:
+            request = util.json_loads(conn.recv_bytes().decode('utf-8'))
+        except EOFError:
+            return True
+        cmd = request.get('cmd', None)
+        if cmd == 'close':
+            return False
+        if cmd != 'super_resolution':
+            conn.send_bytes(util.json_dumps({'error': f"未知命令: {cmd}"}).encode('utf-8'))
+            continue
+        clips = []
+        for i in range(request['count']):
+            clips.append(np.frombuffer(conn.recv_bytes(), dtype=np.float32))
+        try:
+            results = super_resolution_batch(clips, request['sample_rate'],
+                                             batch_size=request.get('batch_size', 1),
+                                             seed=request.get('seed', 42),
+                                             guidance_scale=request.get('guidance_scale', 3.5),
+                                             ddim_steps=request.get('ddim_steps', 50))
+            for index, waveform in results:
+                conn.send_bytes(util.json_dumps({'index': index, 'sample_rate': 48000}).encode('utf-8'))
+                conn.send_bytes(waveform.tobytes())
+        except Exception as e:
+            logger.error("audiosr_worker，异常", exc_info=True)
+            conn.send_bytes(util.json_dumps({'error': str(e)}).encode('utf-8'))
+            continue
+        conn.send_bytes(util.json_dumps({'done': True}).encode('utf-8'))
 
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        output_path = tmp.name
-        out_wav = (waveform[0] * 32767).astype(np.int16).T
-        sf.write(output_path, out_wav, samplerate=48000)
-    audio = AudioSegment.from_wav(output_path)
 
-    os.remove(input_path)
-    os.remove(output_path)
+def serve(authkey, port=0):
+    """常驻进程：模型只加载一次，通过本地socket接收采样、返回超分结果，不落临时文件"""
+    from multiprocessing.connection import Listener
 
-    return audio
+    get_model()
+    with Listener(('127.0.0.1', port), authkey=authkey.encode('utf-8')) as listener:
+        print(f"{ready_prefix}{listener.address[1]}", flush=True)
+        while True:
+            with listener.accept() as conn:
+                if not handle_conn(conn):
+                    break
 
 
 def split_audio(audio_path, json_path, output_dir, path_key, min_duration=None):
@@ -71,12 +188,12 @@ def split_audio(audio_path, json_path, output_dir, path_key, min_duration=None):
 
 
 def exec(manager, path_key, min_duration=None):
-    logger.info("split_audio_audiosr,enter: %s", util.json_dumps(manager))
+    logger.info("split_audio_audiosr,enter: %s", util.log_json(manager))
     audio_path = manager.get('split_audio_path')
     json_path = manager.get(path_key)
     output_dir = os.path.join(manager.get('output_dir'), 'split_audio_audiosr')
     split_audio(audio_path, json_path, output_dir, path_key, min_duration)
-    logger.info("split_audio_audiosr,leave: %s", util.json_dumps(manager))
+    logger.info("split_audio_audiosr,leave: %s", util.log_json(manager))
 
 
 import sys
@@ -87,6 +204,14 @@ if __name__ == '__main__':
         if '=' in item:
             k, v = item.split('=', 1)
             args[k] = v
+    if 'serve' in sys.argv[1:]:
+        try:
+            serve(args['authkey'], int(args.get('port', 0)))
+        except Exception as e:
+            logger.error("异常", exc_info=True)
+            util.flush_logger()
+            raise
+        sys.exit(0)
     manager = util.json_loads(args['manager'])
     path_key = str(args['path_key'])
     min_duration = str(args.get('min_duration', ''))
@@ -1,21 +1,129 @@
 import util
 import os
+import atexit
+import threading
+import subprocess
+import numpy as np
+import soundfile as sf
+from multiprocessing.connection import Client
+import tool_wav
+import split_audio
 
 logger = util.get_logger()
 
+ready_prefix = "audiosr_worker,ready: "
+worker = None
 
-def exec(manager, path_key, min_duration=None):
-    py_path = os.path.join(util.get_script_path(), "split_audio_audiosr.py")
-    manager_json = util.json_dumps(manager)
-    cmd = [
-        "conda", "run", "-n", "audiosr",
-        "python", py_path,
-        f"manager={manager_json}",
-        f"path_key={path_key}",
-        f"min_duration={min_duration}",
-    ]
-    logger.info("split_audio_audiosr,cmd: %s", util.json_dumps(cmd))
-    return_code = util.popen_cmd(cmd)
-    if return_code != 0:
-        logger.error("split_audio_audiosr，异常")
-        raise ValueError("split_audio_audiosr，异常")
+
+class AudioSRWorker:
+    """
+    audiosr环境里的常驻进程，启动一次、模型加载一次，之后通过本地socket收发float32采样。
+    """
+
+    def __init__(self, env_name='audiosr'):
+        py_path = os.path.join(util.get_script_path(), "split_audio_audiosr.py")
+        authkey = os.urandom(16).hex()
+        cmd = [
+            "conda", "run", "--no-capture-output", "-n", env_name,
+            "python", py_path, "serve",
+            f"authkey={authkey}",
+        ]
+        logger.info("audiosr_worker,cmd: %s", util.json_dumps(cmd[:-1]))
+        self.process = subprocess.Popen(cmd, shell=False, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        text=True, bufsize=1, cwd=os.getcwd())
+        port = None
+        for line in iter(self.process.stdout.readline, ''):
+            logger.debug("%s", line)
+            if line.startswith(ready_prefix):
+                port = int(line[len(ready_prefix):].strip())
+                break
+        if port is None:
+            logger.error("audiosr_worker，启动失败: %s", self.process.wait())
+            raise ValueError("audiosr_worker，启动失败")
+        threading.Thread(target=self.drain, daemon=True).start()
+        self.conn = Client(('127.0.0.1', port), authkey=authkey.encode('utf-8'))
+        logger.info("audiosr_worker，已启动: %s", port)
+
+    def drain(self):
+        with self.process.stdout:
+            for line in iter(self.process.stdout.readline, ''):
+                logger.debug("%s", line)
+
+    def super_resolution(self, clips, sample_rate, batch_size=1, seed=42, guidance_scale=3.5, ddim_steps=50):
+        """clips为float32单声道采样列表，按完成顺序逐个yield (下标, 48k的float32采样)"""
+        request = {
+            'cmd': 'super_resolution', 'count': len(clips), 'sample_rate': sample_rate,
+            'batch_size': batch_size, 'seed': seed, 'guidance_scale': guidance_scale, 'ddim_steps': ddim_steps,
+        }
+        self.conn.send_bytes(util.json_dumps(request).encode('utf-8'))
+        for clip in clips:
+            self.conn.send_bytes(np.ascontiguousarray(clip, dtype=np.float32).tobytes())
+        while True:
+            reply = util.json_loads(self.conn.recv_bytes().decode('utf-8'))
+            if reply.get('error', None):
+                logger.error("audiosr_worker，异常: %s", reply['error'])
+                raise ValueError(f"audiosr_worker，异常: {reply['error']}")
+            if reply.get('done', False):
+                return
+            waveform = np.frombuffer(self.conn.recv_bytes(), dtype=np.float32)
+            yield reply['index'], waveform
+
+    def close(self):
+        try:
+            self.conn.send_bytes(util.json_dumps({'cmd': 'close'}).encode('utf-8'))
+            self.conn.close()
+            self.process.wait(timeout=60)
+        except Exception as e:
+            logger.error("audiosr_worker，关闭异常", exc_info=True)
+            self.process.kill()
+
+
+def get_worker():
+    global worker
+    if worker:
+        return worker
+    worker = AudioSRWorker()
+    atexit.register(exec_gc)
+    return worker
+
+
+def exec_gc():
+    global worker
+    if worker:
+        worker.close()
+    worker = None
+
+
+def get_mono(audio):
+    """取第一个声道并归一化，与torchaudio.load后取第0声道一致"""
+    samples = tool_wav.get_samples(audio).reshape((-1, audio.channels))[:, 0]
+    return samples.astype(np.float32) / audio.max_possible_amplitude
+
+
+def split_audio_audiosr(audio_path, json_path, output_dir, path_key, min_duration=None, batch_size=1,
+                        chunk_size=64):
+    wav_dir = os.path.join(output_dir, path_key)
+    util.delete_path(wav_dir)
+    audio = tool_wav.read_audio(audio_path)
+    segments = util.read_file_to_obj(json_path)
+    tasks = split_audio.get_cut_tasks(segments, wav_dir, min_duration, skip_silence=False)
+    audiosr_worker = get_worker()
+    # 分块发送，避免一次把所有片段的采样都放进内存
+    for offset in range(0, len(tasks), chunk_size):
+        chunk = tasks[offset:offset + chunk_size]
+        clips = [get_mono(audio[start:end]) for start, end, cut_path in chunk]
+        for index, waveform in audiosr_worker.super_resolution(clips, audio.frame_rate, batch_size):
+            cut_path = chunk[index][2]
+            util.mkdir(cut_path)
+            sf.write(cut_path, (waveform * 32767).astype(np.int16), samplerate=48000)
+    json_path = os.path.join(output_dir, f'{path_key}.json')
+    util.save_as_json(segments, json_path)
+
+
+def exec(manager, path_key, min_duration=None, batch_size=1):
+    logger.info("split_audio_audiosr,enter: %s", util.log_json(manager))
+    audio_path = manager.get('split_audio_path')
+    json_path = manager.get(path_key)
+    output_dir = os.path.join(manager.get('output_dir'), 'split_audio_audiosr')
+    split_audio_audiosr(audio_path, json_path, output_dir, path_key, min_duration, batch_size)
+    logger.info("split_audio_audiosr,leave: %s", util.log_json(manager))
@@ -0,0 +1,37 @@
+import numpy as np
+import util
+
+logger = util.get_logger()
+
+
+def get_length_batches(lengths, batch_size):
+    """
+    按长度排序后切成批次，长度相近的放在同一批，减少补零。
+    返回每批在原列表中的下标。
+    """
+    batch_size = max(int(batch_size), 1)
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches = []
+    for start in range(0, len(order), batch_size):
+        batches.append(order[start:start + batch_size])
+    return batches
+
+
+def pad_samples(samples_list, dtype=np.float32):
+    """补零到同一长度，返回(batch, max_len)数组与各自的真实长度"""
+    lengths = np.array([samples.shape[0] for samples in samples_list], dtype=np.int64)
+    max_len = int(lengths.max()) if lengths.shape[0] > 0 else 0
+    batch = np.zeros((len(samples_list), max_len), dtype=dtype)
+    for i, samples in enumerate(samples_list):
+        batch[i, :samples.shape[0]] = samples
+    return batch, lengths
+
+
+def set_num_threads(num_threads):
+    if not num_threads:
+        return
+    try:
+        import torch
+        torch.set_num_threads(int(num_threads))
+    except ImportError as e:
+        logger.error("未安装依赖torch", exc_info=True)
@@ -0,0 +1,138 @@
+import os
+import numpy as np
+from filelock import FileLock
+import util
+
+logger = util.get_logger()
+
+default_cache_dir = os.path.join(util.get_home_dir(), '.cache', 'gen_subt', 'embedding')
+
+
+class EmbeddingCache:
+    """
+    内容寻址的embedding缓存，key为(音频内容hash, start, end, 模型名)。
+    向量按行追加到float32二进制文件，读取时用np.memmap；index.json记录key到行号及最近访问序号。
+    超出max_bytes时按最近访问淘汰并压缩数据文件。
+    缓存目录可被多个进程共用：每次读写都在文件锁内重新读取index，改完后原子替换index.json，
+    淘汰时行号重排也在锁内完成，不会读到别的进程改过行号的旧index。
+    """
+
+    def __init__(self, cache_dir=default_cache_dir, max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.data_path = os.path.join(cache_dir, 'embedding.f32')
+        self.max_bytes = max_bytes
+        self.hit = 0
+        self.miss = 0
+        util.mkdir(self.index_path)
+        self.lock = FileLock(os.path.join(cache_dir, 'index.lock'))
+        with self.lock:
+            self.load_index()
+
+    def load_index(self):
+        """从磁盘重新读取index，需在锁内调用"""
+        index = util.read_file_to_obj(self.index_path, default_value='{}')
+        self.dim = index.get('dim', 0)
+        self.clock = index.get('clock', 0)
+        self.entries = index.get('entries', {})
+
+    @staticmethod
+    def get_key(audio_hash, start, end, model_name):
+        return f"{audio_hash}:{start}:{end}:{model_name}"
+
+    def get_row_bytes(self):
+        return self.dim * np.dtype(np.float32).itemsize
+
+    def get_row_count(self):
+        if not self.dim or not util.path_isfile(self.data_path):
+            return 0
+        return os.path.getsize(self.data_path) // self.get_row_bytes()
+
+    def load_data(self):
+        row_count = self.get_row_count()
+        if row_count == 0:
+            return None
+        return np.memmap(self.data_path, dtype=np.float32, mode='r', shape=(row_count, self.dim))
+
+    def touch(self, entry):
+        self.clock += 1
+        entry[1] = self.clock
+
+    def get_many(self, keys):
+        """返回与keys等长的列表，未命中的位置为None"""
+        results = [None] * len(keys)
+        with self.lock:
+            self.load_index()
+            data = self.load_data()
+            for i, key in enumerate(keys):
+                entry = self.entries.get(key, None)
+                if data is None or entry is None or data.shape[0] <= entry[0]:
+                    self.miss += 1
+                    continue
+                self.touch(entry)
+                results[i] = np.array(data[entry[0]])
+                self.hit += 1
+            del data
+            self.write_index()
+        return results
+
+    def put_many(self, keys, embeddings):
+        if len(keys) == 0:
+            return
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(keys), -1)
+        with self.lock:
+            self.load_index()
+            if self.dim and self.dim != embeddings.shape[1]:
+                logger.warning("embedding缓存，维度变化，清空缓存: %s -> %s", self.dim, embeddings.shape[1])
+                self.clear()
+            self.dim = embeddings.shape[1]
+            row = self.get_row_count()
+            util.mkdir(self.data_path)
+            with open(self.data_path, 'ab') as file:
+                file.write(embeddings.tobytes())
+            for i, key in enumerate(keys):
+                entry = [row + i, 0]
+                self.touch(entry)
+                self.entries[key] = entry
+            self.evict()
+            self.write_index()
+
+    def evict(self):
+        """数据文件超过max_bytes时，保留最近访问的条目并重写数据文件（顺带清理被覆盖的旧行），需在锁内调用"""
+        row_bytes = self.get_row_bytes()
+        if self.get_row_count() * row_bytes <= self.max_bytes:
+            return
+        keep_cnt = self.max_bytes // row_bytes
+        items = sorted(self.entries.items(), key=lambda x: x[1][1], reverse=True)[:keep_cnt]
+        data = self.load_data()
+        rows = [entry[0] for _, entry in items]
+        kept = np.array(data[rows], dtype=np.float32)
+        del data
+        tmp_path = f"{self.data_path}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(kept.tobytes())
+        os.replace(tmp_path, self.data_path)
+        logger.info("embedding缓存，淘汰: %s -> %s", len(self.entries), len(items))
+        self.entries = {}
+        for i, (key, entry) in enumerate(items):
+            self.entries[key] = [i, entry[1]]
+
+    def clear(self):
+        util.delete_path(self.data_path)
+        self.entries = {}
+        self.dim = 0
+
+    def write_index(self):
+        """先写临时文件再改名，其它进程不会读到半个index，需在锁内调用"""
+        index = {'dim': self.dim, 'clock': self.clock, 'entries': self.entries}
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        util.save_file(util.json_dumps(index), tmp_path)
+        os.replace(tmp_path, self.index_path)
+
+    def get_stats(self):
+        return {
+            'hit': self.hit,
+            'miss': self.miss,
+            'entries': len(self.entries),
+            'bytes': self.get_row_count() * self.get_row_bytes(),
+        }
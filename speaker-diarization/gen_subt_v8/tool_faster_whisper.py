@@ -1,28 +1,20 @@
 import math
 import numpy as np
 import tool_subt
-from faster_whisper import WhisperModel
+import tool_wav
+from faster_whisper import WhisperModel, BatchedInferencePipeline
+
+# faster-whisper的输入采样率，clip_timestamps按这个采样率的采样下标计
+sample_rate = 16000
 
 
 def pydub_faster_whisper(audio):
     # 转 numpy 数组（float32，范围 -1.0 ~ 1.0）
-    samples = np.array(audio.get_array_of_samples()).astype(np.float32) / 32768.0
+    samples = tool_wav.get_float32(audio, 32768.0)
     return samples
 
 
-def transcribe(model: WhisperModel, audio, language=None):
-    last_end = len(audio)
-
-    samples = pydub_faster_whisper(audio)
-    # https://grok.com/c/78cde323-415f-4236-a193-79e630fcfc6e?rid=06a420c6-3037-47cf-9e2b-3d49bd49bca4
-    results, info = model.transcribe(samples, language=language,
-                                     # vad_filter=True,
-                                     # vad_parameters=dict(min_silence_duration_ms=10),
-                                     # condition_on_previous_text=False,
-                                     # length_penalty=10,
-                                     # max_new_tokens=100,
-                                     )
-
+def build_segments(results, info, last_end, language=None):
     segments = []
     for result in results:
         start = math.floor(result.start * 1000)
@@ -44,3 +36,52 @@ def transcribe(model: WhisperModel, audio, language=None):
     tool_subt.check_discrete_segments(segments)
 
     return segments, language
+
+
+def transcribe(model: WhisperModel, audio, language=None):
+    last_end = len(audio)
+
+    samples = pydub_faster_whisper(audio)
+    # https://grok.com/c/78cde323-415f-4236-a193-79e630fcfc6e?rid=06a420c6-3037-47cf-9e2b-3d49bd49bca4
+    results, info = model.transcribe(samples, language=language,
+                                     # vad_filter=True,
+                                     # vad_parameters=dict(min_silence_duration_ms=10),
+                                     # condition_on_previous_text=False,
+                                     # length_penalty=10,
+                                     # max_new_tokens=100,
+                                     )
+    return build_segments(results, info, last_end, language)
+
+
+def transcribe_clips(model: BatchedInferencePipeline, audio, clips, language=None, batch_size=16):
+    """
+    多个片段打包成一次批量转写，clips为[{'start': ms, 'end': ms}]，每个片段不超过30秒。
+    BatchedInferencePipeline的clip_timestamps是16kHz的采样下标（不是秒），audio需为16kHz。
+    返回的时间为audio上的绝对时间。
+    """
+    last_end = len(audio)
+
+    samples = pydub_faster_whisper(audio)
+    clip_timestamps = []
+    for i, clip in enumerate(clips):
+        clip_timestamps.append({'start': int(clip['start'] * sample_rate // 1000),
+                                'end': int(clip['end'] * sample_rate // 1000)})
+    results, info = model.transcribe(samples, language=language,
+                                     batch_size=batch_size,
+                                     clip_timestamps=clip_timestamps,
+                                     without_timestamps=False,
+                                     )
+    return build_segments(results, info, last_end, language)
+
+
+def transcribe_batched(model: BatchedInferencePipeline, audio, language=None, batch_size=16):
+    """长音频由faster-whisper内置VAD切块后批量转写，返回的时间相对audio起点"""
+    last_end = len(audio)
+
+    samples = pydub_faster_whisper(audio)
+    results, info = model.transcribe(samples, language=language,
+                                     batch_size=batch_size,
+                                     vad_filter=True,
+                                     without_timestamps=False,
+                                     )
+    return build_segments(results, info, last_end, language)
@@ -0,0 +1,90 @@
+import math
+import os
+import numpy as np
+import util
+
+logger = util.get_logger()
+
+
+class FrameSignal:
+    """
+    按帧存储的时间序列，values[i]对应[offset_ms + i * frame_ms, offset_ms + (i + 1) * frame_ms)毫秒。
+    按毫秒访问时再映射到帧，不展开成逐毫秒的数组；帧未覆盖的毫秒返回default_value。
+    """
+
+    def __init__(self, values, frame_ms, length, offset_ms=0, default_value=0.0):
+        self.values = np.asarray(values, dtype=np.float32).reshape(-1)
+        self.frame_ms = frame_ms
+        self.length = length
+        self.offset_ms = offset_ms
+        self.default_value = default_value
+
+    def __len__(self):
+        return self.length
+
+    def frame_index(self, ms):
+        return math.floor((ms - self.offset_ms) / self.frame_ms)
+
+    def __getitem__(self, ms):
+        if ms < 0:
+            ms += self.length
+        if ms < 0 or self.length <= ms:
+            raise IndexError(f"FrameSignal，毫秒越界: {ms}")
+        index = self.frame_index(ms)
+        if 0 <= index < self.values.shape[0]:
+            return float(self.values[index])
+        return self.default_value
+
+    def __iter__(self):
+        for ms in range(self.length):
+            yield self[ms]
+
+    def values_at(self, ms):
+        """批量按毫秒取值，ms为整数数组"""
+        ms = np.asarray(ms)
+        frame_cnt = self.values.shape[0]
+        if frame_cnt == 0:
+            return np.full(ms.shape, self.default_value, dtype=np.float32)
+        index = np.floor((ms - self.offset_ms) / self.frame_ms).astype(np.int64)
+        valid = (0 <= index) & (index < frame_cnt)
+        values = self.values[np.clip(index, 0, frame_cnt - 1)]
+        return np.where(valid, values, np.float32(self.default_value))
+
+    def frame_bounds(self):
+        """每帧覆盖的起始毫秒，共len(values)+1个边界，裁剪到[0, length]"""
+        frame_cnt = self.values.shape[0]
+        bounds = np.ceil(self.offset_ms + np.arange(frame_cnt + 1) * self.frame_ms)
+        bounds = np.clip(bounds, 0, self.length).astype(np.int64)
+        return bounds
+
+    def expand(self):
+        """展开成逐毫秒的float32数组，只在确实需要逐毫秒数据时使用"""
+        bounds = self.frame_bounds()
+        head = np.full(bounds[0], self.default_value, dtype=np.float32)
+        body = np.repeat(self.values, np.diff(bounds))
+        tail = np.full(self.length - bounds[-1], self.default_value, dtype=np.float32)
+        return np.concatenate([head, body, tail])
+
+    def save(self, npy_path):
+        """values存为npy，帧参数存为同名json"""
+        util.mkdir(npy_path)
+        np.save(npy_path, self.values)
+        meta = {
+            'frame_ms': self.frame_ms,
+            'length': self.length,
+            'offset_ms': self.offset_ms,
+            'default_value': self.default_value,
+        }
+        util.save_as_json(meta, os.path.splitext(npy_path)[0] + '.json')
+        return npy_path
+
+
+def load_frame_signal(npy_path, mmap_mode=None):
+    meta = util.read_file_to_obj(os.path.splitext(npy_path)[0] + '.json')
+    values = np.load(npy_path, mmap_mode=mmap_mode)
+    return FrameSignal(values,
+                       meta['frame_ms'],
+                       meta['length'],
+                       offset_ms=meta.get('offset_ms', 0),
+                       default_value=meta.get('default_value', 0.0),
+                       )
@@ -1,11 +1,13 @@
 import numpy as np
 import util
+import tool_wav
 from pydub import AudioSegment
 import torch
 from pydub import AudioSegment
 import numpy as np
 import os
 import util
+import tool_frame_signal
 from torch.hub import load_state_dict_from_url
 from huggingface_hub import hf_hub_download
 
@@ -27,8 +29,8 @@ def get_model():
 def pydub_humaware_vad(audio: AudioSegment):
     audio = audio.set_channels(1)
     audio = audio.set_frame_rate(16000)
-    samples = np.array(audio.get_array_of_samples())
-    waveform = torch.from_numpy(samples).float() / 32768.0
+    samples = tool_wav.get_float32(audio, 32768.0)
+    waveform = torch.from_numpy(samples)
     waveform = waveform.unsqueeze(0)
     return waveform
 
@@ -46,12 +48,8 @@ def vad_confidence(audio: AudioSegment):
         out = model(frame, 16000)
         outputs.append(out)
     probs = torch.cat(outputs, dim=0)
-    confidences = probs.squeeze(1).detach().cpu().tolist()
-    expanded = [0.0] * len(audio)
-    window_ms = 16000.0 / 512.0
-    for i, conf in enumerate(confidences):
-        start = int(i * window_ms)
-        end = min(int((i + 1) * window_ms), len(audio))
-        for ms in range(start, end):
-            expanded[ms] = conf
-    return expanded
+    confidences = probs.squeeze(1).detach().cpu().numpy()
+    # 每帧512个采样，16kHz下为32ms；改造前误写为16000/512=31.25ms，帧映射到的毫秒位置逐帧偏早，
+    # 修正后所有VAD分界都会相应后移（第i帧起点从i*31.25ms变为i*32ms）
+    window_ms = frame_size * 1000.0 / 16000
+    return tool_frame_signal.FrameSignal(confidences, window_ms, len(audio))
@@ -0,0 +1,51 @@
+import bisect
+import util
+import tool_subt
+
+logger = util.get_logger()
+
+
+class IntervalIndex:
+    """
+    有序且互不重叠的区间（如part_detect的静音段），起止点各存一个有序数组，用bisect查询。
+    构建O(n)，每次查询O(log n + 命中数)。
+    """
+
+    def __init__(self, segments):
+        tool_subt.check_discrete_segments(segments)
+        self.segments = segments
+        self.starts = [segment['start'] for segment in segments]
+        self.ends = [segment['end'] for segment in segments]
+
+    def __len__(self):
+        return len(self.segments)
+
+    def overlap_range(self, start, end):
+        """与(start, end)有交集的区间下标范围[lo, hi)"""
+        lo = bisect.bisect_right(self.ends, start)
+        hi = bisect.bisect_left(self.starts, end)
+        return lo, max(lo, hi)
+
+    def box(self, start, end):
+        """与(start, end)有交集的区间，首尾裁剪到[start, end]，返回副本，不改动原区间"""
+        lo, hi = self.overlap_range(start, end)
+        result = [dict(segment) for segment in self.segments[lo:hi]]
+        if len(result) > 0 and result[0]['start'] < start:
+            result[0]['start'] = start
+        if len(result) > 0 and end < result[-1]['end']:
+            result[-1]['end'] = end
+        return result
+
+    def find_start_in(self, time):
+        """满足start <= time < end的区间"""
+        i = bisect.bisect_right(self.starts, time) - 1
+        if 0 <= i and time < self.ends[i]:
+            return self.segments[i]
+        return None
+
+    def find_end_in(self, time):
+        """满足start < time <= end的区间"""
+        i = bisect.bisect_left(self.starts, time) - 1
+        if 0 <= i and time <= self.ends[i]:
+            return self.segments[i]
+        return None
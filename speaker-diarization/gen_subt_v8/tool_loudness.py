@@ -1,6 +1,8 @@
 import numpy as np
 import pyloudnorm as pyln
 import util
+import tool_frame_signal
+import tool_wav
 from pydub import AudioSegment
 
 logger = util.get_logger()
@@ -126,19 +128,30 @@ def normalize_loudness(
     return normalized_audio
 
 
-def get_loudness(audio: AudioSegment, frame_rate: int = 50):
-    simple_rate = 1000
-    frame_simple = int(simple_rate / frame_rate)
-    window_ms = int(1000 / frame_rate)
-    frame_cnt = len(audio) // frame_simple
-    volumes = [0.0] * len(audio)
-    for i in range(frame_cnt):
-        sample_start = i * frame_simple
-        sample_end = (i + 1) * frame_simple
-        frame_data = audio[sample_start:sample_end]
-        volume = frame_data.dBFS
-        ms_start = i * window_ms
-        ms_end = min((i + 1) * window_ms, len(audio))
-        for ms in range(ms_start, ms_end):
-            volumes[ms] = volume
+def pydub_numpy(audio: AudioSegment):
+    return tool_wav.get_samples(audio)
+
+
+def get_frame_loudness(audio: AudioSegment, frame_rate: int = 50, block_frames: int = 8192):
+    """
+    一次解码全部采样，按帧reshape后批量计算每帧dBFS，返回float32数组(每帧一个值)。
+    与pydub的dBFS一致：rms为0的帧为-inf。
+    """
+    frame_ms = int(1000 / frame_rate)
+    frame_size = int(audio.frame_rate * frame_ms / 1000) * audio.channels
+    samples = pydub_numpy(audio)
+    frame_cnt = min(len(audio) // frame_ms, samples.shape[0] // frame_size)
+    frames = samples[:frame_cnt * frame_size].reshape(frame_cnt, frame_size)
+    volumes = np.empty(frame_cnt, dtype=np.float32)
+    # 分块转float64，避免长音频一次性展开成数GB的浮点数组
+    for start in range(0, frame_cnt, block_frames):
+        block = frames[start:start + block_frames].astype(np.float64)
+        rms = np.sqrt(np.mean(np.square(block), axis=1))
+        with np.errstate(divide='ignore'):
+            volumes[start:start + block_frames] = 20 * np.log10(rms / audio.max_possible_amplitude)
     return volumes
+
+
+def get_loudness(audio: AudioSegment, frame_rate: int = 50):
+    volumes = get_frame_loudness(audio, frame_rate)
+    return tool_frame_signal.FrameSignal(volumes, int(1000 / frame_rate), len(audio))
@@ -2,6 +2,8 @@ import nemo.collections.asr as nemo_asr
 import torch
 import numpy as np
 import util
+import tool_wav
+import tool_frame_signal
 from pydub import AudioSegment
 
 logger = util.get_logger()
@@ -21,9 +23,8 @@ def get_model():
 
 
 def pydub_nemo_vad(audio: AudioSegment):
-    samples = audio.get_array_of_samples()
-    input_signal = np.array(samples).astype(np.float32) / audio.max_possible_amplitude
-    input_signal = torch.tensor(input_signal).unsqueeze(0).float()
+    input_signal = tool_wav.get_float32(audio)
+    input_signal = torch.from_numpy(input_signal).unsqueeze(0)
     input_signal_length = torch.tensor([input_signal.shape[1]]).long()
     return input_signal, input_signal_length
 
@@ -39,12 +40,6 @@ def vad_confidence(audio: AudioSegment):
         ).cpu()
     probs = torch.softmax(outputs, dim=-1)
     probs = probs[:, :, 1]
-    confidences = probs.squeeze().tolist()
-    expanded = [0.0] * len(audio)
+    confidences = probs.squeeze(0).numpy()
     window_ms = 20
-    for i, conf in enumerate(confidences):
-        start = int(i * window_ms)
-        end = min(int((i + 1) * window_ms), len(audio))
-        for ms in range(start, end):
-            expanded[ms] = conf
-    return expanded
+    return tool_frame_signal.FrameSignal(confidences, window_ms, len(audio))
@@ -0,0 +1,219 @@
+import os
+import time
+import hashlib
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+import util
+
+logger = util.get_logger()
+
+
+class Stage:
+    """
+    阶段声明。inputs为读取的manager键，outputs为写入的manager键，
+    params为影响结果的conf键（或接收conf返回参数的函数），clean_dir为阶段输出目录名，缓存失效时删除。
+    inputs/outputs也可以是接收conf返回键列表的函数。
+    resource为阶段使用的共享资源名（如模块级的模型单例），同一资源的阶段共用一把锁，默认为阶段名。
+    """
+
+    def __init__(self, inputs, outputs, params=None, clean_dir=None, cache=True, resource=None):
+        self.inputs = inputs
+        self.outputs = outputs
+        self.params = params or []
+        self.clean_dir = clean_dir
+        self.cache = cache
+        self.resource = resource
+
+    def get_inputs(self, conf):
+        if callable(self.inputs):
+            return self.inputs(conf)
+        return self.inputs
+
+    def get_outputs(self, conf):
+        if callable(self.outputs):
+            return self.outputs(conf)
+        return self.outputs
+
+    def get_params(self, conf):
+        if callable(self.params):
+            return self.params(conf)
+        return {key: conf.get(key, None) for key in self.params}
+
+
+def get_fingerprint(value):
+    """文件路径取(路径, 大小, 修改时间)，其余值原样保留，用于判断输入是否变化"""
+    if isinstance(value, dict):
+        return {key: get_fingerprint(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [get_fingerprint(item) for item in value]
+    if isinstance(value, str) and util.path_isfile(value):
+        stat = os.stat(value)
+        return [value, stat.st_size, stat.st_mtime_ns]
+    return value
+
+
+def get_cache_key(name, params, inputs):
+    content = util.json_dumps([name, params, get_fingerprint(inputs)])
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def get_rss():
+    """当前进程常驻内存(字节)，没有psutil时退化为进程峰值"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+def get_cpu_time():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class RunReport:
+    """
+    记录每个阶段的耗时、CPU时间、峰值内存。
+    内存由后台线程定时采样；CPU时间与内存都是整个进程的，视频并发时会包含同时运行的其它阶段。
+    """
+
+    def __init__(self, interval=0.2):
+        self.records = []
+        self.running = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.sample, args=(interval,), daemon=True)
+        self.thread.start()
+
+    def sample(self, interval):
+        while not self.stop_event.wait(interval):
+            rss = get_rss()
+            with self.lock:
+                for record in self.running.values():
+                    record['peak_rss_mb'] = max(record['peak_rss_mb'], rss / 1024 / 1024)
+
+    @contextlib.contextmanager
+    def measure(self, video_path, index, name):
+        record = {'video_path': video_path, 'index': index, 'name': name, 'cached': False,
+                  'peak_rss_mb': get_rss() / 1024 / 1024}
+        token = object()
+        with self.lock:
+            self.running[token] = record
+        wall_start = time.perf_counter()
+        cpu_start = get_cpu_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = round(time.perf_counter() - wall_start, 3)
+            record['cpu_s'] = round(get_cpu_time() - cpu_start, 3)
+            with self.lock:
+                del self.running[token]
+                record['peak_rss_mb'] = round(max(record['peak_rss_mb'], get_rss() / 1024 / 1024), 1)
+                self.records.append(record)
+
+    def add_cached(self, video_path, index, name):
+        record = {'video_path': video_path, 'index': index, 'name': name, 'cached': True,
+                  'wall_s': 0.0, 'cpu_s': 0.0, 'peak_rss_mb': 0.0}
+        with self.lock:
+            self.records.append(record)
+
+    def get_summary(self):
+        summary = {}
+        for record in self.records:
+            item = summary.setdefault(record['name'], {'count': 0, 'cached': 0, 'wall_s': 0.0,
+                                                       'cpu_s': 0.0, 'peak_rss_mb': 0.0})
+            item['count'] += 1
+            item['cached'] += int(record['cached'])
+            item['wall_s'] = round(item['wall_s'] + record['wall_s'], 3)
+            item['cpu_s'] = round(item['cpu_s'] + record['cpu_s'], 3)
+            item['peak_rss_mb'] = max(item['peak_rss_mb'], record['peak_rss_mb'])
+        return summary
+
+    def save(self, report_path):
+        self.stop_event.set()
+        with self.lock:
+            report = {'records': list(self.records), 'summary': self.get_summary()}
+        util.save_as_json(report, report_path)
+        return report_path
+
+
+class Pipeline:
+    """
+    按exec配置执行阶段。输入、参数都没变的阶段直接从记录恢复输出，
+    参数或上游输出变化时只重跑受影响的阶段。
+    多个视频可并发执行，使用同一资源的阶段同一时刻只跑一个视频
+    （模型是模块级单例，不能并发使用，释放模型的exec_gc也不能与其它阶段的转写同时发生）。
+    """
+
+    def __init__(self, stages, exec_conf, exec_fn, report):
+        self.stages = stages
+        self.exec_conf = exec_conf
+        self.exec_fn = exec_fn
+        self.report = report
+        self.locks = {}
+        for name, stage in stages.items():
+            self.locks.setdefault(stage.resource or name, threading.Lock())
+
+    def get_lock(self, name):
+        return self.locks[self.stages[name].resource or name]
+
+    def get_record_path(self, manager, index, name):
+        return os.path.join(manager.get('output_dir'), 'pipeline', f"{index:02d}_{name}.json")
+
+    def run_stage(self, manager, index, conf):
+        name = conf.get('name', None)
+        stage = self.stages.get(name, None)
+        if stage is None:
+            logger.error("调度，未声明的阶段: %s", name)
+            raise ValueError(f"调度，未声明的阶段: {name}")
+        video_path = manager.get('video_path')
+        if not stage.cache or not manager.get('output_dir'):
+            with self.get_lock(name), self.report.measure(video_path, index, name):
+                self.exec_fn(manager, conf)
+            return
+
+        inputs = {key: manager.get(key, None) for key in stage.get_inputs(conf)}
+        key = get_cache_key(name, stage.get_params(conf), inputs)
+        record_path = self.get_record_path(manager, index, name)
+        record = util.read_file_to_obj(record_path, default_value='null')
+        if record and record['key'] == key and get_fingerprint(record['outputs']) == record['fingerprint']:
+            logger.info("调度，命中缓存，跳过: %s %s", name, video_path)
+            manager.update(record['outputs'])
+            self.report.add_cached(video_path, index, name)
+            return
+        if stage.clean_dir:
+            # 没有记录或记录不一致（参数、上游变了，或输出目录是旧的执行方式留下的），都删掉旧输出，
+            # 否则阶段内部会因文件已存在而跳过
+            logger.info("调度，缓存未命中，重跑: %s %s", name, video_path)
+            util.delete_path(os.path.join(manager.get('output_dir'), stage.clean_dir))
+
+        with self.get_lock(name), self.report.measure(video_path, index, name):
+            self.exec_fn(manager, conf)
+        outputs = {output_key: manager.get(output_key, None) for output_key in stage.get_outputs(conf)}
+        record = {'key': key, 'outputs': outputs, 'fingerprint': get_fingerprint(outputs)}
+        util.save_as_json(record, record_path)
+
+    def run(self, video_path):
+        manager = {"video_path": video_path}
+        for index, conf in enumerate(self.exec_conf):
+            if not conf.get('enable', False):
+                continue
+            self.run_stage(manager, index, conf)
+        return manager
+
+    def run_all(self, video_paths, workers=1):
+        def run_video(video_path):
+            try:
+                return self.run(video_path)
+            except Exception as e:
+                logger.error("调度，异常: %s", video_path, exc_info=True)
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(int(workers), 1)) as executor:
+            return list(executor.map(run_video, video_paths))
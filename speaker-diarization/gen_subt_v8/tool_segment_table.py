@@ -0,0 +1,345 @@
+import os
+import numpy as np
+import util
+import tool_subt
+
+logger = util.get_logger()
+
+core_keys = ('start', 'end', 'index', 'duration', 'vad_type', 'speaker', 'text')
+
+
+class CategoryColumn:
+    """分类列：int16编码 + 取值表，-1表示缺失"""
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    @staticmethod
+    def from_values(values):
+        categories = []
+        lookup = {}
+        codes = np.full(len(values), -1, dtype=np.int16)
+        for i, value in enumerate(values):
+            if value is None:
+                continue
+            if value not in lookup:
+                lookup[value] = len(categories)
+                categories.append(value)
+            codes[i] = lookup[value]
+        return CategoryColumn(codes, categories)
+
+    def get_code(self, value, create=False):
+        if value in self.categories:
+            return self.categories.index(value)
+        if not create:
+            return -2
+        self.categories.append(value)
+        return len(self.categories) - 1
+
+    def take(self, idx):
+        if len(self.codes) == 0:
+            return CategoryColumn(np.full(len(idx), -1, dtype=np.int16), list(self.categories))
+        codes = np.where(idx < 0, -1, self.codes[np.maximum(idx, 0)]).astype(np.int16)
+        return CategoryColumn(codes, list(self.categories))
+
+    def get_values(self):
+        return [None if code < 0 else self.categories[code] for code in self.codes.tolist()]
+
+
+class TextColumn:
+    """变长文本列：offsets + utf-8字节blob，mask区分缺失与空串"""
+
+    def __init__(self, offsets, blob, mask):
+        self.offsets = offsets
+        self.blob = blob
+        self.mask = mask
+
+    @staticmethod
+    def from_values(values):
+        mask = np.array([value is not None for value in values], dtype=bool)
+        encoded = [value.encode('utf-8') if value is not None else b'' for value in values]
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return TextColumn(offsets, blob, mask)
+
+    def take(self, idx):
+        if len(self.mask) == 0:
+            return TextColumn.from_values([None] * len(idx))
+        valid = idx >= 0
+        safe = np.where(valid, idx, 0)
+        lengths = np.where(valid, self.offsets[safe + 1] - self.offsets[safe], 0)
+        offsets = np.zeros(len(idx) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # 每个字节在原blob里的位置 = 所在行原起点 + 行内偏移
+        shift = np.repeat(self.offsets[safe] - offsets[:-1], lengths)
+        blob = self.blob[shift + np.arange(offsets[-1])]
+        return TextColumn(offsets, blob, valid & self.mask[safe])
+
+    def get_values(self):
+        data = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') if has else None
+                for i, has in enumerate(self.mask.tolist())]
+
+
+class SegmentTable:
+    """
+    列式segments：start/end/index/duration为int32列（index、duration缺失为-1），
+    vad_type/speaker为分类列，text为变长文本列，其余字段按行存json。
+    操作与tool_subt的同名函数结果一致，只在需要时才转回dict列表或导出json/srt。
+    """
+
+    def __init__(self, start, end, index=None, duration=None, vad_type=None, speaker=None, text=None, extra=None):
+        size = len(start)
+        self.start = np.asarray(start, dtype=np.int32)
+        self.end = np.asarray(end, dtype=np.int32)
+        self.index = np.full(size, -1, dtype=np.int32) if index is None else index
+        self.duration = np.full(size, -1, dtype=np.int32) if duration is None else duration
+        self.vad_type = CategoryColumn.from_values([None] * size) if vad_type is None else vad_type
+        self.speaker = CategoryColumn.from_values([None] * size) if speaker is None else speaker
+        self.text = TextColumn.from_values([None] * size) if text is None else text
+        self.extra = TextColumn.from_values([None] * size) if extra is None else extra
+
+    def __len__(self):
+        return len(self.start)
+
+    @staticmethod
+    def from_segments(segments):
+        for key in ('start', 'end'):
+            values = [segment[key] for segment in segments]
+            if not all(isinstance(value, int) for value in values):
+                logger.error("构建SegmentTable，%s必须是整数毫秒", key)
+                raise ValueError(f"构建SegmentTable，{key}必须是整数毫秒")
+        extras = []
+        for segment in segments:
+            extra = {key: value for key, value in segment.items() if key not in core_keys}
+            extras.append(util.json_dumps(extra) if extra else None)
+        return SegmentTable(
+            [segment['start'] for segment in segments],
+            [segment['end'] for segment in segments],
+            index=np.array([segment.get('index', -1) for segment in segments], dtype=np.int32),
+            duration=np.array([segment.get('duration', -1) for segment in segments], dtype=np.int32),
+            vad_type=CategoryColumn.from_values([segment.get('vad_type', None) for segment in segments]),
+            speaker=CategoryColumn.from_values([segment.get('speaker', None) for segment in segments]),
+            text=TextColumn.from_values([segment.get('text', None) for segment in segments]),
+            extra=TextColumn.from_values(extras),
+        )
+
+    def to_segments(self):
+        columns = {
+            'start': self.start.tolist(),
+            'end': self.end.tolist(),
+            'index': self.index.tolist(),
+            'duration': self.duration.tolist(),
+            'vad_type': self.vad_type.get_values(),
+            'speaker': self.speaker.get_values(),
+            'text': self.text.get_values(),
+        }
+        extras = self.extra.get_values()
+        segments = []
+        for i in range(len(self)):
+            segment = {'start': columns['start'][i], 'end': columns['end'][i]}
+            for key in ('index', 'duration'):
+                if columns[key][i] >= 0:
+                    segment[key] = columns[key][i]
+            for key in ('vad_type', 'speaker', 'text'):
+                if columns[key][i] is not None:
+                    segment[key] = columns[key][i]
+            if extras[i]:
+                segment.update(util.json_loads(extras[i]))
+            segments.append(segment)
+        return segments
+
+    def take(self, idx):
+        """按下标取行，下标为-1时生成只有start/end的空行"""
+        idx = np.asarray(idx, dtype=np.int64)
+        if len(self) == 0:
+            result = SegmentTable(np.zeros(len(idx)), np.zeros(len(idx)))
+            result.vad_type = self.vad_type.take(idx)
+            result.speaker = self.speaker.take(idx)
+            return result
+        valid = idx >= 0
+        safe = np.where(valid, idx, 0)
+        return SegmentTable(
+            np.where(valid, self.start[safe], 0),
+            np.where(valid, self.end[safe], 0),
+            index=np.where(valid, self.index[safe], -1).astype(np.int32),
+            duration=np.where(valid, self.duration[safe], -1).astype(np.int32),
+            vad_type=self.vad_type.take(idx),
+            speaker=self.speaker.take(idx),
+            text=self.text.take(idx),
+            extra=self.extra.take(idx),
+        )
+
+    def append(self, start, end, vad_type=None):
+        """末尾加一行，返回新表"""
+        result = self.take(np.append(np.arange(len(self)), -1))
+        result.start[-1] = start
+        result.end[-1] = end
+        if vad_type:
+            result.vad_type.codes[-1] = result.vad_type.get_code(vad_type, create=True)
+        return result
+
+    def get_column(self, type_key):
+        if type_key not in ('vad_type', 'speaker'):
+            logger.error("SegmentTable，非分类列: %s", type_key)
+            raise ValueError(f"SegmentTable，非分类列: {type_key}")
+        return getattr(self, type_key)
+
+    def init(self):
+        """同tool_subt.init_segments"""
+        self.index = np.arange(len(self), dtype=np.int32)
+        self.duration = (self.end - self.start).astype(np.int32)
+        return self
+
+    def fix_overlap(self):
+        """同tool_subt.fix_overlap_segments；第i步只读写end[i-1]和start[i]，各步互不影响，可以整体计算"""
+        if len(self) < 2:
+            return self
+        pre_end = self.end[:-1].astype(np.int64)
+        start = self.start[1:].astype(np.int64)
+        overlap = start < pre_end
+        mean = (pre_end + start) // 2
+        self.start[1:][overlap] = mean[overlap]
+        self.end[:-1][overlap] = mean[overlap]
+        return self
+
+    def unit(self, type_key, type_value=None):
+        """同tool_subt.unit_segments：相邻同类合并到第一段，end取最后一段的end"""
+        if len(self) == 0:
+            return self
+        column = self.get_column(type_key)
+        codes = column.codes.astype(np.int32)
+        # 原实现里前一段缺失该字段时按空串比较，当前段缺失时按None比较
+        pre_codes = codes[:-1].copy()
+        pre_codes[pre_codes < 0] = column.get_code('')
+        merge = (codes[1:] == pre_codes) & (codes[1:] >= 0)
+        if type_value:
+            value_code = column.get_code(type_value)
+            merge &= (codes[1:] == value_code) & (codes[:-1] == value_code)
+        keep = np.concatenate([[True], ~merge])
+        heads = np.flatnonzero(keep)
+        tails = np.append(heads[1:] - 1, len(self) - 1)
+        result = self.take(heads)
+        result.end = self.end[tails].copy()
+        return result
+
+    def fill(self, last_end=None, vad_type=None):
+        """同tool_subt.fill_segments：补齐空隙，空隙段只有start/end/vad_type"""
+        size = len(self)
+        pre_end = np.concatenate([[0], self.end[:-1]]).astype(np.int32)
+        gap = pre_end < self.start
+        # 每行前面有空隙时先插一行-1
+        idx = np.full(size + int(gap.sum()), -1, dtype=np.int64)
+        row_pos = np.arange(size) + np.cumsum(gap)
+        idx[row_pos] = np.arange(size)
+        tail = last_end and size > 0 and self.end[-1] < last_end
+        if tail:
+            idx = np.append(idx, -1)
+        result = self.take(idx)
+        gap_pos = row_pos[gap] - 1
+        result.start[gap_pos] = pre_end[gap]
+        result.end[gap_pos] = self.start[gap]
+        new_pos = gap_pos
+        if tail:
+            result.start[-1] = self.end[-1]
+            result.end[-1] = last_end
+            new_pos = np.append(gap_pos, len(result) - 1)
+        if vad_type:
+            result.vad_type.codes[new_pos] = result.vad_type.get_code(vad_type, create=True)
+        return result
+
+    def clip(self, last_end):
+        """同tool_subt.clipp_segments"""
+        result = self.take(np.flatnonzero(self.start <= last_end))
+        np.minimum(result.end, last_end, out=result.end)
+        return result
+
+    def shift(self, duration_ms):
+        """同tool_subt.shift_segments_time"""
+        self.start += duration_ms
+        self.end += duration_ms
+        return self
+
+    def check_coherent(self):
+        """同tool_subt.check_coherent_segments，先整体判断，出错时再逐行定位"""
+        ok = bool(np.all(self.start >= 0) and np.all(self.end > self.start)
+                  and np.array_equal(self.end[:-1], self.start[1:]))
+        if not ok:
+            tool_subt.check_coherent_segments(self.to_segments())
+
+    def check_discrete(self):
+        """同tool_subt.check_discrete_segments"""
+        ok = bool(np.all(self.start >= 0) and np.all(self.end > self.start)
+                  and np.all(self.end[:-1] <= self.start[1:]))
+        if not ok:
+            tool_subt.check_discrete_segments(self.to_segments())
+
+    def save(self, save_path):
+        meta = {
+            'vad_type': self.vad_type.categories,
+            'speaker': self.speaker.categories,
+        }
+        util.mkdir(save_path)
+        with open(save_path, 'wb') as file:
+            np.savez(
+                file,
+                meta=np.frombuffer(util.json_dumps(meta).encode('utf-8'), dtype=np.uint8),
+                start=self.start, end=self.end, index=self.index, duration=self.duration,
+                vad_type=self.vad_type.codes, speaker=self.speaker.codes,
+                text_offsets=self.text.offsets, text_blob=self.text.blob, text_mask=self.text.mask,
+                extra_offsets=self.extra.offsets, extra_blob=self.extra.blob, extra_mask=self.extra.mask,
+            )
+        return save_path
+
+    @staticmethod
+    def load(load_path):
+        with np.load(load_path, allow_pickle=False) as data:
+            meta = util.json_loads(data['meta'].tobytes().decode('utf-8'))
+            return SegmentTable(
+                data['start'], data['end'],
+                index=data['index'], duration=data['duration'],
+                vad_type=CategoryColumn(data['vad_type'], meta['vad_type']),
+                speaker=CategoryColumn(data['speaker'], meta['speaker']),
+                text=TextColumn(data['text_offsets'], data['text_blob'], data['text_mask']),
+                extra=TextColumn(data['extra_offsets'], data['extra_blob'], data['extra_mask']),
+            )
+
+    def save_as_json(self, save_path):
+        util.save_as_json(self.to_segments(), save_path)
+
+    def save_as_srt(self, save_path, skip_silence=False):
+        tool_subt.save_segments_as_srt(self.to_segments(), save_path, skip_silence=skip_silence)
+
+
+def get_table_path(json_path):
+    """json旁边的二进制副本"""
+    return f"{os.path.splitext(json_path)[0]}.seg.npz"
+
+
+def save_table(table, json_path, srt_path=None, skip_silence=False):
+    """二进制供后续阶段读取，json/srt供查看；先写json再写二进制，二进制的修改时间不早于json"""
+    table.save_as_json(json_path)
+    table.save(get_table_path(json_path))
+    if srt_path:
+        table.save_as_srt(srt_path, skip_silence=skip_silence)
+    return json_path
+
+
+def read_table(json_path):
+    """
+    二进制副本不比json旧时直接读取，否则从json构建。
+    json是查看、手工修正阶段结果的入口，手工改过json后json更新，以json为准。
+    """
+    table_path = get_table_path(json_path)
+    if util.path_exist(table_path):
+        if not util.path_exist(json_path) or os.stat(table_path).st_mtime_ns >= os.stat(json_path).st_mtime_ns:
+            return SegmentTable.load(table_path)
+        logger.info("分段表，json比二进制副本新，从json读取: %s", json_path)
+    return SegmentTable.from_segments(util.read_file_to_obj(json_path))
+
+
+def read_segments(json_path):
+    return read_table(json_path).to_segments()
@@ -0,0 +1,104 @@
+import os
+import numpy as np
+import soundfile as sf
+import util
+
+logger = util.get_logger()
+
+
+def get_duration(audio_path):
+    return sf.info(audio_path).duration
+
+
+def get_windows(frame_cnt, sample_rate, window_s, overlap_s):
+    """按窗口切分，相邻窗口重叠overlap_s秒，返回[(start_frame, end_frame)]"""
+    window = int(window_s * sample_rate)
+    overlap = min(int(overlap_s * sample_rate), window // 2)
+    hop = window - overlap
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window, frame_cnt)
+        windows.append((start, end))
+        if frame_cnt <= end:
+            break
+        start += hop
+    return windows
+
+
+def write_window(audio_path, start, end, output_path):
+    """只读取[start, end)的采样写成独立wav，不加载整个文件"""
+    with sf.SoundFile(audio_path) as file:
+        file.seek(start)
+        data = file.read(end - start, always_2d=True)
+        util.mkdir(output_path)
+        sf.write(output_path, data, file.samplerate, subtype=file.subtype)
+    return output_path
+
+
+def merge_windows(chunk_paths, windows, input_rate, output_path):
+    """
+    逐个读取各窗口的分离结果，重叠区线性交叉淡化后流式写入output_path。
+    同时只持有一个窗口的数据，内存与文件时长无关。
+    """
+    info = sf.info(chunk_paths[0])
+    sample_rate = info.samplerate
+    starts = [round(start * sample_rate / input_rate) for start, _ in windows]
+    pending = None
+    util.mkdir(output_path)
+    tmp_path = f"{output_path}.tmp.wav"
+    with sf.SoundFile(tmp_path, 'w', samplerate=sample_rate, channels=info.channels,
+                      subtype=info.subtype) as output:
+        for i, chunk_path in enumerate(chunk_paths):
+            data, _ = sf.read(chunk_path, always_2d=True, dtype='float32')
+            head = 0
+            if pending is not None:
+                head = min(pending.shape[0], data.shape[0])
+                fade = np.linspace(0.0, 1.0, head, dtype=np.float32)[:, np.newaxis]
+                output.write(pending[:head] * (1.0 - fade) + data[:head] * fade)
+            if i + 1 < len(chunk_paths):
+                split = max(starts[i + 1] - starts[i], head)
+                output.write(data[head:split])
+                pending = data[split:]
+            else:
+                output.write(data[head:])
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def separate_chunked(separate_fn, audio_path, output_dir, output_names, window_s=600, overlap_s=5):
+    """
+    长音频按重叠窗口分离，separate_fn(window_path, chunk_dir)需把各音轨写到chunk_dir/{name}.wav。
+    已完成的窗口有done.json标记，崩溃后重跑从第一个未完成的窗口继续。
+    """
+    info = sf.info(audio_path)
+    windows = get_windows(info.frames, info.samplerate, window_s, overlap_s)
+    chunk_root = os.path.join(output_dir, 'chunk')
+    plan = {'audio_path': audio_path, 'frames': info.frames, 'windows': windows}
+    plan_path = os.path.join(chunk_root, 'plan.json')
+    if util.path_exist(plan_path) and util.read_file_to_obj(plan_path) != util.json_loads(util.json_dumps(plan)):
+        logger.info("分块分离，参数变化，清空分块: %s", chunk_root)
+        util.delete_path(chunk_root)
+    util.save_as_json(plan, plan_path)
+
+    chunk_dirs = []
+    for i, (start, end) in enumerate(windows):
+        chunk_dir = os.path.join(chunk_root, f"{i:04d}")
+        chunk_dirs.append(chunk_dir)
+        done_path = os.path.join(chunk_dir, 'done.json')
+        if util.path_exist(done_path):
+            continue
+        logger.info("分块分离，%s/%s: %s", i + 1, len(windows), audio_path)
+        window_path = write_window(audio_path, start, end, os.path.join(chunk_dir, 'input.wav'))
+        separate_fn(window_path, chunk_dir)
+        util.delete_path(window_path)
+        util.save_as_json({'start': start, 'end': end}, done_path)
+
+    output_paths = []
+    for key, name in output_names.items():
+        chunk_paths = [os.path.join(chunk_dir, f"{name}.wav") for chunk_dir in chunk_dirs]
+        output_path = os.path.join(output_dir, f"{name}.wav")
+        merge_windows(chunk_paths, windows, info.samplerate, output_path)
+        output_paths.append(output_path)
+    util.delete_path(chunk_root)
+    return output_paths
@@ -0,0 +1,41 @@
+import os
+import hashlib
+import util
+
+logger = util.get_logger()
+
+default_cache_dir = os.path.join(util.get_home_dir(), '.cache', 'gen_subt', 'transcribe')
+
+
+class TranscribeCache:
+    """
+    转写结果缓存，key为(音频内容hash, 窗口起止, 语言, 模型)。
+    每个key一个json文件，文件名为key的sha1，内容里保留原key用于核对。
+    """
+
+    def __init__(self, cache_dir=default_cache_dir):
+        self.cache_dir = cache_dir
+        self.hit = 0
+        self.miss = 0
+
+    @staticmethod
+    def get_key(audio_hash, start, end, language, model_name):
+        return f"{audio_hash}:{start}:{end}:{language}:{model_name}"
+
+    def get_path(self, key):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name[:2], f"{name}.json")
+
+    def get(self, key):
+        obj = util.read_file_to_obj(self.get_path(key), default_value='null')
+        if not obj or obj.get('key', None) != key:
+            self.miss += 1
+            return None
+        self.hit += 1
+        return obj['segments']
+
+    def put(self, key, segments):
+        util.save_file(util.json_dumps({'key': key, 'segments': segments}), self.get_path(key))
+
+    def get_stats(self):
+        return {'hit': self.hit, 'miss': self.miss}
@@ -0,0 +1,198 @@
+import os
+import struct
+import numpy as np
+import util
+from pydub import AudioSegment
+
+logger = util.get_logger()
+
+# 8bit wav是无符号的，pydub读取时会转成有符号；24bit会转成32bit。这两种与原始数据不一致，不做映射
+dtype_map = {
+    2: np.int16,
+    4: np.int32,
+}
+array_type_map = {
+    2: 'h',
+    4: 'i',
+}
+pydub_dtype_map = {
+    1: np.int8,
+    2: np.int16,
+    4: np.int32,
+}
+
+
+def read_wav_header(wav_path):
+    """
+    解析RIFF头，返回(frame_rate, channels, sample_width, data_offset, data_size)。
+    不是16/32bit PCM时返回None。
+    """
+    file_size = os.path.getsize(wav_path)
+    with open(wav_path, 'rb') as file:
+        riff, _, wave = struct.unpack('<4sI4s', file.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            logger.error("读取wav，非法文件头: %s", wav_path)
+            raise ValueError(f"读取wav，非法文件头: {wav_path}")
+        fmt = None
+        data_offset = None
+        data_size = 0
+        while True:
+            header = file.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                data = file.read(chunk_size + (chunk_size & 1))
+                fmt = struct.unpack('<HHIIHH', data[:16])
+                if fmt[0] == 0xFFFE and len(data) >= 26:
+                    # WAVE_FORMAT_EXTENSIBLE，真实格式在SubFormat的前两个字节
+                    fmt = (struct.unpack('<H', data[24:26])[0],) + fmt[1:]
+            elif chunk_id == b'data':
+                data_offset = file.tell()
+                # ffmpeg管道输出时data长度可能是0xFFFFFFFF，以文件实际大小为准
+                data_size = min(chunk_size, file_size - data_offset)
+                break
+            else:
+                file.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+    if fmt is None or data_offset is None:
+        logger.error("读取wav，缺少fmt或data: %s", wav_path)
+        raise ValueError(f"读取wav，缺少fmt或data: {wav_path}")
+    format_tag, channels, frame_rate, _, _, bits = fmt
+    sample_width = bits // 8
+    if format_tag != 1 or sample_width not in dtype_map:
+        logger.warning("读取wav，不支持内存映射的格式: %s, format:%s, bits:%s", wav_path, format_tag, bits)
+        return None
+    return frame_rate, channels, sample_width, data_offset, data_size
+
+
+class AudioView:
+    """
+    一段采样的只读视图，实现了本项目用到的AudioSegment接口（len、毫秒切片、raw_data等）。
+    毫秒到采样的换算、长度的计算、末尾补零都与pydub一致，切片不拷贝数据。
+    samples的shape为(frames, channels)。
+    """
+
+    def __init__(self, samples, frame_rate, sample_width):
+        self.samples = samples
+        self.frame_rate = frame_rate
+        self.sample_width = sample_width
+        self.channels = samples.shape[1]
+        self.frame_width = self.channels * sample_width
+        self.max_possible_amplitude = float(1 << (sample_width * 8 - 1))
+        self.array_type = array_type_map[sample_width]
+
+    def __len__(self):
+        return round(1000 * self.samples.shape[0] / self.frame_rate)
+
+    def frame_count(self, ms=None):
+        if ms is None:
+            return float(self.samples.shape[0])
+        return ms * (self.frame_rate / 1000.0)
+
+    def get_frame(self, ms):
+        length = len(self)
+        ms = min(ms, length)
+        if ms < 0:
+            ms = length - abs(ms)
+        return int(self.frame_count(ms))
+
+    def slice(self, start, end):
+        """[start, end)毫秒的采样；末尾不足时与pydub一样补零"""
+        start_frame = self.get_frame(start)
+        end_frame = max(self.get_frame(end), start_frame)
+        samples = self.samples[start_frame:end_frame]
+        missing = end_frame - start_frame - samples.shape[0]
+        if missing > 0:
+            samples = np.concatenate([samples, np.zeros((missing, self.channels), dtype=samples.dtype)])
+        return samples
+
+    def __getitem__(self, millisecond):
+        if isinstance(millisecond, slice):
+            start = millisecond.start if millisecond.start is not None else 0
+            end = millisecond.stop if millisecond.stop is not None else len(self)
+        else:
+            start = millisecond
+            end = millisecond + 1
+        return AudioView(self.slice(start, end), self.frame_rate, self.sample_width)
+
+    @property
+    def raw_data(self):
+        return self.samples.tobytes()
+
+    def get_array_of_samples(self):
+        return get_samples(self)
+
+    def to_audio_segment(self):
+        return AudioSegment(
+            data=self.raw_data,
+            sample_width=self.sample_width,
+            frame_rate=self.frame_rate,
+            channels=self.channels
+        )
+
+    def get_audio(self, start=0, end=None):
+        if end is None:
+            end = len(self)
+        return self[start:end].to_audio_segment()
+
+    def set_channels(self, channels):
+        if channels == self.channels:
+            return self
+        return self.to_audio_segment().set_channels(channels)
+
+    def set_frame_rate(self, frame_rate):
+        if frame_rate == self.frame_rate:
+            return self
+        return self.to_audio_segment().set_frame_rate(frame_rate)
+
+    def export(self, *args, **kwargs):
+        return self.to_audio_segment().export(*args, **kwargs)
+
+
+class WavReader(AudioView):
+    """PCM wav的只读内存映射，多次切片、多个阶段读取同一文件都不会整段解码"""
+
+    def __init__(self, wav_path):
+        header = read_wav_header(wav_path)
+        if header is None:
+            logger.error("读取wav，不支持的格式: %s", wav_path)
+            raise ValueError(f"读取wav，不支持的格式: {wav_path}")
+        frame_rate, channels, sample_width, data_offset, data_size = header
+        self.wav_path = wav_path
+        frame_cnt = data_size // (channels * sample_width)
+        samples = np.memmap(wav_path, dtype=dtype_map[sample_width], mode='r', offset=data_offset,
+                            shape=(frame_cnt, channels))
+        super().__init__(samples, frame_rate, sample_width)
+
+
+def read_audio(audio_path):
+    """16/32bit PCM wav返回内存映射的WavReader，其它格式回退到pydub完整解码"""
+    if read_wav_header(audio_path) is None:
+        return AudioSegment.from_wav(audio_path)
+    return WavReader(audio_path)
+
+
+def to_audio_segment(audio):
+    if isinstance(audio, AudioView):
+        return audio.to_audio_segment()
+    return audio
+
+
+def get_samples(audio):
+    """AudioSegment或AudioView的整数采样，声道交错展平；AudioView不拷贝"""
+    if isinstance(audio, AudioView):
+        return audio.samples.reshape(-1)
+    sample_width = audio.sample_width
+    if sample_width not in pydub_dtype_map:
+        logger.error(f"pydub转numpy，非法sample_width: {sample_width}")
+        raise ValueError(f"pydub转numpy，非法sample_width: {sample_width}")
+    return np.frombuffer(audio.raw_data, dtype=pydub_dtype_map[sample_width])
+
+
+def get_float32(audio, scale=None):
+    """按需生成float32采样，默认除以max_possible_amplitude归一化到[-1, 1)"""
+    if scale is None:
+        scale = audio.max_possible_amplitude
+    samples = get_samples(audio).astype(np.float32)
+    samples /= scale
+    return samples
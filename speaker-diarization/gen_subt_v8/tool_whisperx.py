@@ -1,11 +1,12 @@
 import math
 import numpy as np
 import tool_subt
+import tool_wav
 
 
 def pydub_whisperx(audio):
     # 转 numpy 数组（float32，范围 -1.0 ~ 1.0）
-    samples = np.array(audio.get_array_of_samples()).astype(np.float32) / 32768.0
+    samples = tool_wav.get_float32(audio, 32768.0)
     return samples
 
 
@@ -1,6 +1,9 @@
 from pathlib import Path
 import subprocess
 import logging
+import logging.handlers
+import queue
+import atexit
 import os
 import platform
 import shutil
@@ -11,9 +14,60 @@ import gc
 import math
 from collections import Counter
 import re
+import hashlib
+
+
+log_queue_size = 10000
+log_listeners = {}
+
+
+class DropQueueHandler(logging.handlers.QueueHandler):
+    """
+    有界队列：WARNING及以上阻塞等待，保证错误不丢；其它级别队列满时直接丢弃并计数，不阻塞调用方。
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_listener(name, handler, handlers):
+    handler.queue = queue.Queue(maxsize=log_queue_size)
+    listener = logging.handlers.QueueListener(handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    log_listeners[name] = (listener, handler)
+
+
+def restart_listeners():
+    """fork出的子进程没有后台线程，重新建队列和线程；multiprocessing的子进程退出时不走atexit，单独注册"""
+    for name, (listener, handler) in list(log_listeners.items()):
+        start_listener(name, handler, listener.handlers)
+    if log_listeners:
+        import multiprocessing.util
+        multiprocessing.util.Finalize(None, stop_listeners, exitpriority=0)
+
+
+def stop_listeners():
+    for listener, handler in log_listeners.values():
+        listener.stop()
+        if handler.dropped:
+            sys.stderr.write(f"日志队列已满，丢弃: {handler.dropped}\n")
+    log_listeners.clear()
 
 
 def get_logger(name='main', fmt='%(asctime)s %(levelname)-5s %(filename)s:%(lineno)d - %(message)s'):
+    """
+    格式化在调用线程完成（消息里的对象之后可能被修改），写控制台和文件在后台线程。
+    """
     logger = logging.getLogger(name)
     if logger.handlers:
         return logger
@@ -22,19 +76,23 @@ def get_logger(name='main', fmt='%(asctime)s %(levelname)-5s %(filename)s:%(line
 
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
 
     log_file = f'log/{name}.log'
     log_path = Path(log_file)
     log_path.parent.mkdir(parents=True, exist_ok=True)
     file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
+    queue_handler = DropQueueHandler(None)
+    start_listener(name, queue_handler, [console_handler, file_handler])
+    logger.addHandler(queue_handler)
     return logger
 
 
 def flush_logger():
+    """等后台线程写完队列里已有的日志"""
+    for listener, handler in list(log_listeners.values()):
+        handler.queue.join()
     for logger_name in logging.Logger.manager.loggerDict:
         logger = logging.getLogger(logger_name)
         for handler in logger.handlers:
@@ -42,8 +100,66 @@ def flush_logger():
                 handler.flush()
             except Exception:
                 pass
+    for listener, handler in list(log_listeners.values()):
+        for target in listener.handlers:
+            try:
+                target.flush()
+            except Exception:
+                pass
 
 
+class LogJson:
+    """
+    日志参数用的json，只在真正输出时渲染，且有上限：
+    每个list/dict最多max_items项，嵌套最多max_depth层，单个字符串截断到max_str，结果截断到max_chars。
+    渲染开销与原对象大小无关。
+    """
+
+    def __init__(self, obj, max_items=8, max_depth=4, max_str=200, max_chars=2000):
+        self.obj = obj
+        self.max_items = max_items
+        self.max_depth = max_depth
+        self.max_str = max_str
+        self.max_chars = max_chars
+
+    def prune(self, obj, depth):
+        if isinstance(obj, str):
+            if len(obj) > self.max_str:
+                return f"{obj[:self.max_str]}...({len(obj)})"
+            return obj
+        if obj is None or isinstance(obj, (bool, int, float)):
+            return obj
+        if depth >= self.max_depth:
+            return f"...({type(obj).__name__})"
+        if isinstance(obj, dict):
+            result = {}
+            for i, key in enumerate(obj):
+                if i >= self.max_items:
+                    result['...'] = f"+{len(obj) - self.max_items}"
+                    break
+                result[str(key)] = self.prune(obj[key], depth + 1)
+            return result
+        if isinstance(obj, (list, tuple)):
+            result = [self.prune(item, depth + 1) for item in obj[:self.max_items]]
+            if len(obj) > self.max_items:
+                result.append(f"...+{len(obj) - self.max_items}")
+            return result
+        return self.prune(str(obj), depth)
+
+    def __str__(self):
+        content = json_dumps(self.prune(self.obj, 0))
+        if len(content) > self.max_chars:
+            return f"{content[:self.max_chars]}...({len(content)})"
+        return content
+
+
+def log_json(obj, max_items=8):
+    return LogJson(obj, max_items=max_items)
+
+
+atexit.register(stop_listeners)
+os.register_at_fork(after_in_child=restart_listeners)
+
 logger = get_logger()
 
 
@@ -246,6 +362,14 @@ def read_file_to_obj(file_path, default_value=''):
     return obj
 
 
+def get_file_hash(file_path, chunk_size=1024 * 1024):
+    sha1 = hashlib.sha1()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
 def move_file(from_path, to_path):
     mkdir(to_path)
     shutil.move(from_path, to_path)